@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Distributed Systems Assignment 1 - Admission Control
+
+This module protects the load balancer and its backends from overload.
+A global concurrency limit caps requests in flight through the proxy
+and a per-backend limit caps requests in flight to each server; a request
+over a limit waits in a short bounded queue and is shed if the queue is
+full or the wait times out. An optional per-client token bucket rate
+limits individual clients. Shed requests get a fast 503 with Retry-After
+instead of piling up on threads, so latency stays bounded for the
+requests that are admitted.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+RATE_LIMITED = 'rate_limited'
+QUEUE_FULL = 'queue_full'
+QUEUE_TIMEOUT = 'queue_timeout'
+BACKEND_SATURATED = 'backend_saturated'
+
+
+class ConcurrencyLimiter:
+    """
+    Thread-safe concurrency limit with a bounded wait queue.
+    """
+
+    def __init__(self, limit: int, queue_size: int, queue_timeout: float):
+        """
+        Args:
+            limit: Maximum requests in flight
+            queue_size: Maximum requests waiting for a slot
+            queue_timeout: Seconds a request waits for a slot before it is shed
+        """
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.queue_full = 0
+        self.queue_timeouts = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> Optional[str]:
+        """
+        Take a slot, waiting in the queue if none is free.
+
+        Returns:
+            None if admitted (the caller must release() the slot),
+            otherwise why the request was shed: queue_full or queue_timeout
+        """
+        with self._cond:
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                return None
+            if self.waiting >= self.queue_size:
+                self.queue_full += 1
+                return QUEUE_FULL
+            self.waiting += 1
+            try:
+                admitted = self._cond.wait_for(lambda: self.in_flight < self.limit, self.queue_timeout)
+            finally:
+                self.waiting -= 1
+            if not admitted:
+                self.queue_timeouts += 1
+                return QUEUE_TIMEOUT
+            self.in_flight += 1
+            return None
+
+    def release(self):
+        """Give back a slot and wake one waiting request."""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the limiter's occupancy and shed counters.
+
+        Returns:
+            Dictionary with limit, in-flight, waiting and shed counts
+        """
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'queue_full': self.queue_full,
+                'queue_timeouts': self.queue_timeouts
+            }
+
+
+class ClientRateLimiter:
+    """
+    Thread-safe token bucket per client, tracking a bounded number of clients.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        """
+        Args:
+            rate: Requests per second each client may sustain
+            burst: Requests a client may send at once after being idle
+            max_clients: Clients tracked at once; the least recently seen are forgotten
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: 'OrderedDict[str, list]' = OrderedDict()  # client -> [tokens, last refill]
+        self._lock = threading.Lock()
+
+    def check(self, client: str, now: Optional[float] = None) -> float:
+        """
+        Spend one of a client's tokens.
+
+        Args:
+            client: Client identity, e.g. its IP address
+            now: Current monotonic time (default: time.monotonic())
+
+        Returns:
+            0 if the request may proceed, otherwise seconds until the client's next token
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = [self.burst, now]
+                self._buckets[client] = bucket
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                return (1 - bucket[0]) / self.rate
+            bucket[0] -= 1
+            return 0.0
+
+
+class AdmissionController:
+    """
+    Global and per-backend concurrency limits plus per-client rate limiting.
+    """
+
+    def __init__(self, max_concurrency: int = 0, backend_max_concurrency: int = 0,
+                 queue_size: int = 50, queue_timeout: float = 0.5,
+                 client_rate: float = 0, client_burst: float = 20, retry_after: int = 1):
+        """
+        Initialize admission control; every limit is off when set to 0.
+
+        Args:
+            max_concurrency: Requests in flight through the proxy (default: unlimited)
+            backend_max_concurrency: Requests in flight to each backend (default: unlimited)
+            queue_size: Requests that may wait for a slot, per limit (default: 50)
+            queue_timeout: Seconds a request waits for a slot (default: 0.5)
+            client_rate: Requests per second per client (default: unlimited)
+            client_burst: Requests a client may send at once (default: 20)
+            retry_after: Retry-After seconds sent when a request is shed for load (default: 1)
+        """
+        self.backend_max_concurrency = backend_max_concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.limiter = ConcurrencyLimiter(max_concurrency, queue_size, queue_timeout) if max_concurrency > 0 else None
+        self.rate_limiter = ClientRateLimiter(client_rate, client_burst) if client_rate > 0 else None
+        self._backends: Dict[str, ConcurrencyLimiter] = {}
+        self._holders: Dict[str, int] = {}  # Requests holding or waiting for a backend slot
+        self._retired: Set[str] = set()  # Removed backends whose limiter still has holders
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.shed = {RATE_LIMITED: 0, QUEUE_FULL: 0, QUEUE_TIMEOUT: 0, BACKEND_SATURATED: 0}
+
+    def _count(self, reason: Optional[str]):
+        with self._lock:
+            if reason is None:
+                self.admitted += 1
+            else:
+                self.shed[reason] += 1
+
+    def admit(self, client: str) -> Optional[Tuple[str, int]]:
+        """
+        Decide whether a request may enter the proxy.
+
+        Args:
+            client: Client identity, e.g. its IP address
+
+        Returns:
+            None if admitted (the caller must release() once the response is done),
+            otherwise (shed reason, Retry-After seconds)
+        """
+        if self.rate_limiter is not None:
+            wait = self.rate_limiter.check(client)
+            if wait > 0:
+                self._count(RATE_LIMITED)
+                return RATE_LIMITED, max(1, math.ceil(wait))
+        if self.limiter is not None:
+            reason = self.limiter.acquire()
+            if reason is not None:
+                self._count(reason)
+                return reason, self.retry_after
+        self._count(None)
+        return None
+
+    def release(self):
+        """Give back the global slot taken by admit()."""
+        if self.limiter is not None:
+            self.limiter.release()
+
+    def acquire_backend(self, hostname: str) -> bool:
+        """
+        Take a slot on a backend, waiting in its queue if the backend is at its limit.
+
+        Args:
+            hostname: Backend hostname
+
+        Returns:
+            True if admitted; the caller must release_backend() the slot
+        """
+        if self.backend_max_concurrency <= 0:
+            return True
+        with self._lock:
+            limiter = self._backends.get(hostname)
+            if limiter is None:
+                limiter = ConcurrencyLimiter(self.backend_max_concurrency, self.queue_size, self.queue_timeout)
+                self._backends[hostname] = limiter
+            self._holders[hostname] = self._holders.get(hostname, 0) + 1
+        if limiter.acquire() is None:
+            return True
+        with self._lock:
+            self._drop_holder(hostname)
+        self._count(BACKEND_SATURATED)
+        return False
+
+    def release_backend(self, hostname: str):
+        """
+        Give back a slot taken by acquire_backend().
+
+        Args:
+            hostname: Backend hostname
+        """
+        with self._lock:
+            limiter = self._backends.get(hostname)
+            if limiter is not None:
+                self._drop_holder(hostname)
+        if limiter is not None:
+            limiter.release()
+
+    def _drop_holder(self, hostname: str):
+        """Count one holder out, dropping a retired limiter once it has none; call with _lock held."""
+        holders = self._holders.get(hostname, 0) - 1
+        if holders > 0:
+            self._holders[hostname] = holders
+            return
+        self._holders.pop(hostname, None)
+        if hostname in self._retired:
+            self._retired.discard(hostname)
+            self._backends.pop(hostname, None)
+
+    def forget(self, hostname: str):
+        """
+        Drop a removed backend's limiter, or retire it until requests still
+        holding its slots release them, so a backend that is added again
+        does not start from zero in flight.
+
+        Args:
+            hostname: Backend hostname
+        """
+        with self._lock:
+            if self._holders.get(hostname):
+                self._retired.add(hostname)
+            else:
+                self._backends.pop(hostname, None)
+
+    def stats(self) -> Dict:
+        """
+        Get admission and shed counters.
+
+        Returns:
+            Dictionary with admitted and shed counts, the global limiter and per-backend limiters
+        """
+        with self._lock:
+            backends = dict(self._backends)
+            counters = {'admitted': self.admitted, 'shed': dict(self.shed)}
+        counters['global'] = self.limiter.stats() if self.limiter is not None else None
+        counters['backends'] = {hostname: limiter.stats() for hostname, limiter in backends.items()}
+        return counters
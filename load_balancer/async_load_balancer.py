@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Distributed Systems Assignment 1 - Asyncio Load Balancer
+
+An alternative entry point to load_balancer.py built on aiohttp. It serves
+the same /add, /rm, /weight, /rep, /health and pass-through proxy API and routes with
+the same engines (configured through the same LB_* environment variables),
+but proxies upstream calls on one event loop with a shared, pooled
+aiohttp client instead of one OS thread per in-flight request. This lets
+a single process hold thousands of concurrent proxied requests.
+
+Run with: python async_load_balancer.py
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import aiohttp
+from aiohttp import web
+
+from consistent_hash import RoutingEngine
+from circuit_breaker import CircuitBreakers
+from health_check import HealthChecker
+from hedging import HedgePolicy, run_hedged_async
+from load_tracker import LoadTracker
+from request_keys import create_key_extractor_from_env
+from routing_engines import create_routing_engine_from_env
+from routing_policies import RoutePolicies
+from upstream_pool import filter_headers, IDEMPOTENT_METHODS, REPLAYABLE_BODY_LIMIT
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_TIMEOUT = 2  # Seconds per connect/read, matching the threaded load balancer
+STREAM_CHUNK_SIZE = 64 * 1024
+UPSTREAM_CONNECTIONS = int(os.environ.get('LB_UPSTREAM_CONNECTIONS', 1000))
+
+# Application state
+HASH_RING = web.AppKey('hash_ring', RoutingEngine)
+LOAD_TRACKER = web.AppKey('load_tracker', LoadTracker)
+CLIENT = web.AppKey('client', aiohttp.ClientSession)
+HEALTH_CHECKER = web.AppKey('health_checker', HealthChecker)
+CIRCUIT_BREAKERS = web.AppKey('circuit_breakers', CircuitBreakers)
+CONFIG = web.AppKey('config', dict)
+# Serializes ring changes from the handlers with ejections and restores from the health checker
+MEMBERSHIP_LOCK = web.AppKey('membership_lock', object)
+
+
+def failure(message: str, status: int) -> web.Response:
+    """
+    Build a JSON failure response in the load balancer's format.
+
+    Args:
+        message: Human readable error message
+        status: HTTP status code
+
+    Returns:
+        aiohttp JSON response
+    """
+    return web.json_response({"message": message, "status": "failure"}, status=status)
+
+
+async def change_membership(app: web.Application, change):
+    """
+    Apply a ring change in a worker thread while holding the membership lock.
+
+    The health checker changes the ring from its own thread under the same
+    lock, so the event loop must not block on it.
+
+    Args:
+        app: Application whose ring is changed
+        change: Function making the change; called with the lock held
+
+    Returns:
+        The change function's result
+    """
+    def locked():
+        with app[MEMBERSHIP_LOCK]:
+            return change()
+    return await asyncio.get_running_loop().run_in_executor(None, locked)
+
+
+@web.middleware
+async def error_middleware(request: web.Request, handler):
+    """Return JSON bodies for unknown endpoints, like the Flask app."""
+    try:
+        return await handler(request)
+    except web.HTTPNotFound:
+        return failure("Endpoint not found", 404)
+
+
+async def add_server(request: web.Request) -> web.Response:
+    app = request.app
+    hash_ring = app[HASH_RING]
+    data = await request.json()
+    n = data.get('n', 1)
+    hostnames = data.get('hostnames', [])
+    weights = data.get('weights', [])
+    if weights and not hash_ring.supports_weights:
+        return failure(f"Routing engine {hash_ring.name} does not support weights", 400)
+    if not all(isinstance(w, (int, float)) and w > 0 for w in weights):
+        return failure("Weights must be positive numbers", 400)
+
+    def add():
+        batch = []
+        for i in range(n):
+            server_id = app[CONFIG]['server_id_counter'] + i
+            hostname = hostnames[i] if i < len(hostnames) else f"Server{server_id}"
+            weight = weights[i] if i < len(weights) else 1.0
+            batch.append((server_id, hostname, weight))
+        if not hash_ring.add_servers(batch):
+            return []
+        app[CONFIG]['server_id_counter'] += len(batch)
+        return [hostname for _, hostname, _ in batch]
+
+    added = await change_membership(app, add)
+    return web.json_response({"message": {"added": added, "N": hash_ring.get_server_count()}})
+
+
+async def remove_server(request: web.Request) -> web.Response:
+    hash_ring = request.app[HASH_RING]
+    data = await request.json()
+    hostnames = data.get('hostnames', [])
+    n = data.get('n', len(hostnames) or 1)
+    health_checker = request.app[HEALTH_CHECKER]
+
+    def remove():
+        snapshot = hash_ring.snapshot
+        members = {info['hostname']: sid for sid, info in snapshot.servers.items()}
+        # Named servers go first; an ejected one is out of the ring but must not be restored
+        ejected = [hostname for hostname in hostnames if hostname not in members and health_checker.forget(hostname)]
+        ids = list(dict.fromkeys(members[hostname] for hostname in hostnames if hostname in members))
+        ids += [sid for sid in snapshot.servers if sid not in ids][:max(n - len(ejected) - len(ids), 0)]
+        removed = [snapshot.servers[sid]['hostname'] for sid in ids] if hash_ring.remove_servers(ids) else []
+        for hostname in ejected + removed:
+            health_checker.forget(hostname)
+            request.app[CIRCUIT_BREAKERS].forget(hostname)
+        return ejected + removed
+
+    removed = await change_membership(request.app, remove)
+    return web.json_response({"message": {"removed": removed, "N": hash_ring.get_server_count()}})
+
+
+async def set_weight(request: web.Request) -> web.Response:
+    hash_ring = request.app[HASH_RING]
+    data = await request.json()
+    hostname = data.get('hostname')
+    weight = data.get('weight')
+    if not hash_ring.supports_weights:
+        return failure(f"Routing engine {hash_ring.name} does not support weights", 400)
+    if not isinstance(weight, (int, float)) or weight <= 0:
+        return failure("Weight must be a positive number", 400)
+
+    def reweight():
+        ids = [sid for sid, info in hash_ring.servers.items() if info['hostname'] == hostname]
+        if not ids:
+            return failure(f"Server {hostname} not found", 404)
+        if not hash_ring.set_server_weight(ids[0], weight):
+            return failure(f"Could not set weight for {hostname}", 409)
+        virtual_nodes = len(hash_ring.servers[ids[0]]['virtual_positions'])
+        return web.json_response({"message": {"hostname": hostname, "weight": weight, "virtual_nodes": virtual_nodes}})
+
+    return await change_membership(request.app, reweight)
+
+
+async def get_replicas(request: web.Request) -> web.Response:
+    snapshot = request.app[HASH_RING].snapshot
+    return web.json_response({"message": {
+        "N": len(snapshot.servers),
+        "replicas": snapshot.hostnames(),
+        "version": snapshot.version
+    }})
+
+
+def pick_servers(app: web.Application, route: str, request_id, attempts: int):
+    hash_ring = app[HASH_RING]
+    policy = app[CONFIG]['route_policies'].policy_for(route)
+    if policy is not None:
+        return policy.pick(hash_ring.get_servers_list(), attempts)
+    epsilon = app[CONFIG]['bounded_load_epsilon']
+    candidates = hash_ring.get_preference_list(request_id, attempts)
+    if epsilon is None or not candidates:
+        return candidates
+    primary = hash_ring.get_server_bounded(request_id, app[LOAD_TRACKER].snapshot(), epsilon)
+    return [primary] + [server for server in candidates if server != primary][:attempts - 1]
+
+
+async def proxy(request: web.Request) -> web.StreamResponse:
+    """Forward any other path (including /home), streaming bodies both ways."""
+    app = request.app
+    config = app[CONFIG]
+    load_tracker = app[LOAD_TRACKER]
+    request_id, _ = config['key_extractor'].extract(request.query, request.headers, request.cookies, request.remote)
+
+    retryable = request.method in IDEMPOTENT_METHODS
+    body = None
+    if request.body_exists:
+        if retryable and request.content_length is not None and request.content_length <= REPLAYABLE_BODY_LIMIT:
+            body = await request.read()
+        else:
+            body, retryable = request.content, False
+
+    # Look far enough along the ring to find enough servers whose breaker is closed
+    breakers = app[CIRCUIT_BREAKERS]
+    attempts = config['retry_attempts'] if retryable else 1
+    candidates = pick_servers(app, request.path, request_id, attempts + len(breakers.open_hosts()))
+    if not candidates:
+        return failure("No servers available", 503)
+
+    headers = filter_headers(request.headers.items())
+    headers.append(('X-Forwarded-For', request.remote or ''))
+    deadline = time.monotonic() + config['retry_budget']
+    hedge_policy = app[CONFIG]['hedge_policy']
+    tried = []
+    remaining_candidates = iter(candidates)
+
+    def next_server():
+        # Takes the next server whose breaker lets a request through; a half-open
+        # breaker reserves its trial here, so call this right before sending
+        for server in remaining_candidates:
+            if breakers.allow(server):
+                tried.append(server)
+                return server
+        return None
+
+    async def attempt(server):
+        attempt_timeout = min(UPSTREAM_TIMEOUT, max(deadline - time.monotonic(), 0.001))
+        load_tracker.acquire(server)
+        started = time.monotonic()
+        try:
+            upstream = await app[CLIENT].request(
+                request.method, f"http://{server}:{config['backend_port']}{request.path_qs}",
+                headers=headers, data=body, allow_redirects=False,
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=attempt_timeout, sock_read=attempt_timeout)
+            )
+        except asyncio.CancelledError:
+            load_tracker.release(server)
+            breakers.abandon(server)  # Lost a hedge race; not the backend's fault
+            raise
+        except Exception:
+            load_tracker.release(server)
+            breakers.record(server, False, time.monotonic() - started)
+            logger.warning(f"Server {server} failed for {request.method} {request.path_qs}")
+            raise
+        latency = time.monotonic() - started
+        breakers.record(server, upstream.status < 500, latency)
+        if hedge_policy is not None:
+            hedge_policy.record_latency(latency)
+        return server, upstream
+
+    async def attempt_next():
+        server = next_server()
+        if server is None:
+            raise LookupError("No replica left to hedge to")
+        return await attempt(server)
+
+    def discard(result):
+        server, upstream = result
+        upstream.close()
+        load_tracker.release(server)
+
+    # The first attempt is hedged to the next replica when enabled; later failovers are not
+    hedged = hedge_policy is not None and retryable and attempts >= 2
+    result = None
+    while result is None and len(tried) < attempts:
+        if tried and deadline - time.monotonic() <= 0:
+            break
+        server = next_server()
+        if server is None:
+            break
+        try:
+            if hedged and len(tried) == 1:
+                result, _ = await run_hedged_async(hedge_policy, functools.partial(attempt, server),
+                                                   attempt_next, discard=discard)
+            else:
+                result = await attempt(server)
+        except Exception:
+            continue
+    if not tried:
+        return failure("No servers available (all circuits open)", 503)
+    if result is None:
+        noun = "Server" if len(tried) == 1 else "Servers"
+        return failure(f"{noun} {', '.join(tried)} unreachable", 502)
+    server, upstream = result
+
+    try:
+        response = web.StreamResponse(status=upstream.status, reason=upstream.reason,
+                                      headers=filter_headers(upstream.headers.items()))
+        await response.prepare(request)
+        async for chunk in upstream.content.iter_chunked(STREAM_CHUNK_SIZE):
+            await response.write(chunk)
+        await response.write_eof()
+    except BaseException:
+        upstream.close()  # Drop a connection whose body was not read to the end
+        raise
+    finally:
+        load_tracker.release(server)
+    upstream.release()
+    return response
+
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "healthy"})
+
+
+async def open_client(app: web.Application):
+    """Create the shared upstream client when the app starts."""
+    connector = aiohttp.TCPConnector(limit=UPSTREAM_CONNECTIONS)
+    app[CLIENT] = aiohttp.ClientSession(
+        connector=connector,
+        # No total timeout, so long streamed bodies are not cut off
+        timeout=aiohttp.ClientTimeout(total=None, sock_connect=UPSTREAM_TIMEOUT, sock_read=UPSTREAM_TIMEOUT),
+        auto_decompress=False  # Bodies are passed through with their Content-Encoding
+    )
+
+
+async def close_client(app: web.Application):
+    """Close the shared upstream client when the app stops."""
+    await app[CLIENT].close()
+
+
+async def start_health_checks(app: web.Application):
+    """Start the background health checker when the app starts."""
+    app[HEALTH_CHECKER].start()
+
+
+async def stop_health_checks(app: web.Application):
+    """Stop the background health checker without blocking the event loop."""
+    await asyncio.get_running_loop().run_in_executor(None, app[HEALTH_CHECKER].stop)
+
+
+def create_app(hash_ring: Optional[RoutingEngine] = None, backend_port: Optional[int] = None) -> web.Application:
+    """
+    Build the asyncio load balancer application.
+
+    Args:
+        hash_ring: Routing engine (default: configured from LB_* variables)
+        backend_port: Port backends listen on (default: LB_BACKEND_PORT or 5000)
+
+    Returns:
+        aiohttp application
+    """
+    backend_port = backend_port or int(os.environ.get('LB_BACKEND_PORT', 5000))
+    app = web.Application(middlewares=[error_middleware])
+    app[HASH_RING] = hash_ring if hash_ring is not None else create_routing_engine_from_env()
+    app[LOAD_TRACKER] = LoadTracker()
+    app[MEMBERSHIP_LOCK] = threading.Lock()
+
+    def on_health_change(hostname, healthy):
+        # A host that passes health checks again starts with a fresh breaker
+        if healthy:
+            app[CIRCUIT_BREAKERS].forget(hostname)
+
+    app[CIRCUIT_BREAKERS] = CircuitBreakers(
+        failure_threshold=int(os.environ.get('LB_BREAKER_FAILURES', 5)),
+        error_rate=float(os.environ.get('LB_BREAKER_ERROR_RATE', 0.5)),
+        window=int(os.environ.get('LB_BREAKER_WINDOW', 20)),
+        min_requests=int(os.environ.get('LB_BREAKER_MIN_REQUESTS', 10)),
+        open_seconds=float(os.environ.get('LB_BREAKER_OPEN_SECONDS', 10))
+    )
+    app[HEALTH_CHECKER] = HealthChecker(
+        app[HASH_RING],
+        port=backend_port,
+        interval=float(os.environ.get('LB_HEALTH_INTERVAL', 2)),
+        timeout=float(os.environ.get('LB_HEALTH_TIMEOUT', 1)),
+        rise=int(os.environ.get('LB_HEALTH_RISE', 2)),
+        fall=int(os.environ.get('LB_HEALTH_FALL', 3)),
+        lock=app[MEMBERSHIP_LOCK],
+        on_change=on_health_change
+    )
+    epsilon = os.environ.get('LB_BOUNDED_LOAD_EPSILON')
+    app[CONFIG] = {
+        'backend_port': backend_port,
+        'server_id_counter': 1,  # Mutable after startup, so kept inside a dict
+        'bounded_load_epsilon': float(epsilon) if epsilon else None,
+        'key_extractor': create_key_extractor_from_env(),
+        'retry_attempts': int(os.environ.get('LB_RETRY_ATTEMPTS', 3)),
+        'retry_budget': float(os.environ.get('LB_RETRY_BUDGET', 4)),
+        # Hedging is off unless LB_HEDGE_DELAY is set (milliseconds, or p95)
+        'hedge_policy': HedgePolicy(
+            os.environ['LB_HEDGE_DELAY'], budget=float(os.environ.get('LB_HEDGE_BUDGET', 0.1))
+        ) if os.environ.get('LB_HEDGE_DELAY') else None,
+        # Routes keep key affinity unless given a load-aware policy, e.g. "/static=p2c"
+        'route_policies': RoutePolicies(os.environ.get('LB_ROUTE_POLICIES', ''), app[LOAD_TRACKER].snapshot,
+                                        app[CIRCUIT_BREAKERS].latencies)
+    }
+
+    app.router.add_post('/add', add_server)
+    app.router.add_delete('/rm', remove_server)
+    app.router.add_put('/weight', set_weight)
+    app.router.add_get('/rep', get_replicas)
+    app.router.add_get('/health', health)
+    app.router.add_route('*', '/{path:.*}', proxy)
+
+    app.on_startup.append(open_client)
+    app.on_cleanup.append(close_client)
+    return app
+
+
+if __name__ == "__main__":
+    app = create_app()
+    if app[HEALTH_CHECKER].interval > 0:
+        app.on_startup.append(start_health_checks)
+        app.on_cleanup.append(stop_health_checks)
+    web.run_app(app, host="0.0.0.0", port=5000)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Distributed Systems Assignment 1 - Circuit Breakers
+
+This module implements passive outlier detection for backends. The proxy
+records the outcome and latency of every upstream request; a backend's
+breaker opens after too many consecutive failures or when its error rate
+over a rolling window crosses a threshold. While open, routing skips the
+backend instead of waiting out upstream timeouts. After a cool-down the
+breaker half-opens and lets a single trial request through: success
+closes it, failure opens it again.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Set
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# A failed request counts as at least this slow in the latency EWMA, so a
+# backend refusing connections quickly never looks faster than a healthy one
+FAILURE_LATENCY_MS = 2000.0
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker for one backend.
+
+    Not thread-safe on its own; CircuitBreakers serializes access.
+    """
+
+    def __init__(self, failure_threshold: int, error_rate: float, window: int,
+                 min_requests: int, open_seconds: float):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the breaker
+            error_rate: Failure ratio over the window that opens the breaker
+            window: Number of recent outcomes in the rolling window
+            min_requests: Outcomes needed in the window before the rate applies
+            open_seconds: Cool-down before an open breaker half-opens
+        """
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.outcomes = deque(maxlen=window)  # True for success
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.latency_ms = None  # EWMA of upstream latency
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def allow(self, now: float) -> bool:
+        """
+        Decide whether a request may be sent, half-opening after the cool-down.
+
+        Args:
+            now: Current monotonic time
+
+        Returns:
+            True if the request may go to this backend
+        """
+        if self.state == OPEN and now - self.opened_at >= self.open_seconds:
+            self.state = HALF_OPEN
+            self.trial_in_flight = False
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record(self, success: bool, latency: float, now: float):
+        """
+        Record the outcome of a request.
+
+        Args:
+            success: Whether the backend answered without error
+            latency: Seconds until the response headers arrived
+            now: Current monotonic time
+        """
+        latency_ms = latency * 1000 if success else max(latency * 1000, FAILURE_LATENCY_MS)
+        self.latency_ms = latency_ms if self.latency_ms is None else 0.8 * self.latency_ms + 0.2 * latency_ms
+        self.outcomes.append(success)
+        if success:
+            self.successes += 1
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self._close()
+            return
+
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self._tripped():
+            self.state = OPEN
+            self.opened_at = now
+            self.trial_in_flight = False
+
+    def abandon(self):
+        """Give back a half-open trial whose request was cancelled before it finished."""
+        if self.state == HALF_OPEN:
+            self.trial_in_flight = False
+
+    def _tripped(self) -> bool:
+        """Check the consecutive-failure and error-rate thresholds."""
+        if self.consecutive_failures >= self.failure_threshold:
+            return True
+        if len(self.outcomes) < self.min_requests:
+            return False
+        return self.outcomes.count(False) / len(self.outcomes) >= self.error_rate
+
+    def _close(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.outcomes.clear()
+        self.trial_in_flight = False
+
+
+class CircuitBreakers:
+    """
+    Thread-safe circuit breakers keyed by backend hostname.
+    """
+
+    def __init__(self, failure_threshold: int = 5, error_rate: float = 0.5, window: int = 20,
+                 min_requests: int = 10, open_seconds: float = 10.0):
+        """
+        Initialize the breaker registry.
+
+        Args:
+            failure_threshold: Consecutive failures that open a breaker (default: 5)
+            error_rate: Failure ratio over the window that opens a breaker (default: 0.5)
+            window: Number of recent outcomes in the rolling window (default: 20)
+            min_requests: Outcomes needed before the error rate applies (default: 10)
+            open_seconds: Cool-down before an open breaker half-opens (default: 10)
+        """
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.window = window
+        self.min_requests = min_requests
+        self.open_seconds = open_seconds
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, hostname: str) -> CircuitBreaker:
+        breaker = self._breakers.get(hostname)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.error_rate, self.window,
+                                     self.min_requests, self.open_seconds)
+            self._breakers[hostname] = breaker
+        return breaker
+
+    def allow(self, hostname: str) -> bool:
+        """
+        Decide whether a request may be sent to a backend.
+
+        A True answer for a half-open breaker reserves its single trial
+        request, so callers must follow it with record() or abandon().
+
+        Args:
+            hostname: Backend hostname
+
+        Returns:
+            True if the backend's breaker lets the request through
+        """
+        with self._lock:
+            return self._get(hostname).allow(time.monotonic())
+
+    def record(self, hostname: str, success: bool, latency: float):
+        """
+        Record the outcome of a request to a backend.
+
+        Args:
+            hostname: Backend hostname
+            success: Whether the backend answered without error
+            latency: Seconds until the response headers arrived
+        """
+        with self._lock:
+            self._get(hostname).record(success, latency, time.monotonic())
+
+    def abandon(self, hostname: str):
+        """
+        Record that an allowed request was cancelled without an outcome.
+
+        Args:
+            hostname: Backend hostname
+        """
+        with self._lock:
+            breaker = self._breakers.get(hostname)
+            if breaker is not None:
+                breaker.abandon()
+
+    def open_hosts(self) -> Set[str]:
+        """
+        Get the backends whose breaker is not closed.
+
+        Returns:
+            Set of hostnames with an open or half-open breaker
+        """
+        with self._lock:
+            return {hostname for hostname, breaker in self._breakers.items() if breaker.state != CLOSED}
+
+    def state(self, hostname: str) -> str:
+        """
+        Get a backend's breaker state.
+
+        Args:
+            hostname: Backend hostname
+
+        Returns:
+            One of closed, open, half_open
+        """
+        with self._lock:
+            breaker = self._breakers.get(hostname)
+            return breaker.state if breaker is not None else CLOSED
+
+    def latencies(self) -> Dict[str, float]:
+        """
+        Get the EWMA upstream latency of every backend that has answered.
+
+        Returns:
+            Dictionary mapping hostnames to latency in milliseconds
+        """
+        with self._lock:
+            return {hostname: breaker.latency_ms for hostname, breaker in self._breakers.items()
+                    if breaker.latency_ms is not None}
+
+    def forget(self, hostname: str):
+        """
+        Drop a backend's breaker, e.g. after removal or a passed health check.
+
+        Args:
+            hostname: Backend hostname
+        """
+        with self._lock:
+            self._breakers.pop(hostname, None)
+
+    def clear(self):
+        """Drop all breakers."""
+        with self._lock:
+            self._breakers.clear()
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Get state, counters and latency for every backend.
+
+        Returns:
+            Dictionary mapping hostnames to breaker statistics
+        """
+        with self._lock:
+            return {
+                hostname: {
+                    'state': breaker.state,
+                    'successes': breaker.successes,
+                    'failures': breaker.failures,
+                    'rejected': breaker.rejected,
+                    'consecutive_failures': breaker.consecutive_failures,
+                    'latency_ms': round(breaker.latency_ms, 3) if breaker.latency_ms is not None else None
+                }
+                for hostname, breaker in self._breakers.items()
+            }
@@ -8,7 +8,19 @@ This module implements a consistent hashing algorithm using:
 - 9 virtual servers per physical server (log₂(512))
 - Hash function H(i) = i² + 2i + 17 for request mapping
 - Hash function Φ(i,j) = i² + j² + 2j + 25 for virtual server mapping
-- Linear probing for conflict resolution
+  (or another hash family from hash_functions.py; string keys hash too)
+- Linear probing for conflict resolution, backed by a free-slot bitmap
+- Sorted index of occupied positions for O(log V) binary-search lookups
+- Optional dense slot-to-owner successor table for O(1) lookups
+- NumPy-vectorized batch routing for pre-routing large key sets
+- Immutable versioned ring snapshots: writers stage changes on a copy
+  and publish it atomically, readers route lock-free against one snapshot
+- Per-server weights that scale the number of virtual servers
+- Consistent hashing with bounded loads (Mirrokni et al.) driven by
+  live in-flight request counts
+- Preference lists of distinct servers in clockwise failover order
+- A RoutingEngine interface shared with the alternative engines in
+  routing_engines.py (jump hash, rendezvous, Maglev)
 
 The consistent hashing ensures:
 1. Even load distribution across servers
@@ -18,12 +30,369 @@ The consistent hashing ensures:
 Author: Maiyo Dennis
 """
 
+import bisect
 import logging
-from typing import Optional, List, Dict, Tuple
+import math
+import threading
+from abc import ABC, abstractmethod
+from types import MappingProxyType
+from typing import Optional, List, Dict, Tuple, Iterable, Iterator, Mapping
+
+from hash_functions import RequestKey, get_hash_family, key_to_int, keys_to_array
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for batch routing
+    np = None
 
 logger = logging.getLogger(__name__)
 
-class ConsistentHash:
+class RoutingEngine(ABC):
+    """
+    Interface shared by every request routing algorithm.
+    
+    Engines keep their membership in an immutable snapshot exposing
+    `version`, `servers` (server ID -> {'hostname': ...}) and
+    `hostnames()`. Writers publish a new snapshot per change, so the
+    load balancer can route lock-free against whichever engine is
+    configured.
+    """
+    
+    name = None  # Engine name used in configuration
+    supports_weights = False  # Whether per-server weights are honoured
+    
+    @property
+    @abstractmethod
+    def snapshot(self):
+        """Current immutable membership snapshot."""
+    
+    @abstractmethod
+    def add_servers(self, servers: List[Tuple[int, str]]) -> bool:
+        """
+        Add several servers as one all-or-nothing update.
+        
+        Args:
+            servers: List of (server_id, hostname) pairs, or
+                (server_id, hostname, weight) for weighted engines
+            
+        Returns:
+            True if all servers were added, False if none were
+        """
+    
+    @abstractmethod
+    def remove_servers(self, server_ids: List[int]) -> bool:
+        """
+        Remove several servers as one all-or-nothing update.
+        
+        Args:
+            server_ids: Server identifiers to remove
+            
+        Returns:
+            True if all servers were removed, False if none were
+        """
+    
+    @abstractmethod
+    def get_server(self, request_id: RequestKey) -> Optional[str]:
+        """
+        Get the server hostname that should handle a given request.
+        
+        Args:
+            request_id: Request identifier (int ID or string key)
+            
+        Returns:
+            Server hostname or None if no servers available
+        """
+    
+    @abstractmethod
+    def get_ring_status(self) -> Dict:
+        """
+        Get detailed engine status for debugging.
+        
+        Returns:
+            Dictionary containing engine statistics
+        """
+    
+    @abstractmethod
+    def clear(self):
+        """
+        Remove every server.
+        """
+    
+    @property
+    def version(self) -> int:
+        """Version of the current snapshot."""
+        return self.snapshot.version
+    
+    @property
+    def servers(self) -> Dict[int, Dict]:
+        """Read-only server metadata keyed by server ID."""
+        return self.snapshot.servers
+    
+    def add_server(self, server_id: int, hostname: str, weight: float = 1.0) -> bool:
+        """
+        Add a single server.
+        
+        Args:
+            server_id: Unique identifier for the server
+            hostname: Server hostname/container name
+            weight: Relative capacity (weighted engines only)
+            
+        Returns:
+            True if server was successfully added, False otherwise
+        """
+        return self.add_servers([(server_id, hostname, weight)])
+    
+    def set_server_weight(self, server_id: int, weight: float) -> bool:
+        """
+        Change the relative capacity of a server in place.
+        
+        Args:
+            server_id: Server identifier
+            weight: New relative capacity
+            
+        Returns:
+            True if the weight was applied, False otherwise
+        
+        Raises:
+            NotImplementedError: If the engine does not support weights
+        """
+        raise NotImplementedError(f"The {self.name} engine does not support server weights")
+    
+    def remove_server(self, server_id: int) -> bool:
+        """
+        Remove a single server.
+        
+        Args:
+            server_id: Server identifier to remove
+            
+        Returns:
+            True if server was successfully removed, False otherwise
+        """
+        return self.remove_servers([server_id])
+    
+    def get_server_bounded(self, request_id: RequestKey, loads: Mapping[str, int],
+                           epsilon: float) -> Optional[str]:
+        """
+        Get a server for a request while respecting a load bound.
+        
+        Engines without a clockwise order fall back to get_server().
+        
+        Args:
+            request_id: Request identifier
+            loads: In-flight request count per hostname
+            epsilon: Allowed overload factor above the average load
+            
+        Returns:
+            Server hostname or None if no servers available
+        """
+        return self.get_server(request_id)
+    
+    def get_preference_list(self, request_id: RequestKey, n: int) -> List[str]:
+        """
+        Get up to n distinct servers for a request in failover order.
+        
+        The first entry is get_server(request_id); each following entry is
+        where the request would go if all servers before it were gone.
+        Engines without a failover order return only the primary.
+        
+        Args:
+            request_id: Request identifier
+            n: Maximum number of servers to return
+            
+        Returns:
+            List of distinct server hostnames, best first
+        """
+        server = self.get_server(request_id)
+        return [server] if server is not None and n > 0 else []
+    
+    def get_servers_list(self) -> List[str]:
+        """
+        Get list of all active server hostnames.
+        
+        Returns:
+            List of server hostnames
+        """
+        return self.snapshot.hostnames()
+    
+    def get_server_count(self) -> int:
+        """
+        Get the number of active servers.
+        
+        Returns:
+            Number of servers
+        """
+        return len(self.snapshot.servers)
+
+
+class RingSnapshot:
+    """
+    Immutable, versioned layout of a hash ring.
+    
+    Holds slot owners, server metadata and the lookup indexes. Published
+    snapshots are frozen (tuples and read-only mappings) and never change;
+    writers copy() one into a mutable draft, modify the draft and freeze()
+    it as the next version. Readers grab the current snapshot once and
+    route against it without taking any lock.
+    """
+    
+    def __init__(self, slots: int, dense_table: bool, version: int = 0):
+        self.slots = slots
+        self.version = version
+        self.ring = [None] * slots  # Initialize empty ring
+        self.servers = {}  # Server metadata storage
+        self.positions = []  # Sorted occupied ring positions
+        self.free_mask = (1 << slots) - 1  # Bit p set while slot p is free
+        # Hostname owning each slot (first server clockwise), dense mode only
+        self.owner_table = [None] * slots if dense_table else None
+        self.freeze(version)
+    
+    def copy(self) -> 'RingSnapshot':
+        """
+        Make a mutable draft of this snapshot to stage changes on.
+        
+        Returns:
+            Draft sharing no mutable containers with this snapshot
+        """
+        draft = RingSnapshot.__new__(RingSnapshot)
+        draft.slots = self.slots
+        draft.version = self.version
+        draft.ring = list(self.ring)
+        draft.servers = {
+            server_id: {
+                'hostname': info['hostname'],
+                'weight': info['weight'],
+                'virtual_positions': list(info['virtual_positions'])
+            }
+            for server_id, info in self.servers.items()
+        }
+        draft.positions = list(self.positions)
+        draft.free_mask = self.free_mask
+        draft.owner_table = list(self.owner_table) if self.owner_table is not None else None
+        return draft
+    
+    def freeze(self, version: int):
+        """
+        Make a draft read-only and stamp it with its version.
+        
+        Args:
+            version: Version number of the published snapshot
+        """
+        self.version = version
+        self.ring = tuple(self.ring)
+        self.servers = MappingProxyType({
+            server_id: MappingProxyType({
+                'hostname': info['hostname'],
+                'weight': info['weight'],
+                'virtual_positions': tuple(info['virtual_positions'])
+            })
+            for server_id, info in self.servers.items()
+        })
+        self.positions = tuple(self.positions)
+        if self.owner_table is not None:
+            self.owner_table = tuple(self.owner_table)
+    
+    def hostnames(self) -> List[str]:
+        """
+        Get the hostnames of all servers in this snapshot.
+        
+        Returns:
+            List of server hostnames
+        """
+        return [info['hostname'] for info in self.servers.values()]
+    
+    def find_next_available_slot(self, start_pos: int) -> Optional[int]:
+        """
+        Find the next available slot using linear probing.
+        
+        Probes the free-slot bitmap instead of the ring: the lowest set
+        bit at or above start_pos is the first free slot clockwise, and
+        if there is none the search wraps to the lowest free slot. Big
+        integer shifts and masks scan a machine word at a time, so this
+        yields exactly the slot a slot-by-slot probe would.
+        
+        Args:
+            start_pos: Starting position for search
+            
+        Returns:
+            Next available slot position or None if ring is full
+        """
+        if not self.free_mask:
+            return None  # Ring is full
+        
+        ahead = self.free_mask >> start_pos
+        if ahead:
+            return start_pos + (ahead & -ahead).bit_length() - 1
+        
+        # Wrap around to the lowest free slot
+        return (self.free_mask & -self.free_mask).bit_length() - 1
+    
+    def occupy(self, pos: int, server_id: int):
+        """
+        Place a virtual server at a free ring position.
+        
+        Only valid on a draft. Updates the ring, the free-slot bitmap, the sorted position index
+        and, in dense mode, the arc of the owner table that the new
+        position now claims.
+        
+        Args:
+            pos: Free ring position
+            server_id: Physical server owning the virtual server
+        """
+        self.ring[pos] = server_id
+        self.free_mask &= ~(1 << pos)
+        bisect.insort(self.positions, pos)
+        
+        if self.owner_table is not None:
+            index = bisect.bisect_left(self.positions, pos)
+            previous = self.positions[index - 1]
+            self._fill_owner_arc(previous, pos, self.servers[server_id]['hostname'])
+    
+    def release(self, pos: int):
+        """
+        Free an occupied ring position.
+        
+        Only valid on a draft. Updates the ring, the free-slot bitmap, the sorted position index
+        and, in dense mode, hands the freed arc over to the next virtual
+        server clockwise.
+        
+        Args:
+            pos: Occupied ring position
+        """
+        self.ring[pos] = None
+        self.free_mask |= 1 << pos
+        index = bisect.bisect_left(self.positions, pos)
+        if index < len(self.positions) and self.positions[index] == pos:
+            del self.positions[index]
+        
+        if self.owner_table is not None:
+            if not self.positions:
+                self.owner_table = [None] * self.slots
+                return
+            successor = self.positions[index % len(self.positions)]
+            previous = self.positions[index - 1]
+            hostname = self.servers[self.ring[successor]]['hostname']
+            self._fill_owner_arc(previous, pos, hostname)
+    
+    def _fill_owner_arc(self, start: int, end: int, hostname: Optional[str]):
+        """
+        Assign every slot in the clockwise arc (start, end] to a hostname.
+        
+        An arc whose start equals its end covers the whole ring.
+        
+        Args:
+            start: Exclusive arc start (the previous virtual server)
+            end: Inclusive arc end (the owning virtual server)
+            hostname: Owner of the arc
+        """
+        table = self.owner_table
+        if start < end:
+            table[start + 1:end + 1] = [hostname] * (end - start)
+        else:
+            table[start + 1:] = [hostname] * (self.slots - start - 1)
+            table[:end + 1] = [hostname] * (end + 1)
+
+
+class ConsistentHash(RoutingEngine):
     """
     Consistent Hash Ring implementation for load balancing.
     
@@ -31,34 +400,71 @@ class ConsistentHash:
     to ensure even distribution of requests across server replicas.
     """
     
-    def __init__(self, slots: int = 512, virtual_servers: int = 9):
+    name = 'consistent_hash'
+    supports_weights = True
+    
+    def __init__(self, slots: int = 512, virtual_servers: int = 9, dense_table: bool = False,
+                 hash_family: str = 'polynomial'):
         """
         Initialize the consistent hash ring.
         
         Args:
             slots: Total number of slots in the hash ring (default: 512)
             virtual_servers: Number of virtual servers per physical server (default: 9)
+            dense_table: Keep a full slot-to-hostname successor table so
+                lookups are a single index (default: False)
+            hash_family: Hash family name from hash_functions.py
+                (default: 'polynomial', the original H and Φ)
         """
         self.slots = slots
         self.virtual_servers = virtual_servers
-        self.ring = [None] * slots  # Initialize empty ring
-        self.servers = {}  # Server metadata storage
+        self.hash_family = get_hash_family(hash_family)
+        self.dense_table = dense_table
+        self._snapshot = RingSnapshot(slots, dense_table)
+        self._write_lock = threading.Lock()  # Serializes copy-modify-publish
         
         logger.info(f"Initialized consistent hash with {slots} slots and {virtual_servers} virtual servers")
     
-    def hash_request(self, request_id: int) -> int:
+    @property
+    def snapshot(self) -> RingSnapshot:
+        """Current immutable ring snapshot."""
+        return self._snapshot
+    
+    @property
+    def ring(self) -> Tuple[Optional[int], ...]:
+        """Server ID occupying each slot (None for free slots)."""
+        return self._snapshot.ring
+    
+    @property
+    def positions(self) -> Tuple[int, ...]:
+        """Sorted occupied ring positions."""
+        return self._snapshot.positions
+    
+    @property
+    def free_mask(self) -> int:
+        """Free-slot bitmap (bit p set while slot p is free)."""
+        return self._snapshot.free_mask
+    
+    @property
+    def owner_table(self) -> Optional[Tuple[Optional[str], ...]]:
+        """Slot-to-hostname successor table, None unless in dense mode."""
+        return self._snapshot.owner_table
+    
+    def hash_request(self, request_id: RequestKey) -> int:
         """
         Hash function for mapping requests to ring positions.
         
-        Uses the formula: H(i) = i² + 2i + 17
+        Uses the configured hash family; the default polynomial family
+        uses the formula: H(i) = i² + 2i + 17. String keys are first
+        hashed to a stable 64-bit integer.
         
         Args:
-            request_id: Unique identifier for the request
+            request_id: Unique identifier for the request (int or str)
             
         Returns:
             Ring position (0 to slots-1)
         """
-        hash_value = (request_id * request_id + 2 * request_id + 17) % self.slots
+        hash_value = self.hash_family.request(key_to_int(request_id), self.slots)
         logger.debug(f"Request {request_id} hashed to position {hash_value}")
         return hash_value
     
@@ -66,7 +472,8 @@ class ConsistentHash:
         """
         Hash function for mapping virtual servers to ring positions.
         
-        Uses the formula: Φ(i,j) = i² + j² + 2j + 25
+        Uses the configured hash family; the default polynomial family
+        uses the formula: Φ(i,j) = i² + j² + 2j + 25
         
         Args:
             server_id: Physical server identifier
@@ -75,11 +482,7 @@ class ConsistentHash:
         Returns:
             Ring position (0 to slots-1)
         """
-        hash_value = (
-            server_id * server_id + 
-            virtual_id * virtual_id + 
-            2 * virtual_id + 25
-        ) % self.slots
+        hash_value = self.hash_family.virtual_server(server_id, virtual_id, self.slots)
         
         logger.debug(f"Virtual server ({server_id}, {virtual_id}) hashed to position {hash_value}")
         return hash_value
@@ -94,71 +497,225 @@ class ConsistentHash:
         Returns:
             Next available slot position or None if ring is full
         """
-        for i in range(self.slots):
-            pos = (start_pos + i) % self.slots
-            if self.ring[pos] is None:
-                return pos
-        return None  # Ring is full
+        return self._snapshot.find_next_available_slot(start_pos)
     
-    def add_server(self, server_id: int, hostname: str) -> bool:
+    def _publish(self, draft: RingSnapshot):
         """
-        Add a physical server with its virtual replicas to the ring.
+        Freeze a draft as the next version and make it the live snapshot.
+        
+        Must be called with the write lock held.
+        
+        Args:
+            draft: Mutable draft copied from the current snapshot
+        """
+        draft.freeze(self._snapshot.version + 1)
+        self._snapshot = draft  # Single reference swap, atomic for readers
+    
+    def virtual_node_count(self, weight: float) -> int:
+        """
+        Number of virtual servers a server of the given weight gets.
+        
+        Args:
+            weight: Relative capacity (1.0 = virtual_servers replicas)
+            
+        Returns:
+            Virtual server count, at least 1
+        """
+        return max(1, round(self.virtual_servers * weight))
+    
+    def _place_virtual_servers(self, state: RingSnapshot, server_id: int, start: int, stop: int) -> bool:
+        """
+        Place virtual replicas start..stop-1 of a server into a draft.
         
         Args:
+            state: Draft snapshot to modify
+            server_id: Server whose metadata is already in the draft
+            start: First virtual replica number
+            stop: One past the last virtual replica number
+            
+        Returns:
+            True if every replica was placed, False if the ring is full
+        """
+        for j in range(start, stop):
+            initial_pos = self.hash_virtual_server(server_id, j)
+            
+            # Use linear probing to find available slot
+            pos = state.find_next_available_slot(initial_pos)
+            
+            if pos is None:
+                logger.error(f"Cannot place virtual servers for server {server_id}: ring is full")
+                return False
+            
+            # Place virtual server in the ring
+            state.occupy(pos, server_id)
+            state.servers[server_id]['virtual_positions'].append(pos)
+            
+            logger.debug(f"Added virtual server ({server_id}, {j}) at position {pos}")
+        
+        return True
+    
+    def _place_server(self, state: RingSnapshot, server_id: int, hostname: str,
+                      weight: float = 1.0) -> bool:
+        """
+        Place a physical server and its virtual replicas into a draft.
+        
+        Args:
+            state: Draft snapshot to modify
             server_id: Unique identifier for the server
             hostname: Server hostname/container name
+            weight: Relative capacity scaling the virtual replica count
             
         Returns:
-            True if server was successfully added, False otherwise
+            True if every virtual replica was placed, False otherwise
         """
-        if server_id in self.servers:
+        if server_id in state.servers:
             logger.warning(f"Server {server_id} already exists")
             return False
         
+        if weight <= 0:
+            logger.warning(f"Invalid weight {weight} for server {server_id}")
+            return False
+        
         # Initialize server metadata
-        self.servers[server_id] = {
+        state.servers[server_id] = {
             'hostname': hostname,
+            'weight': weight,
             'virtual_positions': []
         }
         
         # Add virtual servers to the ring
-        for j in range(self.virtual_servers):
-            initial_pos = self.hash_virtual_server(server_id, j)
+        if not self._place_virtual_servers(state, server_id, 0, self.virtual_node_count(weight)):
+            # Rollback: remove previously added virtual servers
+            self._rollback_server_addition(server_id, state)
+            return False
+        
+        return True
+    
+    def add_server(self, server_id: int, hostname: str, weight: float = 1.0) -> bool:
+        """
+        Add a physical server with its virtual replicas to the ring.
+        
+        Args:
+            server_id: Unique identifier for the server
+            hostname: Server hostname/container name
+            weight: Relative capacity; the server gets
+                round(virtual_servers * weight) replicas (default: 1.0)
             
-            # Use linear probing to find available slot
-            pos = self._find_next_available_slot(initial_pos)
+        Returns:
+            True if server was successfully added, False otherwise
+        """
+        with self._write_lock:
+            draft = self._snapshot.copy()
+            if not self._place_server(draft, server_id, hostname, weight):
+                return False
+            self._publish(draft)
+        
+        logger.info(f"Successfully added server {server_id} ({hostname}) with {self.virtual_node_count(weight)} virtual replicas")
+        return True
+    
+    def add_servers(self, servers: List[Tuple]) -> bool:
+        """
+        Add several physical servers as one all-or-nothing update.
+        
+        The servers are placed on a single draft, which is published as
+        one new snapshot only if every server fits. On any failure the
+        draft is discarded, so readers never see a partially applied batch.
+        
+        Args:
+            servers: List of (server_id, hostname) or
+                (server_id, hostname, weight) tuples
             
-            if pos is None:
-                logger.error(f"Cannot add server {server_id}: ring is full")
-                # Rollback: remove previously added virtual servers
-                self._rollback_server_addition(server_id)
+        Returns:
+            True if all servers were added, False if none were
+        """
+        with self._write_lock:
+            draft = self._snapshot.copy()
+            for server_id, hostname, *weight in servers:
+                if not self._place_server(draft, server_id, hostname, *weight):
+                    logger.error(f"Bulk addition of {len(servers)} servers aborted at server {server_id}")
+                    return False
+            self._publish(draft)
+        
+        logger.info(f"Successfully added {len(servers)} servers")
+        return True
+    
+    def set_server_weight(self, server_id: int, weight: float) -> bool:
+        """
+        Change a server's weight without removing and re-adding it.
+        
+        Only the difference in virtual replicas is applied: replicas are
+        appended (j = old count, old count + 1, ...) or the highest
+        numbered ones are released, so keys owned by the server's other
+        replicas stay where they are.
+        
+        Args:
+            server_id: Server identifier
+            weight: New relative capacity
+            
+        Returns:
+            True if the weight was applied, False otherwise
+        """
+        if weight <= 0:
+            logger.warning(f"Invalid weight {weight} for server {server_id}")
+            return False
+        
+        with self._write_lock:
+            if server_id not in self._snapshot.servers:
+                logger.warning(f"Server {server_id} not found for weight change")
                 return False
             
-            # Place virtual server in the ring
-            self.ring[pos] = server_id
-            self.servers[server_id]['virtual_positions'].append(pos)
+            draft = self._snapshot.copy()
+            info = draft.servers[server_id]
+            current = len(info['virtual_positions'])
+            target = self.virtual_node_count(weight)
             
-            logger.debug(f"Added virtual server ({server_id}, {j}) at position {pos}")
+            if target > current:
+                if not self._place_virtual_servers(draft, server_id, current, target):
+                    return False
+            else:
+                for pos in info['virtual_positions'][target:]:
+                    draft.release(pos)
+                del info['virtual_positions'][target:]
+            
+            info['weight'] = weight
+            self._publish(draft)
         
-        logger.info(f"Successfully added server {server_id} ({hostname}) with {self.virtual_servers} virtual replicas")
+        logger.info(f"Set weight of server {server_id} to {weight} ({target} virtual replicas)")
         return True
     
-    def _rollback_server_addition(self, server_id: int):
+    def _rollback_server_addition(self, server_id: int, state: RingSnapshot):
         """
         Remove partially added server in case of failure.
         
         Args:
             server_id: Server ID to rollback
+            state: Draft snapshot holding the partial server
         """
-        if server_id in self.servers:
+        if server_id in state.servers:
             # Remove virtual servers from ring
-            for pos in self.servers[server_id]['virtual_positions']:
-                self.ring[pos] = None
+            for pos in state.servers[server_id]['virtual_positions']:
+                state.release(pos)
             
             # Remove server metadata
-            del self.servers[server_id]
+            del state.servers[server_id]
             logger.debug(f"Rolled back server {server_id}")
     
+    def _unplace_server(self, state: RingSnapshot, server_id: int):
+        """
+        Remove a physical server and its virtual replicas from a draft.
+        
+        Args:
+            state: Draft snapshot to modify
+            server_id: Server identifier present in the state
+        """
+        # Remove all virtual servers from ring
+        for pos in state.servers[server_id]['virtual_positions']:
+            state.release(pos)
+            logger.debug(f"Removed virtual server at position {pos}")
+        
+        # Remove server metadata
+        del state.servers[server_id]
+    
     def remove_server(self, server_id: int) -> bool:
         """
         Remove a server and all its virtual replicas from the ring.
@@ -169,72 +726,219 @@ class ConsistentHash:
         Returns:
             True if server was successfully removed, False otherwise
         """
-        if server_id not in self.servers:
-            logger.warning(f"Server {server_id} not found for removal")
-            return False
+        with self._write_lock:
+            if server_id not in self._snapshot.servers:
+                logger.warning(f"Server {server_id} not found for removal")
+                return False
+            
+            hostname = self._snapshot.servers[server_id]['hostname']
+            draft = self._snapshot.copy()
+            self._unplace_server(draft, server_id)
+            self._publish(draft)
         
-        hostname = self.servers[server_id]['hostname']
+        logger.info(f"Successfully removed server {server_id} ({hostname})")
+        return True
+    
+    def remove_servers(self, server_ids: List[int]) -> bool:
+        """
+        Remove several servers as one all-or-nothing update.
         
-        # Remove all virtual servers from ring
-        for pos in self.servers[server_id]['virtual_positions']:
-            self.ring[pos] = None
-            logger.debug(f"Removed virtual server at position {pos}")
+        Like add_servers, the removals are staged on one draft and
+        published as a single new snapshot.
         
-        # Remove server metadata
-        del self.servers[server_id]
+        Args:
+            server_ids: Server identifiers to remove
+            
+        Returns:
+            True if all servers were removed, False if none were
+        """
+        with self._write_lock:
+            draft = self._snapshot.copy()
+            for server_id in server_ids:
+                if server_id not in draft.servers:
+                    logger.warning(f"Server {server_id} not found for removal; bulk removal aborted")
+                    return False
+                self._unplace_server(draft, server_id)
+            self._publish(draft)
         
-        logger.info(f"Successfully removed server {server_id} ({hostname})")
+        logger.info(f"Successfully removed {len(server_ids)} servers")
         return True
     
-    def get_server(self, request_id: int) -> Optional[str]:
+    def clear(self):
+        """
+        Remove every server and reset the ring to its empty state.
+        """
+        with self._write_lock:
+            self._snapshot = RingSnapshot(self.slots, self.dense_table, self._snapshot.version + 1)
+        logger.info("Cleared all servers from the hash ring")
+    
+    def get_server(self, request_id: RequestKey) -> Optional[str]:
         """
         Get the server hostname that should handle a given request.
         
-        Uses clockwise traversal from the request's hash position
-        to find the nearest server.
+        Binary-searches the sorted index of occupied positions for the
+        first virtual server at or clockwise of the request's hash
+        position, wrapping around to the lowest position at the end of
+        the ring. Runs in O(log V) for V virtual servers, or as a single
+        owner table index in dense mode.
         
         Args:
-            request_id: Request identifier
+            request_id: Request identifier (int ID or string key)
             
         Returns:
             Server hostname or None if no servers available
         """
-        if not self.servers:
+        state = self._snapshot  # Read once; writers publish new snapshots
+        if not state.servers:
             logger.warning("No servers available to handle request")
             return None
         
+        if state.owner_table is not None:
+            return state.owner_table[self.hash_request(request_id)]
+        
         start_pos = self.hash_request(request_id)
         
         # Find next server in clockwise direction
-        for i in range(self.slots):
-            check_pos = (start_pos + i) % self.slots
-            if self.ring[check_pos] is not None:
-                server_id = self.ring[check_pos]
-                hostname = self.servers[server_id]['hostname']
-                
-                logger.debug(f"Request {request_id} assigned to server {hostname} (ID: {server_id})")
-                return hostname
+        index = bisect.bisect_left(state.positions, start_pos)
+        if index == len(state.positions):
+            index = 0  # Wrap around the ring
         
-        logger.error("Ring traversal completed but no server found")
-        return None
+        server_id = state.ring[state.positions[index]]
+        hostname = state.servers[server_id]['hostname']
+        
+        logger.debug(f"Request {request_id} assigned to server {hostname} (ID: {server_id})")
+        return hostname
     
-    def get_servers_list(self) -> List[str]:
+    def _walk_clockwise(self, state: RingSnapshot, request_id: RequestKey) -> Iterator[int]:
         """
-        Get list of all active server hostnames.
+        Yield distinct server IDs clockwise from a request's hash position.
+        
+        Args:
+            state: Ring snapshot to walk
+            request_id: Request identifier (int ID or string key)
+            
+        Yields:
+            Each physical server ID once, in ring order
+        """
+        positions = state.positions
+        start = bisect.bisect_left(positions, self.hash_request(request_id))
+        seen = set()
+        for i in range(len(positions)):
+            server_id = state.ring[positions[(start + i) % len(positions)]]
+            if server_id in seen:
+                continue
+            seen.add(server_id)
+            yield server_id
+            if len(seen) == len(state.servers):
+                return
+    
+    def get_preference_list(self, request_id: RequestKey, n: int) -> List[str]:
+        """
+        Get up to n distinct servers for a request in clockwise order.
         
+        The first entry matches get_server(); the next ones are the
+        following distinct physical servers clockwise on the ring, which
+        are exactly where the request moves if the servers before them
+        are removed.
+        
+        Args:
+            request_id: Request identifier (int ID or string key)
+            n: Maximum number of servers to return
+            
         Returns:
-            List of server hostnames
+            List of distinct server hostnames, best first
         """
-        return [info['hostname'] for info in self.servers.values()]
+        state = self._snapshot
+        servers = state.servers
+        preference = []
+        if n <= 0:
+            return preference
+        for server_id in self._walk_clockwise(state, request_id):
+            preference.append(servers[server_id]['hostname'])
+            if len(preference) == n:
+                break
+        return preference
     
-    def get_server_count(self) -> int:
+    def get_server_bounded(self, request_id: RequestKey, loads: Mapping[str, int],
+                           epsilon: float) -> Optional[str]:
         """
-        Get the number of active servers.
+        Get a server for a request using consistent hashing with bounded loads.
+        
+        Every server may hold at most ceil((1 + epsilon) * average) requests,
+        where the average includes the request being routed. Starting at
+        the request's hash position, the lookup walks clockwise over
+        distinct servers and returns the first one still under that bound,
+        so hot key ranges spill over to the next servers on the ring
+        instead of piling onto one replica. Since the bound is at least
+        the average, some server is always under it.
         
+        Args:
+            request_id: Request identifier (int ID or string key)
+            loads: In-flight request count per hostname
+            epsilon: Allowed overload factor above the average load
+            
         Returns:
-            Number of servers in the ring
+            Server hostname or None if no servers available
         """
-        return len(self.servers)
+        state = self._snapshot
+        if not state.servers:
+            logger.warning("No servers available to handle request")
+            return None
+        
+        servers = state.servers
+        total = sum(loads.get(info['hostname'], 0) for info in servers.values()) + 1
+        capacity = math.ceil((1 + epsilon) * total / len(servers))
+        
+        for server_id in self._walk_clockwise(state, request_id):
+            hostname = servers[server_id]['hostname']
+            if loads.get(hostname, 0) < capacity:
+                return hostname
+        
+        logger.error("No server under the load bound; this should not happen")
+        return None
+    
+    def get_servers_batch(self, request_ids: Iterable[RequestKey]) -> "np.ndarray":
+        """
+        Get the server hostnames for many requests in one vectorized pass.
+        
+        Evaluates the request hash family over the whole batch with NumPy and
+        resolves owners with a single searchsorted over the sorted
+        position index (or a single gather from the owner table in dense
+        mode). Intended for offline pre-routing such as cache warming and
+        capacity planning; no per-request logging is done.
+        
+        Args:
+            request_ids: Array-like of integer request IDs or string keys
+            
+        Returns:
+            NumPy object array of hostnames aligned with request_ids
+            (None entries if no servers are available)
+        
+        Raises:
+            RuntimeError: If NumPy is not installed
+        """
+        if np is None:
+            raise RuntimeError("get_servers_batch requires numpy")
+        
+        state = self._snapshot
+        keys = keys_to_array(request_ids, self.hash_family, self.slots)
+        if not state.servers:
+            return np.full(keys.shape, None, dtype=object)
+        
+        start_positions = self.hash_family.request_array(keys, self.slots)
+        
+        if state.owner_table is not None:
+            return np.array(state.owner_table, dtype=object)[start_positions]
+        
+        occupied = np.array(state.positions, dtype=np.int64)
+        indices = np.searchsorted(occupied, start_positions, side='left')
+        indices[indices == len(occupied)] = 0  # Wrap around the ring
+        
+        owners = np.array(
+            [state.servers[state.ring[pos]]['hostname'] for pos in state.positions],
+            dtype=object
+        )
+        return owners[indices]
     
     def get_ring_status(self) -> Dict:
         """
@@ -243,23 +947,51 @@ class ConsistentHash:
         Returns:
             Dictionary containing ring statistics
         """
-        occupied_slots = sum(1 for slot in self.ring if slot is not None)
+        snapshot = self._snapshot
+        occupied_slots = len(snapshot.positions)
         
         return {
+            'engine': self.name,
+            'version': snapshot.version,
             'total_slots': self.slots,
             'occupied_slots': occupied_slots,
             'free_slots': self.slots - occupied_slots,
-            'server_count': len(self.servers),
+            'server_count': len(snapshot.servers),
             'virtual_servers_per_physical': self.virtual_servers,
+            'hash_family': self.hash_family.name,
+            'ownership': self._ownership(snapshot),
             'servers': {
                 server_id: {
                     'hostname': info['hostname'],
-                    'virtual_positions': info['virtual_positions']
+                    'weight': info['weight'],
+                    'virtual_nodes': len(info['virtual_positions']),
+                    'virtual_positions': list(info['virtual_positions'])
                 }
-                for server_id, info in self.servers.items()
+                for server_id, info in snapshot.servers.items()
             }
         }
     
+    def _ownership(self, snapshot: RingSnapshot) -> Dict[str, float]:
+        """
+        Share of ring slots each server owns.
+        
+        A virtual server owns the slots from just after the previous occupied
+        position up to and including its own, wrapping around the ring.
+        
+        Args:
+            snapshot: Ring snapshot to measure
+            
+        Returns:
+            Dictionary mapping hostnames to their fraction of the ring
+        """
+        positions = snapshot.positions
+        ownership = {info['hostname']: 0.0 for info in snapshot.servers.values()}
+        for i, position in enumerate(positions):
+            arc = (position - positions[i - 1]) % self.slots or self.slots
+            hostname = snapshot.servers[snapshot.ring[position]]['hostname']
+            ownership[hostname] += arc / self.slots
+        return ownership
+    
     def validate_ring_integrity(self) -> Tuple[bool, List[str]]:
         """
         Validate the integrity of the hash ring.
@@ -267,17 +999,40 @@ class ConsistentHash:
         Returns:
             Tuple of (is_valid, list_of_issues)
         """
+        snapshot = self._snapshot
         issues = []
         
         # Check for orphaned slots
-        for pos, server_id in enumerate(self.ring):
-            if server_id is not None and server_id not in self.servers:
+        for pos, server_id in enumerate(snapshot.ring):
+            if server_id is not None and server_id not in snapshot.servers:
                 issues.append(f"Orphaned server {server_id} at position {pos}")
         
+        # Check the sorted position index against the ring
+        occupied = [pos for pos, server_id in enumerate(snapshot.ring) if server_id is not None]
+        if list(snapshot.positions) != occupied:
+            issues.append("Sorted position index does not match occupied ring slots")
+        
+        # Check the free-slot bitmap against the ring
+        for pos, server_id in enumerate(snapshot.ring):
+            if bool(snapshot.free_mask >> pos & 1) != (server_id is None):
+                issues.append(f"Free-slot bitmap is wrong at position {pos}")
+                break
+        
+        # Check the dense owner table against a clockwise walk
+        if snapshot.owner_table is not None:
+            for slot in range(self.slots):
+                expected = None
+                if snapshot.positions:
+                    index = bisect.bisect_left(snapshot.positions, slot) % len(snapshot.positions)
+                    expected = snapshot.servers[snapshot.ring[snapshot.positions[index]]]['hostname']
+                if snapshot.owner_table[slot] != expected:
+                    issues.append(f"Owner table slot {slot} maps to {snapshot.owner_table[slot]}, expected {expected}")
+                    break
+        
         # Check server virtual positions
-        for server_id, info in self.servers.items():
+        for server_id, info in snapshot.servers.items():
             for pos in info['virtual_positions']:
-                if pos >= self.slots or self.ring[pos] != server_id:
+                if pos >= self.slots or snapshot.ring[pos] != server_id:
                     issues.append(f"Invalid virtual position {pos} for server {server_id}")
         
         is_valid = len(issues) == 0
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Distributed Systems Assignment 1 - Hash Function Families
+
+This module provides the hash families used to place requests and virtual
+servers on the consistent hash ring:
+- polynomial: H(i) = i² + 2i + 17 and Φ(i,j) = i² + j² + 2j + 25 (default,
+  kept for compatibility with existing ring layouts)
+- knuth: Knuth multiplicative hashing, i * 2654435761 mod 2³²
+- splitmix64: SplitMix64 finalizer, a strong 64-bit mixer
+- murmur3: MurmurHash3 fmix64 finalizer
+
+The multiplicative and mixer families reduce to a slot with a
+multiply-shift on the high bits rather than a modulo, so sequential IDs
+spread across the whole ring. String keys (session or user IDs) are
+first turned into a stable 64-bit integer.
+"""
+
+import hashlib
+from typing import Dict, Optional, Union
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for batch hashing
+    np = None
+
+MASK32 = (1 << 32) - 1
+MASK64 = (1 << 64) - 1
+
+KNUTH_MULTIPLIER = 2654435761  # ≈ 2³² / golden ratio
+
+RequestKey = Union[int, str]
+
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+
+
+def hash_text(text: str, salt: bytes = b'') -> int:
+    """
+    Stable 64-bit hash of a string (independent of PYTHONHASHSEED).
+
+    Args:
+        text: String to hash
+        salt: Optional salt to derive independent hash functions
+
+    Returns:
+        64-bit hash value
+    """
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=8, salt=salt).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def key_to_int(key: RequestKey) -> int:
+    """
+    Turn a request key into an integer hash families can consume.
+
+    Args:
+        key: Integer request ID or string key
+
+    Returns:
+        The integer itself, or a stable 64-bit hash of the string
+    """
+    if isinstance(key, str):
+        return hash_text(key)
+    return key
+
+
+def mix64(value: int) -> int:
+    """
+    SplitMix64 finalizer: scramble an integer into a well-spread 64-bit hash.
+
+    Args:
+        value: Integer to hash (reduced to 64 bits)
+
+    Returns:
+        64-bit hash value
+    """
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+def fmix64(value: int) -> int:
+    """
+    MurmurHash3 fmix64 finalizer.
+
+    Args:
+        value: Integer to hash (reduced to 64 bits)
+
+    Returns:
+        64-bit hash value
+    """
+    value &= MASK64
+    value ^= value >> 33
+    value = (value * 0xFF51AFD7ED558CCD) & MASK64
+    value ^= value >> 33
+    value = (value * 0xC4CEB9FE1A85EC53) & MASK64
+    return value ^ (value >> 33)
+
+
+def _mix64_array(values: "np.ndarray") -> "np.ndarray":
+    """Vectorized mix64 over a uint64 array (wrapping arithmetic)."""
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _fmix64_array(values: "np.ndarray") -> "np.ndarray":
+    """Vectorized fmix64 over a uint64 array (wrapping arithmetic)."""
+    values = values ^ (values >> np.uint64(33))
+    values = values * np.uint64(0xFF51AFD7ED558CCD)
+    values = values ^ (values >> np.uint64(33))
+    values = values * np.uint64(0xC4CEB9FE1A85EC53)
+    return values ^ (values >> np.uint64(33))
+
+
+class HashFamily:
+    """
+    A pair of hash functions for requests and virtual servers.
+
+    Subclasses implement request() and virtual_server() for scalars and
+    request_array() for NumPy batches; all three must agree exactly.
+    """
+
+    name = None
+
+    def request(self, key: int, slots: int) -> int:
+        """
+        Map an integer request key to a ring position.
+
+        Args:
+            key: Integer request key
+            slots: Number of ring slots
+
+        Returns:
+            Ring position (0 to slots-1)
+        """
+        raise NotImplementedError
+
+    def virtual_server(self, server_id: int, virtual_id: int, slots: int) -> int:
+        """
+        Map a virtual server to a ring position.
+
+        Args:
+            server_id: Physical server identifier
+            virtual_id: Virtual server replica number
+            slots: Number of ring slots
+
+        Returns:
+            Ring position (0 to slots-1)
+        """
+        raise NotImplementedError
+
+    def reduce_key(self, key: int, slots: int) -> int:
+        """
+        Reduce a key too large for a NumPy array to one that hashes the same.
+
+        The default keeps the low 64 bits, which is all the multiplicative
+        and mixer families look at.
+
+        Args:
+            key: Integer request key outside the 64-bit range
+            slots: Number of ring slots
+
+        Returns:
+            Equivalent key that fits in 64 bits
+        """
+        return key & MASK64
+
+    def request_array(self, keys: "np.ndarray", slots: int) -> "np.ndarray":
+        """
+        Map an array of integer request keys to ring positions.
+
+        Args:
+            keys: int64 or uint64 array of request keys
+            slots: Number of ring slots
+
+        Returns:
+            int64 array of ring positions
+        """
+        raise NotImplementedError
+
+
+class PolynomialHash(HashFamily):
+    """The original quadratic hash functions H(i) and Φ(i,j)."""
+
+    name = 'polynomial'
+
+    def request(self, key: int, slots: int) -> int:
+        return (key * key + 2 * key + 17) % slots
+
+    def virtual_server(self, server_id: int, virtual_id: int, slots: int) -> int:
+        return (
+            server_id * server_id +
+            virtual_id * virtual_id +
+            2 * virtual_id + 25
+        ) % slots
+
+    def reduce_key(self, key: int, slots: int) -> int:
+        # H(i) mod slots depends on the whole key, not just its low 64 bits
+        return key % slots
+
+    def request_array(self, keys: "np.ndarray", slots: int) -> "np.ndarray":
+        # Reduce first so the quadratic cannot overflow 64 bits
+        reduced = np.mod(keys, slots).astype(np.int64)
+        return (reduced * reduced + 2 * reduced + 17) % slots
+
+
+class KnuthHash(HashFamily):
+    """Knuth multiplicative hashing on the low 32 bits of the key."""
+
+    name = 'knuth'
+
+    def request(self, key: int, slots: int) -> int:
+        return (((key & MASK32) * KNUTH_MULTIPLIER & MASK32) * slots) >> 32
+
+    def virtual_server(self, server_id: int, virtual_id: int, slots: int) -> int:
+        return self.request((server_id << 16) + virtual_id, slots)
+
+    def request_array(self, keys: "np.ndarray", slots: int) -> "np.ndarray":
+        low = keys.astype(np.uint64) & np.uint64(MASK32)
+        product = (low * np.uint64(KNUTH_MULTIPLIER)) & np.uint64(MASK32)
+        return ((product * np.uint64(slots)) >> np.uint64(32)).astype(np.int64)
+
+
+class _MixerHash(HashFamily):
+    """Base for 64-bit mixer families: slot from the top 32 hash bits."""
+
+    def mix(self, value: int) -> int:
+        raise NotImplementedError
+
+    def mix_array(self, values: "np.ndarray") -> "np.ndarray":
+        raise NotImplementedError
+
+    def request(self, key: int, slots: int) -> int:
+        return ((self.mix(key & MASK64) >> 32) * slots) >> 32
+
+    def virtual_server(self, server_id: int, virtual_id: int, slots: int) -> int:
+        return ((self.mix(self.mix(server_id & MASK64) ^ virtual_id) >> 32) * slots) >> 32
+
+    def request_array(self, keys: "np.ndarray", slots: int) -> "np.ndarray":
+        mixed = self.mix_array(keys.astype(np.uint64))
+        return (((mixed >> np.uint64(32)) * np.uint64(slots)) >> np.uint64(32)).astype(np.int64)
+
+
+class SplitMix64Hash(_MixerHash):
+    """SplitMix64 finalizer family."""
+
+    name = 'splitmix64'
+
+    def mix(self, value: int) -> int:
+        return mix64(value)
+
+    def mix_array(self, values: "np.ndarray") -> "np.ndarray":
+        return _mix64_array(values)
+
+
+class Murmur3Hash(_MixerHash):
+    """MurmurHash3 fmix64 finalizer family."""
+
+    name = 'murmur3'
+
+    def mix(self, value: int) -> int:
+        return fmix64(value)
+
+    def mix_array(self, values: "np.ndarray") -> "np.ndarray":
+        return _fmix64_array(values)
+
+
+HASH_FAMILIES: Dict[str, HashFamily] = {
+    family.name: family
+    for family in (PolynomialHash(), KnuthHash(), SplitMix64Hash(), Murmur3Hash())
+}
+
+
+def get_hash_family(name: str) -> HashFamily:
+    """
+    Look up a hash family by name.
+
+    Args:
+        name: One of polynomial, knuth, splitmix64, murmur3
+
+    Returns:
+        Hash family instance
+
+    Raises:
+        ValueError: If the family name is unknown
+    """
+    if name not in HASH_FAMILIES:
+        raise ValueError(f"Unknown hash family '{name}'; expected one of {sorted(HASH_FAMILIES)}")
+    return HASH_FAMILIES[name]
+
+
+def keys_to_array(keys, family: Optional[HashFamily] = None, slots: int = 1) -> "np.ndarray":
+    """
+    Convert a batch of request keys into an integer NumPy array.
+
+    Integer arrays are used as they are. Other batches (lists mixing
+    string keys and integers) are converted key by key: the result is
+    int64 when every key fits. Keys outside the int64 range are reduced
+    with the hash family's reduce_key(), so the batch hashes them exactly
+    like the scalar path; without a family, or if reduced keys still do
+    not fit, all keys are reduced modulo 2⁶⁴ into a uint64 array.
+
+    Args:
+        keys: Array-like of integer IDs and/or string keys
+        family: Hash family the keys will be hashed with (default: none)
+        slots: Number of ring slots, passed to family.reduce_key() (default: 1)
+
+    Returns:
+        int64 or uint64 array of integer keys
+    """
+    if isinstance(keys, np.ndarray) and keys.dtype.kind in 'iu':
+        return keys if keys.dtype.kind == 'u' else keys.astype(np.int64)
+
+    ints = [key_to_int(key) for key in (keys.tolist() if isinstance(keys, np.ndarray) else keys)]
+    if family is not None:
+        ints = [value if INT64_MIN <= value <= INT64_MAX else family.reduce_key(value, slots)
+                for value in ints]
+    if all(INT64_MIN <= value <= INT64_MAX for value in ints):
+        return np.array(ints, dtype=np.int64)
+    return np.array([value & MASK64 for value in ints], dtype=np.uint64)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Distributed Systems Assignment 1 - Active Health Checking
+
+This module probes every backend's /heartbeat endpoint from a background
+thread. A healthy backend that fails `fall` consecutive probes is
+ejected from the routing engine; an ejected backend that passes `rise`
+consecutive probes is added back with its original server ID and weight,
+so it reclaims the same ring positions. The last server in the ring is
+never ejected: routing to a host that fails its probes beats routing to
+nothing. Probes run concurrently and routing reads immutable snapshots,
+so the request path never waits on a health check.
+"""
+
+import http.client
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from consistent_hash import RoutingEngine
+
+logger = logging.getLogger(__name__)
+
+
+class HealthChecker:
+    """
+    Background /heartbeat prober with rise/fall thresholds.
+    """
+
+    def __init__(self, hash_ring: RoutingEngine, port: int = 5000, path: str = '/heartbeat',
+                 interval: float = 2.0, timeout: float = 1.0, rise: int = 2, fall: int = 3,
+                 lock: Optional[threading.Lock] = None,
+                 on_change: Optional[Callable[[str, bool], None]] = None):
+        """
+        Initialize the health checker.
+
+        Args:
+            hash_ring: Routing engine whose members are probed
+            port: Port the backends listen on (default: 5000)
+            path: Health check path (default: /heartbeat)
+            interval: Seconds between probe rounds (default: 2)
+            timeout: Probe timeout in seconds (default: 1)
+            rise: Consecutive successes before an ejected host is restored (default: 2)
+            fall: Consecutive failures before a healthy host is ejected (default: 3)
+            lock: Lock serializing membership changes with the load balancer
+            on_change: Called with (hostname, healthy) after an ejection or restore
+        """
+        self.hash_ring = hash_ring
+        self.port = port
+        self.path = path
+        self.interval = interval
+        self.timeout = timeout
+        self.rise = rise
+        self.fall = fall
+        self.lock = lock or threading.Lock()
+        self.on_change = on_change
+
+        # hostname -> {'healthy', 'successes', 'failures'} consecutive probe counters
+        self._state: Dict[str, Dict] = {}
+        # hostname -> (server_id, weight) for hosts removed by the checker
+        self._ejected: Dict[str, tuple] = {}
+        self._state_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def probe(self, hostname: str) -> bool:
+        """
+        Probe one backend once.
+
+        Args:
+            hostname: Backend hostname
+
+        Returns:
+            True if the backend answered with a 2xx status in time
+        """
+        conn = http.client.HTTPConnection(hostname, self.port, timeout=self.timeout)
+        try:
+            conn.request('GET', self.path)
+            return 200 <= conn.getresponse().status < 300
+        except (OSError, http.client.HTTPException):
+            return False
+        finally:
+            conn.close()
+
+    def check_once(self) -> Dict[str, bool]:
+        """
+        Run one probe round over all ring members and ejected hosts, then
+        eject or restore hosts that crossed a threshold.
+
+        Returns:
+            Dictionary mapping hostnames to this round's probe result
+        """
+        members = {info['hostname']: (server_id, info.get('weight', 1.0))
+                   for server_id, info in self.hash_ring.servers.items()}
+        with self._state_lock:
+            targets = dict(self._ejected)
+        targets.update(members)
+        if not targets:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(32, len(targets))) as executor:
+            results = dict(zip(targets, executor.map(self.probe, targets)))
+
+        for hostname, ok in results.items():
+            self._record(hostname, targets[hostname], ok)
+        self._prune(members)
+        return results
+
+    def _record(self, hostname: str, member: tuple, ok: bool):
+        """Update consecutive counters for one host and act on thresholds."""
+        with self._state_lock:
+            state = self._state.setdefault(hostname, {'healthy': True, 'successes': 0, 'failures': 0})
+            if ok:
+                state['successes'] += 1
+                state['failures'] = 0
+            else:
+                state['failures'] += 1
+                state['successes'] = 0
+            eject = state['healthy'] and state['failures'] >= self.fall
+            restore = not state['healthy'] and state['successes'] >= self.rise
+
+        if eject:
+            self._eject(hostname, member, state['failures'])
+        elif restore:
+            self._restore(hostname)
+
+    def _eject(self, hostname: str, member: tuple, failures: int):
+        """Remove a failing host from the ring and remember how to restore it."""
+        server_id, weight = member
+        with self.lock:
+            if self.hash_ring.get_server_count() <= 1:
+                if failures == self.fall:
+                    logger.warning(f"Keeping {hostname} despite failed health checks: it is the last server")
+                return
+            if not self.hash_ring.remove_server(server_id):
+                return
+            with self._state_lock:
+                self._state[hostname]['healthy'] = False
+                self._ejected[hostname] = (server_id, weight)
+        logger.warning(f"Ejected {hostname} after {self.fall} failed health checks")
+        if self.on_change:
+            self.on_change(hostname, False)
+
+    def _restore(self, hostname: str):
+        """Add a recovered host back with its original server ID and weight."""
+        with self.lock:
+            # Checked under the membership lock so a concurrent /rm cannot be undone
+            with self._state_lock:
+                member = self._ejected.get(hostname)
+            if member is None:
+                return
+            server_id, weight = member
+            if any(info['hostname'] == hostname for info in self.hash_ring.servers.values()):
+                restored = True  # Re-added by hand meanwhile
+            elif self.hash_ring.supports_weights:
+                restored = self.hash_ring.add_server(server_id, hostname, weight)
+            else:
+                restored = self.hash_ring.add_server(server_id, hostname)
+            if not restored:
+                return
+            with self._state_lock:
+                self._state[hostname]['healthy'] = True
+                self._ejected.pop(hostname, None)
+        logger.info(f"Restored {hostname} after {self.rise} successful health checks")
+        if self.on_change:
+            self.on_change(hostname, True)
+
+    def _prune(self, members: Dict[str, tuple]):
+        """Forget counters of hosts that are neither ring members nor ejected."""
+        with self._state_lock:
+            for hostname in list(self._state):
+                if hostname not in members and hostname not in self._ejected:
+                    del self._state[hostname]
+
+    def forget(self, hostname: str) -> bool:
+        """
+        Stop tracking a host, e.g. after it was removed with /rm, so an
+        ejected host is not restored.
+
+        Args:
+            hostname: Backend hostname
+
+        Returns:
+            True if the host was ejected and waiting to be restored
+        """
+        with self._state_lock:
+            self._state.pop(hostname, None)
+            return self._ejected.pop(hostname, None) is not None
+
+    def clear(self):
+        """Forget all hosts and counters."""
+        with self._state_lock:
+            self._state.clear()
+            self._ejected.clear()
+
+    def status(self) -> Dict[str, Dict]:
+        """
+        Get the health state of every tracked host.
+
+        Returns:
+            Dictionary mapping hostnames to healthy flag and consecutive counts
+        """
+        with self._state_lock:
+            return {hostname: dict(state) for hostname, state in self._state.items()}
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.check_once()
+            except Exception:
+                logger.exception("Health check round failed")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start probing in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='health-checker', daemon=True)
+        self._thread.start()
+        logger.info(f"Health checks every {self.interval}s on {self.path} (rise={self.rise}, fall={self.fall})")
+
+    def stop(self):
+        """Stop the probing thread and wait for the current round to end."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Distributed Systems Assignment 1 - Hedged Requests
+
+This module decides when the proxy may hedge an idempotent request: if
+the primary backend has not answered within the hedge delay, a second
+copy goes to the next distinct replica and whichever answers first wins.
+The delay is either fixed or the observed p95 upstream latency, and a
+token-bucket budget caps hedges at a fraction of all requests so hedging
+cannot amplify load during an incident.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+P95 = 'p95'
+P95_REFRESH = 50  # Recompute the p95 after this many new latencies
+
+
+class HedgePolicy:
+    """
+    Thread-safe hedge delay and budget.
+    """
+
+    def __init__(self, delay: str = P95, budget: float = 0.1, burst: float = 10.0,
+                 window: int = 1000, min_samples: int = 20, fallback_delay: float = 0.05):
+        """
+        Initialize the hedge policy.
+
+        Args:
+            delay: Hedge delay in milliseconds, or 'p95' to follow observed latency
+            budget: Hedges allowed per request, e.g. 0.1 for at most 10% extra load
+            burst: Maximum hedges that can be saved up while traffic is quiet
+            window: Number of recent latencies kept for the p95
+            min_samples: Latencies needed before the p95 is trusted
+            fallback_delay: Delay in seconds until enough latencies are observed
+        """
+        self.fixed_delay = None if delay == P95 else float(delay) / 1000
+        self.budget = budget
+        self.burst = burst
+        self.min_samples = min_samples
+        self.fallback_delay = fallback_delay
+        self._latencies = deque(maxlen=window)
+        self._p95 = None
+        self._since_p95 = 0
+        self._tokens = burst
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_exhausted = 0
+
+    def record_latency(self, latency: float):
+        """
+        Record how long a backend took to answer.
+
+        Args:
+            latency: Seconds until the response headers arrived
+        """
+        with self._lock:
+            self._latencies.append(latency)
+            self._since_p95 += 1
+            if self._since_p95 >= P95_REFRESH:
+                self._p95 = None  # Recomputed lazily by delay()
+
+    def delay(self) -> float:
+        """
+        Get the current hedge delay.
+
+        Returns:
+            Seconds to wait for the primary before hedging
+        """
+        if self.fixed_delay is not None:
+            return self.fixed_delay
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.fallback_delay
+            if self._p95 is None:
+                self._since_p95 = 0
+                ordered = sorted(self._latencies)
+                self._p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+            return self._p95
+
+    def on_request(self):
+        """Count a hedgeable request and earn its share of the hedge budget."""
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self.burst, self._tokens + self.budget)
+
+    def try_hedge(self) -> bool:
+        """
+        Spend one hedge from the budget.
+
+        Returns:
+            True if a hedge may be sent
+        """
+        with self._lock:
+            if self._tokens < 1:
+                self.budget_exhausted += 1
+                return False
+            self._tokens -= 1
+            self.hedges += 1
+            return True
+
+    def on_hedge_win(self):
+        """Count a hedge that answered before the primary."""
+        with self._lock:
+            self.hedge_wins += 1
+
+    def stats(self) -> Dict:
+        """
+        Get hedging counters.
+
+        Returns:
+            Dictionary with request, hedge and budget counts plus the current delay
+        """
+        delay = self.delay()
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins,
+                'budget_exhausted': self.budget_exhausted,
+                'delay_ms': round(delay * 1000, 3)
+            }
+
+
+def run_hedged(policy: HedgePolicy, executor: Executor,
+               primary: Callable[[], T], hedge: Callable[[], T],
+               discard: Callable[[T], None], cancel: Callable[[int], None]) -> Tuple[T, int]:
+    """
+    Run a request with a delayed hedge and return the first success.
+
+    Args:
+        policy: Hedge policy supplying the delay and budget
+        executor: Executor running both attempts
+        primary: Sends the request to the primary backend; raises on failure
+        hedge: Sends the request to the hedge backend; raises on failure
+        discard: Releases a result that lost the race
+        cancel: Aborts the in-flight attempt with the given index (0 or 1)
+
+    Returns:
+        Tuple of (winning result, 0 for the primary or 1 for the hedge)
+
+    Raises:
+        The last attempt's exception if every attempt failed
+    """
+    policy.on_request()
+    futures = [executor.submit(primary)]
+    done, _ = wait(futures, timeout=policy.delay())
+    if not done and policy.try_hedge():
+        futures.append(executor.submit(hedge))
+
+    pending = set(futures)
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                error = future.exception()
+                continue
+            winner = futures.index(future)
+            for index, other in enumerate(futures):
+                if other is not future:
+                    _discard_loser(other, index, discard, cancel)
+            if winner == 1:
+                policy.on_hedge_win()
+            return future.result(), winner
+    raise error
+
+
+def _discard_loser(future, index: int, discard: Callable, cancel: Callable[[int], None]):
+    """Cancel a losing attempt and release its result if it still arrives."""
+    if future.done():
+        if future.exception() is None:
+            discard(future.result())
+        return
+    cancel(index)
+    future.add_done_callback(lambda f: discard(f.result()) if f.exception() is None else None)
+
+
+async def run_hedged_async(policy: HedgePolicy, primary: Callable[[], Awaitable[T]],
+                           hedge: Callable[[], Awaitable[T]],
+                           discard: Callable[[T], None]) -> Tuple[T, int]:
+    """
+    Asyncio version of run_hedged(); the losing attempt's task is cancelled.
+
+    Args:
+        policy: Hedge policy supplying the delay and budget
+        primary: Coroutine function sending the request to the primary backend
+        hedge: Coroutine function sending the request to the hedge backend
+        discard: Releases a result that lost the race
+
+    Returns:
+        Tuple of (winning result, 0 for the primary or 1 for the hedge)
+
+    Raises:
+        The last attempt's exception if every attempt failed
+    """
+    policy.on_request()
+    tasks = [asyncio.ensure_future(primary())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=policy.delay())
+        if not done and policy.try_hedge():
+            tasks.append(asyncio.ensure_future(hedge()))
+
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                winner = tasks.index(task)
+                for other in tasks:
+                    if other is task:
+                        continue
+                    if not other.done():
+                        other.cancel()
+                    elif other.exception() is None:
+                        discard(other.result())
+                if winner == 1:
+                    policy.on_hedge_win()
+                return task.result(), winner
+        raise error
+    except asyncio.CancelledError:
+        for task in tasks:
+            task.cancel()
+        raise
@@ -1,70 +1,599 @@
-from flask import Flask, request, jsonify
-from consistent_hash import ConsistentHash
-import requests
+from flask import Flask, Response, request, jsonify
+from routing_engines import create_routing_engine_from_env
+from request_keys import create_key_extractor_from_env
+from routing_policies import RoutePolicies
+from load_tracker import LoadTracker
+from upstream_pool import UpstreamPool, CancelToken, filter_headers, IDEMPOTENT_METHODS, REPLAYABLE_BODY_LIMIT
+from health_check import HealthChecker
+from circuit_breaker import CircuitBreakers
+from hedging import HedgePolicy, run_hedged
+from response_cache import ResponseCache, parse_route_ttls
+from single_flight import SingleFlight, SharedResponse, flight_key, is_shareable
+from admission import AdmissionController, RATE_LIMITED
+from metrics import Metrics, CONTENT_TYPE, COUNTER, HISTOGRAM
+from request_timing import RequestTiming, SlowRequestLog
+from profiling import Profiler, DEFAULT_FOCUS
+from concurrent.futures import ThreadPoolExecutor
+import hmac
 import threading
+import time
+import os
 
 app = Flask(__name__)
-hash_ring = ConsistentHash(slots=512, virtual_servers=9)
+hash_ring = create_routing_engine_from_env()
+key_extractor = create_key_extractor_from_env()
 server_id_counter = 1
 lock = threading.Lock()
+load_tracker = LoadTracker()
+metrics = Metrics()
+metrics.describe('lb_upstream_requests_total', COUNTER, 'Upstream requests by backend and status code (error: no response)')
+metrics.describe('lb_upstream_latency_seconds', HISTOGRAM, 'Time until upstream response headers arrived')
+metrics.describe('lb_ring_lookup_seconds', HISTOGRAM, 'Time to pick the servers for a request')
+metrics.describe('lb_membership_lock_wait_seconds', HISTOGRAM, 'Time membership changes waited for the ring lock')
+metrics.describe('lb_requests_shed_total', COUNTER, 'Requests shed by admission control')
+backend_port = int(os.environ.get('LB_BACKEND_PORT', 5000))
+upstream_pool = UpstreamPool(
+    port=backend_port,
+    max_size=int(os.environ.get('LB_POOL_SIZE', 10)),
+    idle_timeout=float(os.environ.get('LB_POOL_IDLE_TIMEOUT', 30))
+)
+# Consistent hashing with bounded loads when set (e.g. 0.25 = at most 125% of average)
+bounded_load_epsilon = os.environ.get('LB_BOUNDED_LOAD_EPSILON')
+bounded_load_epsilon = float(bounded_load_epsilon) if bounded_load_epsilon else None
+# Idempotent requests fail over clockwise to at most this many servers within the budget
+retry_attempts = int(os.environ.get('LB_RETRY_ATTEMPTS', 3))
+retry_budget = float(os.environ.get('LB_RETRY_BUDGET', 4))
+# Hedging is off unless LB_HEDGE_DELAY is set (milliseconds, or p95 to follow observed latency)
+hedge_policy = None
+hedge_executor = None
+if os.environ.get('LB_HEDGE_DELAY'):
+    hedge_policy = HedgePolicy(os.environ['LB_HEDGE_DELAY'], budget=float(os.environ.get('LB_HEDGE_BUDGET', 0.1)))
+    hedge_executor = ThreadPoolExecutor(max_workers=128, thread_name_prefix='hedge')
+
+# Responses are cached when LB_CACHE_TTL is set, e.g. "/home=5" or "/home=5,1" (1s for other routes)
+response_cache = None
+if os.environ.get('LB_CACHE_TTL'):
+    route_ttls, default_ttl = parse_route_ttls(os.environ['LB_CACHE_TTL'])
+    response_cache = ResponseCache(
+        route_ttls, default_ttl,
+        max_bytes=int(os.environ.get('LB_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+        max_entry_bytes=int(os.environ.get('LB_CACHE_MAX_ENTRY_BYTES', 1024 * 1024))
+    )
+
+# Concurrent identical GETs share one upstream request when LB_COALESCE_WAITERS is set
+single_flight = None
+if os.environ.get('LB_COALESCE_WAITERS'):
+    single_flight = SingleFlight(
+        max_waiters=int(os.environ['LB_COALESCE_WAITERS']),
+        timeout=float(os.environ.get('LB_COALESCE_TIMEOUT', 5))
+    )
+
+# Concurrency limits and client rate limits are off unless set; excess load gets 503/429 + Retry-After
+admission = AdmissionController(
+    max_concurrency=int(os.environ.get('LB_MAX_CONCURRENCY', 0)),
+    backend_max_concurrency=int(os.environ.get('LB_BACKEND_MAX_CONCURRENCY', 0)),
+    queue_size=int(os.environ.get('LB_ADMISSION_QUEUE', 50)),
+    queue_timeout=float(os.environ.get('LB_ADMISSION_TIMEOUT', 0.5)),
+    client_rate=float(os.environ.get('LB_CLIENT_RATE', 0)),
+    client_burst=float(os.environ.get('LB_CLIENT_BURST', 20)),
+    retry_after=int(os.environ.get('LB_RETRY_AFTER', 1))
+)
+
+circuit_breakers = CircuitBreakers(
+    failure_threshold=int(os.environ.get('LB_BREAKER_FAILURES', 5)),
+    error_rate=float(os.environ.get('LB_BREAKER_ERROR_RATE', 0.5)),
+    window=int(os.environ.get('LB_BREAKER_WINDOW', 20)),
+    min_requests=int(os.environ.get('LB_BREAKER_MIN_REQUESTS', 10)),
+    open_seconds=float(os.environ.get('LB_BREAKER_OPEN_SECONDS', 10))
+)
+# Routes keep key affinity on the ring unless given a load-aware policy, e.g. "/static=p2c"
+route_policies = RoutePolicies(os.environ.get('LB_ROUTE_POLICIES', ''), load_tracker.snapshot,
+                               circuit_breakers.latencies)
+
+# Proxied responses carry Server-Timing and X-Upstream headers unless LB_SERVER_TIMING=0
+server_timing = os.environ.get('LB_SERVER_TIMING', '1') != '0'
+# Requests slower than LB_SLOW_REQUEST_MS are sampled to a JSON log line
+slow_request_log = None
+if os.environ.get('LB_SLOW_REQUEST_MS'):
+    slow_request_log = SlowRequestLog(
+        float(os.environ['LB_SLOW_REQUEST_MS']),
+        sample_rate=float(os.environ.get('LB_SLOW_REQUEST_SAMPLE', 1))
+    )
+
+# Admin endpoints answer 404 unless LB_ADMIN_TOKEN is set, and then require it as a bearer token
+admin_token = os.environ.get('LB_ADMIN_TOKEN', '')
+profiler = Profiler(
+    interval=float(os.environ.get('LB_PROFILE_INTERVAL_MS', 5)) / 1000,
+    store_dir=os.environ.get('LB_PROFILE_DIR') or None
+)
+
+def invalidate_moved_keys():
+    # Cached responses are dropped once their key belongs to a different server
+    if response_cache is not None:
+        response_cache.invalidate_moved(hash_ring.get_server)
+
+def on_health_change(hostname, healthy):
+    # Drop pooled connections to ejected hosts; reopen them on recovery
+    if healthy:
+        upstream_pool.register(hostname)
+        circuit_breakers.forget(hostname)
+    else:
+        upstream_pool.unregister(hostname)
+    invalidate_moved_keys()
+
+health_checker = HealthChecker(
+    hash_ring,
+    port=backend_port,
+    interval=float(os.environ.get('LB_HEALTH_INTERVAL', 2)),
+    timeout=float(os.environ.get('LB_HEALTH_TIMEOUT', 1)),
+    rise=int(os.environ.get('LB_HEALTH_RISE', 2)),
+    fall=int(os.environ.get('LB_HEALTH_FALL', 3)),
+    lock=lock,
+    on_change=on_health_change
+)
 
 @app.route('/add', methods=['POST'])
 def add_server():
     data = request.get_json()
     n = data.get('n', 1)
     hostnames = data.get('hostnames', [])
+    weights = data.get('weights', [])
+    if weights and not hash_ring.supports_weights:
+        return jsonify({"message": f"Routing engine {hash_ring.name} does not support weights", "status": "failure"}), 400
+    if not all(isinstance(w, (int, float)) and w > 0 for w in weights):
+        return jsonify({"message": "Weights must be positive numbers", "status": "failure"}), 400
     added = []
     global server_id_counter
+    waiting = time.perf_counter()
     with lock:
+        metrics.observe('lb_membership_lock_wait_seconds', time.perf_counter() - waiting, (('operation', 'add'),))
+        batch = []
         for i in range(n):
-            hostname = hostnames[i] if i < len(hostnames) else f"Server{server_id_counter}"
-            success = hash_ring.add_server(server_id_counter, hostname)
-            if success:
-                added.append(hostname)
-                server_id_counter += 1
+            server_id = server_id_counter + i
+            hostname = hostnames[i] if i < len(hostnames) else f"Server{server_id}"
+            weight = weights[i] if i < len(weights) else 1.0
+            batch.append((server_id, hostname, weight))
+        if hash_ring.add_servers(batch):
+            added = [hostname for _, hostname, _ in batch]
+            server_id_counter += len(batch)
+            for hostname in added:
+                upstream_pool.register(hostname)
+            invalidate_moved_keys()
     return jsonify({"message": {"added": added, "N": hash_ring.get_server_count()}}), 200
 
 @app.route('/rm', methods=['DELETE'])
 def remove_server():
     data = request.get_json()
-    n = data.get('n', 1)
+    hostnames = data.get('hostnames', [])
+    n = data.get('n', len(hostnames) or 1)
     removed = []
+    waiting = time.perf_counter()
     with lock:
-        ids = list(hash_ring.servers.keys())[:n]
-        for sid in ids:
-            hostname = hash_ring.servers[sid]['hostname']
-            success = hash_ring.remove_server(sid)
-            if success:
-                removed.append(hostname)
+        metrics.observe('lb_membership_lock_wait_seconds', time.perf_counter() - waiting, (('operation', 'rm'),))
+        snapshot = hash_ring.snapshot
+        members = {info['hostname']: sid for sid, info in snapshot.servers.items()}
+        # Named servers go first; an ejected one is out of the ring but must not be restored
+        ejected = [hostname for hostname in hostnames if hostname not in members and health_checker.forget(hostname)]
+        ids = list(dict.fromkeys(members[hostname] for hostname in hostnames if hostname in members))
+        ids += [sid for sid in snapshot.servers if sid not in ids][:max(n - len(ejected) - len(ids), 0)]
+        if hash_ring.remove_servers(ids):
+            removed = [snapshot.servers[sid]['hostname'] for sid in ids]
+            for hostname in removed:
+                upstream_pool.unregister(hostname)
+                health_checker.forget(hostname)
+            invalidate_moved_keys()
+        removed = ejected + removed
+        for hostname in removed:
+            circuit_breakers.forget(hostname)
+            admission.forget(hostname)
     return jsonify({"message": {"removed": removed, "N": hash_ring.get_server_count()}}), 200
 
+@app.route('/weight', methods=['PUT'])
+def set_weight():
+    data = request.get_json()
+    hostname = data.get('hostname')
+    weight = data.get('weight')
+    if not hash_ring.supports_weights:
+        return jsonify({"message": f"Routing engine {hash_ring.name} does not support weights", "status": "failure"}), 400
+    if not isinstance(weight, (int, float)) or weight <= 0:
+        return jsonify({"message": "Weight must be a positive number", "status": "failure"}), 400
+    waiting = time.perf_counter()
+    with lock:
+        metrics.observe('lb_membership_lock_wait_seconds', time.perf_counter() - waiting, (('operation', 'weight'),))
+        ids = [sid for sid, info in hash_ring.servers.items() if info['hostname'] == hostname]
+        if not ids:
+            return jsonify({"message": f"Server {hostname} not found", "status": "failure"}), 404
+        if not hash_ring.set_server_weight(ids[0], weight):
+            return jsonify({"message": f"Could not set weight for {hostname}", "status": "failure"}), 409
+        invalidate_moved_keys()
+        virtual_nodes = len(hash_ring.servers[ids[0]]['virtual_positions'])
+    return jsonify({"message": {"hostname": hostname, "weight": weight, "virtual_nodes": virtual_nodes}}), 200
+
 @app.route('/rep', methods=['GET'])
 def get_replicas():
+    snapshot = hash_ring.snapshot
     return jsonify({"message": {
-        "N": hash_ring.get_server_count(),
-        "replicas": hash_ring.get_servers_list()
+        "N": len(snapshot.servers),
+        "replicas": snapshot.hostnames(),
+        "version": snapshot.version
     }}), 200
 
-@app.route('/home', methods=['GET'])
-def home():
-    request_id = request.args.get('id', default=1, type=int)
-    server = hash_ring.get_server(request_id)
-    if server is None:
-        return jsonify({"message": "No servers available", "status": "failure"}), 503
-    try:
-        # Use localhost for demo, or actual hostname if in Docker network
-        resp = requests.get(f"http://{server}:5000/home", timeout=2)
-        return jsonify(resp.json()), resp.status_code
-    except Exception:
-        return jsonify({"message": f"Server {server} unreachable", "status": "failure"}), 502
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({"message": {
+        "upstream_pool": upstream_pool.stats(),
+        "health": health_checker.status(),
+        "circuit_breakers": circuit_breakers.stats(),
+        "hedging": hedge_policy.stats() if hedge_policy is not None else None,
+        "response_cache": response_cache.stats() if response_cache is not None else None,
+        "coalescing": single_flight.stats() if single_flight is not None else None,
+        "admission": admission.stats(),
+        "routing_policies": route_policies.describe(),
+        "slow_requests": slow_request_log.stats() if slow_request_log is not None else None
+    }}), 200
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    # Gauges are read from their owners here rather than recorded per request
+    ownership = hash_ring.get_ring_status()['ownership']
+    in_flight = load_tracker.snapshot()
+    shed = admission.stats()['shed']
+    text = metrics.render([
+        ('lb_requests_in_flight', 'Requests in flight to each backend',
+         {(('backend', hostname),): in_flight.get(hostname, 0) for hostname in ownership}),
+        ('lb_ring_ownership_ratio', 'Share of the key space each backend owns',
+         {(('backend', hostname),): share for hostname, share in ownership.items()}),
+        ('lb_requests_shed_total', 'Requests shed by admission control',
+         {(('reason', reason),): count for reason, count in shed.items()})
+    ])
+    return Response(text, content_type=CONTENT_TYPE)
+
+def admin_denied():
+    if not admin_token:
+        return jsonify({"message": "Endpoint not found", "status": "failure"}), 404
+    expected = f"Bearer {admin_token}".encode()
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected):
+        response = jsonify({"message": "Admin token required", "status": "failure"})
+        response.status_code = 401
+        response.headers['WWW-Authenticate'] = 'Bearer'
+        return response
+    return None
+
+@app.route('/admin/profile', methods=['GET', 'POST'])
+def profile():
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+    if request.method == 'POST':
+        # Starts a session over the next proxied requests, e.g. {"mode": "sample", "seconds": 30}
+        data = request.get_json(silent=True) or {}
+        try:
+            seconds = float(data['seconds']) if data.get('seconds') is not None else None
+            request_limit = int(data['requests']) if data.get('requests') is not None else None
+            focus = data.get('focus') or DEFAULT_FOCUS
+            if isinstance(focus, str):
+                focus = focus.split(',')
+            started = profiler.start(data.get('mode', 'sample'), seconds=seconds, requests=request_limit,
+                                     focus=focus)
+        except (TypeError, ValueError) as error:
+            return jsonify({"message": str(error), "status": "failure"}), 400
+        if not started:
+            return jsonify({"message": "A profiling session is already running", "status": "failure"}), 409
+        return jsonify({"message": profiler.status()}), 202
+
+    output = request.args.get('format', 'json')
+    if output == 'json':
+        return jsonify({"message": profiler.status()}), 200
+    if output not in ('pstats', 'collapsed'):
+        return jsonify({"message": "Format must be json, pstats or collapsed", "status": "failure"}), 400
+    text = profiler.pstats_text() if output == 'pstats' else profiler.collapsed()
+    if text is None:
+        return jsonify({"message": f"No finished session with {output} output", "status": "failure"}), 404
+    return Response(text, content_type='text/plain; charset=utf-8')
 
 @app.route('/health', methods=['GET'])
 def health():
     return jsonify({"status": "healthy"}), 200
 
+def pick_servers(route, request_id, attempts):
+    policy = route_policies.policy_for(route)
+    if policy is not None:
+        return policy.pick(hash_ring.get_servers_list(), attempts)
+    candidates = hash_ring.get_preference_list(request_id, attempts)
+    if bounded_load_epsilon is None or not candidates:
+        return candidates
+    primary = hash_ring.get_server_bounded(request_id, load_tracker.snapshot(), bounded_load_epsilon)
+    return [primary] + [server for server in candidates if server != primary][:attempts - 1]
+
+def release_server(server):
+    load_tracker.release(server)
+    admission.release_backend(server)
+
+def shed_response(message, status, retry_after):
+    response = jsonify({"message": message, "status": "failure"})
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def buffered_response(status, headers, body):
+    response = Response(body, status=status)
+    response.headers.clear()
+    for name, value in headers:
+        response.headers.add(name, value)
+    return response
+
+PROXY_METHODS = ['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS']
+
+@app.route('/', defaults={'path': ''}, methods=PROXY_METHODS)
+@app.route('/<path:path>', methods=PROXY_METHODS)
+def proxy(path):
+    # Excess load is shed before it ties up a thread; admitted requests hold
+    # their slot until the response has been streamed to the client
+    timing = RequestTiming()
+    shed = admission.admit(request.remote_addr or '')
+    if shed is not None:
+        reason, retry_after = shed
+        if reason == RATE_LIMITED:
+            return shed_response("Too many requests from this client", 429, retry_after)
+        return shed_response("Load balancer overloaded, retry later", 503, retry_after)
+    timing.add('queue', timing.elapsed())
+    try:
+        response = app.make_response(profiler.run(forward, path, timing))
+    except BaseException:
+        admission.release()
+        raise
+    response.call_on_close(admission.release)
+
+    if server_timing:
+        # Covers the time until the response headers are ready; the body is still to come
+        response.headers['Server-Timing'] = timing.header()
+        if timing.upstream is not None:
+            response.headers['X-Upstream'] = timing.upstream
+    if slow_request_log is not None:
+        responded = timing.elapsed()
+
+        def log_if_slow(method=request.method, path=request.path, status=response.status_code):
+            timing.add('stream', timing.elapsed() - responded)
+            slow_request_log.record(timing, method=method, path=path, status=status, upstream=timing.upstream)
+        response.call_on_close(log_if_slow)
+    return response
+
+def forward(path, timing):
+    # Any other path (including /home) is forwarded as-is to the backend for its key;
+    # bodies and headers are streamed in both directions without being parsed
+    request_id, keyed = key_extractor.extract(request.args, request.headers, request.cookies, request.remote_addr)
+    target = request.path
+    if request.query_string:
+        target += '?' + request.query_string.decode('latin-1')
+    headers = filter_headers(request.headers.items())
+    headers.append(('X-Forwarded-For', request.remote_addr or ''))
+
+    retryable = request.method in IDEMPOTENT_METHODS
+    body = None
+    if request.content_length is not None or 'chunked' in request.headers.get('Transfer-Encoding', ''):
+        if retryable and request.content_length is not None and request.content_length <= REPLAYABLE_BODY_LIMIT:
+            body = request.get_data()
+        else:
+            body, retryable = request.stream, False
+
+    # Requests routed by a fallback key have no stable identity to cache under
+    cacheable = keyed and body is None and response_cache is not None and response_cache.is_cacheable_request(
+        request.method, request.path, request.headers.get('Cache-Control'), 'Cookie' in request.headers)
+    if cacheable:
+        # Read the generation before routing so a concurrent ring change discards this response
+        cache_key = (request.path, request_id, target)
+        cache_generation = response_cache.generation
+        authorized = 'Authorization' in request.headers
+        # A stored response may belong to another user, so credentials always go upstream
+        cached = None if authorized else response_cache.get(cache_key)
+        if cached is not None:
+            response = buffered_response(cached.status, cached.headers, cached.body)
+            response.headers['Age'] = str(int(time.monotonic() - cached.stored_at))
+            response.headers['X-Cache'] = 'HIT'
+            return response
+        owner = hash_ring.get_server(request_id)
+
+    # Requests with the same method, URL, routing key and negotiation headers and no body
+    # or credentials are identical; the first goes upstream and the rest wait for its response.
+    # The routing key may identify the user (a header or the client IP), so it is part of the key
+    flight = None
+    if (single_flight is not None and body is None and request.method in ('GET', 'HEAD')
+            and 'Authorization' not in request.headers and 'Cookie' not in request.headers):
+        shared_key = flight_key(request.method, target, request.headers, request_id if keyed else None)
+        flight, leader = single_flight.begin(shared_key)
+        if flight is not None and not leader:
+            waited = time.perf_counter()
+            shared = single_flight.wait(flight)
+            timing.add('coalesce', time.perf_counter() - waited)
+            if shared is not None:
+                return buffered_response(shared.status, shared.headers, shared.body)
+            flight = None  # Leader failed, was too slow or got a varying response; go upstream alone
+
+    def end_flight(shared):
+        if flight is not None:
+            single_flight.finish(shared_key, flight, shared)
+
+    # Look far enough along the ring to find enough servers whose breaker is closed
+    attempts = retry_attempts if retryable else 1
+    lookup_started = time.perf_counter()
+    candidates = pick_servers(request.path, request_id, attempts + len(circuit_breakers.open_hosts()))
+    lookup_seconds = time.perf_counter() - lookup_started
+    metrics.observe('lb_ring_lookup_seconds', lookup_seconds)
+    timing.add('lookup', lookup_seconds)
+    if not candidates:
+        end_flight(None)
+        return jsonify({"message": "No servers available", "status": "failure"}), 503
+
+    # Use localhost for demo, or actual hostname if in Docker network
+    method = request.method
+    deadline = time.monotonic() + retry_budget
+    tried = []
+    saturated = []
+    remaining_candidates = iter(candidates)
+    candidates_lock = threading.Lock()
+
+    def next_server():
+        # Takes the next server whose breaker lets a request through; a half-open
+        # breaker reserves its trial here, so call this right before sending
+        with candidates_lock:
+            for server in remaining_candidates:
+                if circuit_breakers.allow(server):
+                    tried.append(server)
+                    return server
+        return None
+
+    def attempt(server, cancel=None):
+        remaining = deadline - time.monotonic()
+        if not admission.acquire_backend(server):
+            circuit_breakers.abandon(server)  # Shed here; not the backend's fault
+            saturated.append(server)
+            raise TimeoutError(f"Server {server} is at its concurrency limit")
+        load_tracker.acquire(server)
+        started = time.monotonic()
+        try:
+            upstream = upstream_pool.open(server, method, target, body=body, headers=headers,
+                                          timeout=min(upstream_pool.timeout, max(remaining, 0.001)),
+                                          cancel=cancel)
+        except Exception:
+            release_server(server)
+            if cancel is not None and cancel.cancelled:
+                circuit_breakers.abandon(server)  # Lost a hedge race; not the backend's fault
+            else:
+                circuit_breakers.record(server, False, time.monotonic() - started)
+                metrics.inc('lb_upstream_requests_total', (('backend', server), ('code', 'error')))
+                app.logger.warning(f"Server {server} failed for {method} {target}")
+            raise
+        latency = time.monotonic() - started
+        circuit_breakers.record(server, upstream.status < 500, latency)
+        metrics.inc('lb_upstream_requests_total', (('backend', server), ('code', str(upstream.status))))
+        metrics.observe('lb_upstream_latency_seconds', latency, (('backend', server),))
+        if hedge_policy is not None:
+            hedge_policy.record_latency(latency)
+        return server, upstream
+
+    def attempt_next(cancel):
+        server = next_server()
+        if server is None:
+            raise LookupError("No replica left to hedge to")
+        return attempt(server, cancel)
+
+    def discard(result):
+        server, upstream = result
+        upstream.close()
+        release_server(server)
+
+    # The first attempt is hedged to the next replica when enabled; later failovers are not
+    hedged = hedge_policy is not None and retryable and attempts >= 2
+    attempts_started = time.perf_counter()
+    result = None
+    while result is None and len(tried) < attempts:
+        if tried and deadline - time.monotonic() <= 0:
+            break
+        server = next_server()
+        if server is None:
+            break
+        try:
+            if hedged and len(tried) == 1:
+                tokens = (CancelToken(), CancelToken())
+                result, _ = run_hedged(hedge_policy, hedge_executor,
+                                       lambda server=server: attempt(server, tokens[0]),
+                                       lambda: attempt_next(tokens[1]),
+                                       discard=discard, cancel=lambda index: tokens[index].cancel())
+            else:
+                result = attempt(server)
+        except Exception:
+            continue
+    if not tried or result is None:
+        end_flight(None)
+    if not tried:
+        return jsonify({"message": "No servers available (all circuits open)", "status": "failure"}), 503
+    if result is None and saturated:
+        noun = "Server" if len(saturated) == 1 else "Servers"
+        return shed_response(f"{noun} {', '.join(saturated)} overloaded, retry later", 503, admission.retry_after)
+    if result is None:
+        noun = "Server" if len(tried) == 1 else "Servers"
+        return jsonify({"message": f"{noun} {', '.join(tried)} unreachable", "status": "failure"}), 502
+    server, upstream = result
+    timing.upstream = server
+    timing.add('connect', upstream.connect_seconds)
+    timing.add('upstream', upstream.wait_seconds)
+    if len(tried) > 1:
+        # Time lost to failed attempts, or to waiting before a hedge was sent
+        timing.add('failover', max(time.perf_counter() - attempts_started
+                                   - upstream.connect_seconds - upstream.wait_seconds, 0.0))
+    response_headers = filter_headers(upstream.headers)
+
+    # Waiters only get responses that do not vary on headers outside the flight key
+    shareable = flight is not None and is_shareable(response_headers)
+    limits = []
+    if cacheable:
+        limits.append(response_cache.max_entry_bytes)
+    if shareable:
+        limits.append(single_flight.max_body_bytes)
+
+    # WSGI servers never iterate the body of these, so stream_body() may never run
+    bodiless = method == 'HEAD' or upstream.status in (204, 304)
+    cleanup = threading.Lock()
+
+    def finish(complete, body=None):
+        # Runs once, from whichever comes first: the end of the body or closing the response
+        if not cleanup.acquire(blocking=False):
+            return
+        shared = None
+        if not complete:
+            upstream.close()
+        elif body is not None:
+            shared = SharedResponse(upstream.status, response_headers, body)
+            if cacheable:
+                response_cache.put(cache_key, shared.status, shared.headers, shared.body,
+                                   owner, cache_generation, authorized=authorized)
+        release_server(server)
+        end_flight(shared if shareable else None)
+
+    def stream_body():
+        # Bodies that are cached or shared with waiters are copied while streaming
+        chunks = [] if limits else None
+        size = 0
+        complete = False
+        try:
+            for chunk in upstream.iter_chunks():
+                if chunks is not None:
+                    size += len(chunk)
+                    if size <= max(limits):
+                        chunks.append(chunk)
+                    else:
+                        chunks = None
+                yield chunk
+            complete = True
+        finally:
+            finish(complete, b''.join(chunks) if complete and chunks is not None else None)
+
+    def close():
+        complete = False
+        if bodiless and not cleanup.locked():
+            try:
+                # Nothing to read; this hands the connection back to the pool
+                for _ in upstream.iter_chunks():
+                    pass
+                complete = True
+            except Exception:
+                pass
+        finish(complete, b'' if limits else None)
+
+    response = Response(stream_body(), status=upstream.status)
+    response.call_on_close(close)
+    response.headers.clear()
+    for name, value in response_headers:
+        response.headers.add(name, value)
+    if cacheable:
+        response.headers['X-Cache'] = 'MISS'
+    return response
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({"message": "Endpoint not found", "status": "failure"}), 404
 
 if __name__ == "__main__":
+    if health_checker.interval > 0:
+        health_checker.start()
     app.run(host="0.0.0.0", port=5000, threaded=True)
\ No newline at end of file
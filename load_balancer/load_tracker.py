@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Distributed Systems Assignment 1 - Backend Load Tracking
+
+This module tracks in-flight upstream requests per backend hostname.
+The proxy path acquires a backend when it sends the request and releases
+it once the response body has been streamed or abandoned, and load-aware
+routing (bounded-load consistent hashing) reads the counts.
+"""
+
+import threading
+from typing import Dict
+
+
+class LoadTracker:
+    """
+    Thread-safe in-flight request counters keyed by backend hostname.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, hostname: str):
+        """
+        Record the start of an upstream request.
+
+        Args:
+            hostname: Backend handling the request
+        """
+        with self._lock:
+            self._in_flight[hostname] = self._in_flight.get(hostname, 0) + 1
+
+    def release(self, hostname: str):
+        """
+        Record the end of an upstream request.
+
+        Args:
+            hostname: Backend that handled the request
+        """
+        with self._lock:
+            remaining = self._in_flight.get(hostname, 0) - 1
+            if remaining > 0:
+                self._in_flight[hostname] = remaining
+            else:
+                self._in_flight.pop(hostname, None)
+
+    def in_flight(self, hostname: str) -> int:
+        """
+        Get the number of in-flight requests for one backend.
+
+        Args:
+            hostname: Backend hostname
+
+        Returns:
+            In-flight request count
+        """
+        return self._in_flight.get(hostname, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        """
+        Get a consistent copy of all in-flight counts.
+
+        Returns:
+            Dictionary mapping hostnames to in-flight request counts
+        """
+        with self._lock:
+            return dict(self._in_flight)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Distributed Systems Assignment 1 - Metrics
+
+This module collects counters and latency histograms for the load
+balancer and renders them in the Prometheus text exposition format.
+Recording a sample must not slow the proxy down, so every thread writes
+to its own shard without taking a lock; shards are only summed when
+/metrics is scraped. The threaded server starts a thread per request, so
+shards outlive their threads: a thread that exits hands its shard back
+to a free list and the next new thread reuses it, and only as many
+shards exist as threads have ever run at once.
+Gauges such as in-flight requests are read from their owners at scrape
+time instead of being recorded on the hot path.
+"""
+
+import bisect
+import math
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+# Upper bounds in seconds, from sub-millisecond ring lookups to slow upstreams
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    """Render a label set as {name="value",...}."""
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Shard:
+    """One thread's counters and histograms; only its owning thread writes to it."""
+
+    def __init__(self):
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+
+class _ShardLease:
+    """Thread-local handle that returns its shard to the free list when its thread exits."""
+
+    def __init__(self, shard: _Shard, free: deque):
+        self.shard = shard
+        self.free = free
+
+    def __del__(self):
+        # Thread-local data is dropped when its thread exits; the thread no longer writes
+        self.free.append(self.shard)
+
+
+class Metrics:
+    """
+    Registry of counters, histograms and scrape-time gauges.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the registry.
+
+        Args:
+            buckets: Histogram bucket upper bounds in seconds (default: DEFAULT_BUCKETS)
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._local = threading.local()
+        # deque.append/pop and list.append are atomic, so leasing a shard takes no lock
+        self._shards: List[_Shard] = []
+        self._free: deque = deque()
+        self._help: Dict[str, Tuple[str, str]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str):
+        """
+        Register the type and help text of a metric.
+
+        Args:
+            name: Metric name
+            kind: counter, gauge or histogram
+            help_text: One-line description
+        """
+        self._help[name] = (kind, help_text)
+
+    def _shard(self) -> _Shard:
+        lease = getattr(self._local, 'lease', None)
+        if lease is None:
+            try:
+                shard = self._free.pop()
+            except IndexError:
+                shard = _Shard()
+                self._shards.append(shard)
+            lease = _ShardLease(shard, self._free)
+            self._local.lease = lease
+        return lease.shard
+
+    @staticmethod
+    def _merge(into: _Shard, counters: Dict, histograms: Dict):
+        for key, value in counters.items():
+            into.counters[key] = into.counters.get(key, 0) + value
+        for key, values in histograms.items():
+            values = list(values)
+            totals = into.histograms.get(key)
+            if totals is None:
+                into.histograms[key] = values
+            else:
+                for i, value in enumerate(values):
+                    totals[i] += value
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1):
+        """
+        Add to a counter from the calling thread's shard.
+
+        Args:
+            name: Metric name
+            labels: Label (name, value) pairs
+            value: Amount to add (default: 1)
+        """
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: Labels = ()):
+        """
+        Record a sample in a histogram from the calling thread's shard.
+
+        Args:
+            name: Metric name
+            value: Sample in seconds
+            labels: Label (name, value) pairs
+        """
+        histograms = self._shard().histograms
+        key = (name, labels)
+        values = histograms.get(key)
+        if values is None:
+            # One count per bucket plus +Inf, then the sum and the count
+            values = [0.0] * (len(self.buckets) + 3)
+            histograms[key] = values
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def collect(self) -> _Shard:
+        """
+        Sum every shard, leased or free.
+
+        Returns:
+            A shard holding the totals
+        """
+        total = _Shard()
+        # dict.copy() is atomic under the GIL, so owners can keep writing meanwhile
+        for shard in list(self._shards):
+            self._merge(total, shard.counters.copy(), shard.histograms.copy())
+        return total
+
+    def render(self, scraped: Iterable[Tuple[str, str, Dict[Labels, float]]] = ()) -> str:
+        """
+        Render all metrics in the Prometheus text format.
+
+        Args:
+            scraped: (name, help text, {labels: value}) for values read from their owners
+                     at scrape time; rendered as gauges unless described otherwise
+
+        Returns:
+            Exposition text
+        """
+        total = self.collect()
+        families: Dict[str, Tuple[str, List[str]]] = {}
+
+        for (name, labels), value in sorted(total.counters.items()):
+            families.setdefault(name, (COUNTER, []))[1].append(
+                f'{name}{_format_labels(labels)} {_format_value(value)}')
+
+        bounds = [_format_value(bound) for bound in self.buckets] + ['+Inf']
+        for (name, labels), values in sorted(total.histograms.items()):
+            lines = families.setdefault(name, (HISTOGRAM, []))[1]
+            cumulative = 0
+            for bound, count in zip(bounds, values):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, ("le", bound))} {_format_value(cumulative)}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(values[-2])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {_format_value(values[-1])}')
+
+        for name, help_text, samples in scraped:
+            families[name] = (GAUGE, [f'{name}{_format_labels(labels)} {_format_value(value)}'
+                                      for labels, value in sorted(samples.items())])
+            self._help.setdefault(name, (GAUGE, help_text))
+
+        output = []
+        for name, (kind, lines) in families.items():
+            kind, help_text = self._help.get(name, (kind, name))
+            output.append(f'# HELP {name} {help_text}')
+            output.append(f'# TYPE {name} {kind}')
+            output.extend(lines)
+        return '\n'.join(output) + '\n'
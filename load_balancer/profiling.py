@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Distributed Systems Assignment 1 - On-Demand Profiling
+
+This module profiles the running load balancer for a bounded time or
+number of requests, so hot paths that only show up under production
+traffic can be examined without reproducing them locally. Two modes are
+available:
+- cprofile: deterministic profiling of every proxied request with
+  cProfile; exact call counts, but it slows the profiled requests down
+- sample: a background thread records the stacks of threads serving
+  proxied requests every few milliseconds; low overhead, statistical
+
+Results are aggregated into pstats text (cprofile) or collapsed stacks,
+the input format of flamegraph.pl and speedscope (sample), plus a
+summary of the hot spots in the routing path.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional, Set
+
+CPROFILE = 'cprofile'
+SAMPLE = 'sample'
+MODES = (CPROFILE, SAMPLE)
+
+# Functions on the proxy path whose cost is summarized after every session; only
+# forward() and what it calls run under the profiler
+DEFAULT_FOCUS = ('get_server', 'get_preference_list', 'hash_request', 'forward')
+
+
+def _frame_name(code) -> str:
+    return f'{os.path.basename(code.co_filename)}:{code.co_name}'
+
+
+def _collapse(stacks: Counter) -> str:
+    return ''.join(f'{stack} {count}\n' for stack, count in sorted(stacks.items()))
+
+
+class ProfileSession:
+    """
+    One profiling run, bounded by time, by proxied requests or both.
+    """
+
+    def __init__(self, mode: str, seconds: Optional[float], requests: Optional[int], focus: Iterable[str]):
+        """
+        Args:
+            mode: cprofile or sample
+            seconds: Stop after this many seconds (None for no time limit)
+            requests: Stop after this many proxied requests (None for no limit)
+            focus: Function names to summarize as hot spots
+        """
+        self.mode = mode
+        self.seconds = seconds
+        self.requests = requests
+        self.focus = tuple(focus)
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.profiled = 0
+        self.skipped = 0  # Requests another profiler was already active for (Python 3.12+)
+        self.stats: Optional[pstats.Stats] = None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def expired(self, now: float) -> bool:
+        """Check whether the session has reached its time or request limit."""
+        if self.seconds is not None and now - self.started >= self.seconds:
+            return True
+        return self.requests is not None and self.profiled + self.skipped >= self.requests
+
+    def hot_spots(self) -> Dict[str, Dict]:
+        """
+        Summarize the focus functions.
+
+        Returns:
+            Dictionary mapping file:function to call counts and times (cprofile)
+            or inclusive and self sample counts (sample)
+        """
+        spots = {}
+        if self.stats is not None:
+            for (filename, _, function), (_, calls, total, cumulative, _) in self.stats.stats.items():
+                if function in self.focus:
+                    spots[f'{os.path.basename(filename)}:{function}'] = {
+                        'calls': calls,
+                        'total_ms': round(total * 1000, 3),
+                        'cumulative_ms': round(cumulative * 1000, 3),
+                        'per_call_us': round(cumulative / calls * 1e6, 3) if calls else None
+                    }
+            return spots
+
+        inclusive: Counter = Counter()
+        exclusive: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            for name in set(frames):
+                if name.rpartition(':')[2] in self.focus:
+                    inclusive[name] += count
+            if frames[-1].rpartition(':')[2] in self.focus:
+                exclusive[frames[-1]] += count
+        for name, count in inclusive.most_common():
+            spots[name] = {
+                'samples': count,
+                'self_samples': exclusive[name],
+                'share': round(count / self.samples, 4) if self.samples else 0.0
+            }
+        return spots
+
+
+class Profiler:
+    """
+    Runs one profiling session at a time over the proxied requests.
+    """
+
+    def __init__(self, interval: float = 0.005, store_dir: Optional[str] = None):
+        """
+        Initialize the profiler.
+
+        Args:
+            interval: Seconds between stack samples in sample mode (default: 0.005)
+            store_dir: Directory finished sessions are written to (default: not stored)
+        """
+        self.interval = interval
+        self.store_dir = store_dir
+        self.session: Optional[ProfileSession] = None
+        self._active: Set[int] = set()  # Threads currently serving a profiled request
+        self._lock = threading.Lock()
+
+    def start(self, mode: str, seconds: Optional[float] = None, requests: Optional[int] = None,
+              focus: Iterable[str] = DEFAULT_FOCUS) -> bool:
+        """
+        Start a session unless one is running.
+
+        Args:
+            mode: cprofile or sample
+            seconds: Stop after this many seconds
+            requests: Stop after this many proxied requests
+            focus: Function names to summarize as hot spots (default: DEFAULT_FOCUS)
+
+        Returns:
+            True if the session was started, False if another one is still running
+
+        Raises:
+            ValueError: If the mode is unknown or neither limit is a positive number
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}'. Available: {', '.join(MODES)}")
+        if not (seconds and seconds > 0) and not (requests and requests > 0):
+            raise ValueError("A positive number of seconds or requests is required")
+        with self._lock:
+            if self.session is not None and self.session.finished is None:
+                return False
+            session = ProfileSession(mode, seconds, requests, focus)
+            self.session = session
+        if mode == SAMPLE:
+            threading.Thread(target=self._sample, args=(session,), daemon=True).start()
+        return True
+
+    def run(self, func: Callable, *args, **kwargs):
+        """
+        Call a request handler, profiling it if a session is running.
+
+        Args:
+            func: Handler to call
+            *args: Positional arguments for the handler
+            **kwargs: Keyword arguments for the handler
+
+        Returns:
+            The handler's result
+        """
+        session = self.session
+        if session is None or session.finished is not None:
+            return func(*args, **kwargs)
+        if session.expired(time.monotonic()):
+            self._finish(session)
+            return func(*args, **kwargs)
+
+        if session.mode == SAMPLE:
+            ident = threading.get_ident()
+            self._active.add(ident)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._active.discard(ident)
+                self._count(session, profiled=True)
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process
+            self._count(session, profiled=False)
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            with self._lock:
+                if session.stats is None:
+                    session.stats = pstats.Stats(profile)
+                else:
+                    session.stats.add(profile)
+            self._count(session, profiled=True)
+
+    def _count(self, session: ProfileSession, profiled: bool):
+        with self._lock:
+            if profiled:
+                session.profiled += 1
+            else:
+                session.skipped += 1
+        if session.expired(time.monotonic()):
+            self._finish(session)
+
+    def _sample(self, session: ProfileSession):
+        """Record the stacks of threads serving profiled requests until the session ends."""
+        while session.finished is None:
+            if session.expired(time.monotonic()):
+                self._finish(session)
+                break
+            frames = sys._current_frames()
+            with self._lock:
+                if session.finished is not None:
+                    break
+                for ident in list(self._active):
+                    frame = frames.get(ident)
+                    if frame is None:
+                        continue
+                    names = []
+                    while frame is not None:
+                        names.append(_frame_name(frame.f_code))
+                        frame = frame.f_back
+                    session.stacks[';'.join(reversed(names))] += 1
+                    session.samples += 1
+            time.sleep(self.interval)
+
+    def _finish(self, session: ProfileSession):
+        with self._lock:
+            if session.finished is not None:
+                return
+            session.finished = time.monotonic()
+        if self.store_dir:
+            self._store(session)
+
+    def _store(self, session: ProfileSession):
+        """Write a finished session to the store directory."""
+        os.makedirs(self.store_dir, exist_ok=True)
+        base = os.path.join(self.store_dir, time.strftime('profile-%Y%m%d-%H%M%S'))
+        if session.stats is not None:
+            session.stats.dump_stats(base + '.pstats')
+        if session.stacks:
+            with open(base + '.collapsed', 'w') as f:
+                f.write(_collapse(session.stacks))
+
+    def status(self) -> Dict:
+        """
+        Get the current or last session's state and hot spots.
+
+        Returns:
+            Dictionary describing the session, or {'state': 'idle'} if none has run
+        """
+        session = self.session
+        if session is not None and session.finished is None and session.expired(time.monotonic()):
+            self._finish(session)
+        if session is None:
+            return {'state': 'idle'}
+        running = session.finished is None
+        with self._lock:
+            hot_spots = None if running else session.hot_spots()
+        return {
+            'state': 'running' if running else 'finished',
+            'mode': session.mode,
+            'seconds': session.seconds,
+            'requests': session.requests,
+            'elapsed': round((session.finished or time.monotonic()) - session.started, 3),
+            'profiled_requests': session.profiled,
+            'skipped_requests': session.skipped,
+            'samples': session.samples if session.mode == SAMPLE else None,
+            'hot_spots': hot_spots
+        }
+
+    def pstats_text(self, limit: int = 30) -> Optional[str]:
+        """
+        Format a finished cprofile session as pstats output.
+
+        Args:
+            limit: Number of functions to list, by cumulative time (default: 30)
+
+        Returns:
+            Report text, or None if no finished cprofile session has stats
+        """
+        session = self.session
+        if session is None or session.finished is None or session.stats is None:
+            return None
+        output = io.StringIO()
+        with self._lock:
+            session.stats.stream = output
+            session.stats.sort_stats('cumulative').print_stats(limit)
+        return output.getvalue()
+
+    def collapsed(self) -> Optional[str]:
+        """
+        Format a finished sample session as collapsed stacks.
+
+        Returns:
+            One 'frame;frame;frame count' line per distinct stack, or None if no
+            finished sample session has stacks
+        """
+        session = self.session
+        if session is None or session.finished is None or not session.stacks:
+            return None
+        return _collapse(session.stacks)
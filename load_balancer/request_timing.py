@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Distributed Systems Assignment 1 - Request Timing
+
+This module breaks the time the proxy spends on a request into phases:
+waiting for admission, ring lookup, connection setup and waiting for the
+backend's response headers. The phases are returned to the client in a
+Server-Timing header (W3C Server Timing), which browser dev tools and
+curl can show, so a slow request can be explained without attaching a
+profiler. Requests slower than a threshold can be sampled to a
+structured (JSON) log line that also covers streaming the body.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTiming:
+    """
+    Phase durations of one request, measured with a monotonic clock.
+
+    Only the thread serving the request records phases.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}  # Insertion order is the order phases ran in
+        self.upstream: Optional[str] = None  # Backend that answered, once known
+
+    def add(self, name: str, seconds: float):
+        """
+        Add time to a phase; a phase that runs more than once accumulates.
+
+        Args:
+            name: Phase name, a Server-Timing metric name
+            seconds: Duration in seconds
+        """
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        """
+        Get the time since the request arrived.
+
+        Returns:
+            Elapsed seconds
+        """
+        return time.perf_counter() - self.started
+
+    def header(self) -> str:
+        """
+        Format the phases and the elapsed time as a Server-Timing header value.
+
+        Returns:
+            Header value such as 'lookup;dur=0.021, upstream;dur=12.5, total;dur=12.9'
+        """
+        entries = [f'{name};dur={seconds * 1000:.3f}' for name, seconds in self.phases.items()]
+        entries.append(f'total;dur={self.elapsed() * 1000:.3f}')
+        return ', '.join(entries)
+
+
+class SlowRequestLog:
+    """
+    Logs a sample of slow requests as JSON, one line per request.
+    """
+
+    def __init__(self, threshold_ms: float, sample_rate: float = 1.0,
+                 log: Optional[logging.Logger] = None):
+        """
+        Args:
+            threshold_ms: Requests taking at least this long are slow
+            sample_rate: Fraction of slow requests that are logged (default: 1)
+            log: Logger to write to (default: this module's logger)
+        """
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.log = log or logger
+        self.slow = 0
+        self.logged = 0
+        self._lock = threading.Lock()
+
+    def record(self, timing: RequestTiming, **fields) -> bool:
+        """
+        Log a finished request if it was slow and is sampled.
+
+        Args:
+            timing: The request's phases
+            **fields: Extra fields for the log line, e.g. method, path, status, upstream
+
+        Returns:
+            True if the request was logged
+        """
+        total_ms = timing.elapsed() * 1000
+        if total_ms < self.threshold_ms:
+            return False
+        sampled = random.random() < self.sample_rate
+        with self._lock:
+            self.slow += 1
+            if sampled:
+                self.logged += 1
+        if not sampled:
+            return False
+        entry = dict(fields)
+        entry['total_ms'] = round(total_ms, 3)
+        entry['phases_ms'] = {name: round(seconds * 1000, 3) for name, seconds in timing.phases.items()}
+        self.log.warning(json.dumps(entry))
+        return True
+
+    def stats(self) -> Dict:
+        """
+        Get the threshold, sample rate and counters.
+
+        Returns:
+            Dictionary of slow-request log statistics
+        """
+        with self._lock:
+            return {
+                'threshold_ms': self.threshold_ms,
+                'sample_rate': self.sample_rate,
+                'slow': self.slow,
+                'logged': self.logged
+            }
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Distributed Systems Assignment 1 - Response Cache
+
+This module keeps recent backend responses in memory so repeated GETs
+for the same URL are answered by the load balancer instead of going
+upstream. Entries live for a per-route TTL unless the
+backend's Cache-Control says otherwise, and the least recently used
+entries are evicted once the cache reaches its memory bound. Each entry
+remembers which server owned its key; when servers join or leave, entries
+whose key moved to a different owner are dropped so the cache never
+serves a response from a server that no longer owns the key.
+
+As a shared cache, it never answers requests that carry a Cookie, and it
+only stores responses to requests with Authorization when the backend
+marks them public or gives them an s-maxage (RFC 9111 §3.5).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+# Status codes stored by the cache; everything else always goes upstream
+CACHEABLE_STATUSES = frozenset({200, 203, 204, 300, 301, 404, 410})
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    Parse a Cache-Control header into its directives.
+
+    Args:
+        value: Header value, e.g. 'public, max-age=60'
+
+    Returns:
+        Dictionary mapping lower-case directive names to their argument (or None)
+    """
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip().strip('"') or None
+    return directives
+
+
+def parse_route_ttls(spec: str) -> Tuple[Dict[str, float], Optional[float]]:
+    """
+    Parse a TTL spec such as '/home=5,/about=60,1'.
+
+    Args:
+        spec: Comma-separated route=seconds pairs; a bare number is the TTL for other routes
+
+    Returns:
+        Tuple of (route TTLs, default TTL or None if other routes are not cached)
+    """
+    route_ttls = {}
+    default_ttl = None
+    for part in spec.split(','):
+        route, _, seconds = part.strip().rpartition('=')
+        if not seconds:
+            continue
+        if route:
+            route_ttls[route] = float(seconds)
+        else:
+            default_ttl = float(seconds)
+    return route_ttls, default_ttl
+
+
+def _max_age(directives: Dict[str, Optional[str]]) -> Optional[float]:
+    """Get the freshness lifetime a shared cache should use, if the directives set one."""
+    for name in ('s-maxage', 'max-age'):
+        if name in directives:
+            try:
+                return max(float(directives[name]), 0.0)
+            except (TypeError, ValueError):
+                return 0.0
+    return None
+
+
+class CachedResponse(NamedTuple):
+    """A stored response and the bookkeeping needed to expire and invalidate it."""
+    status: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+    stored_at: float
+    expires_at: float
+    owner: Optional[str]
+    size: int
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU response cache with per-route TTLs and a memory bound.
+    """
+
+    def __init__(self, route_ttls: Optional[Dict[str, float]] = None, default_ttl: Optional[float] = None,
+                 max_bytes: int = 64 * 1024 * 1024, max_entry_bytes: int = 1024 * 1024):
+        """
+        Initialize the response cache.
+
+        Args:
+            route_ttls: Seconds to keep responses for each route (path)
+            default_ttl: Seconds to keep responses for other routes, or None to not cache them
+            max_bytes: Memory bound for all stored bodies and headers (default: 64 MiB)
+            max_entry_bytes: Largest single response that is stored (default: 1 MiB)
+        """
+        self.route_ttls = dict(route_ttls or {})
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._entries: 'OrderedDict[Tuple[str, Hashable, str], CachedResponse]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so responses fetched before it are not stored after it
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    def ttl_for(self, route: str) -> Optional[float]:
+        """
+        Get the TTL configured for a route.
+
+        Args:
+            route: Request path
+
+        Returns:
+            Seconds to keep responses, or None if the route is not cached
+        """
+        ttl = self.route_ttls.get(route, self.default_ttl)
+        return ttl if ttl is not None and ttl > 0 else None
+
+    def is_cacheable_request(self, method: str, route: str, request_cache_control: Optional[str],
+                             cookie: bool = False) -> bool:
+        """
+        Check whether a request may be answered from, or stored in, the cache.
+
+        Requests with Authorization pass this check, but must not be answered
+        from the cache and are only stored with put(authorized=True).
+
+        Args:
+            method: Request method
+            route: Request path
+            request_cache_control: The request's Cache-Control header, if any
+            cookie: Whether the request carries a Cookie header
+
+        Returns:
+            True if the cache should be consulted for this request
+        """
+        if method != 'GET' or cookie or self.ttl_for(route) is None:
+            return False
+        directives = parse_cache_control(request_cache_control)
+        return 'no-store' not in directives and 'no-cache' not in directives and _max_age(directives) != 0
+
+    def get(self, key: Tuple[str, Hashable, str], now: Optional[float] = None) -> Optional[CachedResponse]:
+        """
+        Look up a fresh response and mark it most recently used.
+
+        Args:
+            key: (route, request ID, target); the target is the path and query string
+            now: Current monotonic time (default: time.monotonic())
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                self._drop(key)
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Tuple[str, Hashable, str], status: int, headers: List[Tuple[str, str]], body: bytes,
+            owner: Optional[str], generation: int, now: Optional[float] = None,
+            authorized: bool = False) -> bool:
+        """
+        Store a response if it is cacheable, evicting least recently used entries to fit.
+
+        Args:
+            key: (route, request ID, target); the route selects the TTL
+            status: Response status code
+            headers: End-to-end response headers
+            body: Complete response body
+            owner: Server that owned the key when the response was fetched
+            generation: Value of `generation` when the request was routed
+            now: Current monotonic time (default: time.monotonic())
+            authorized: Whether the request carried Authorization
+
+        Returns:
+            True if the response was stored
+        """
+        now = time.monotonic() if now is None else now
+        ttl = self.ttl_for(key[0])
+        if ttl is None or status not in CACHEABLE_STATUSES:
+            return False
+        names = {name.lower(): value for name, value in headers}
+        if 'set-cookie' in names or 'vary' in names:
+            return False
+        directives = parse_cache_control(names.get('cache-control'))
+        if 'no-store' in directives or 'no-cache' in directives or 'private' in directives:
+            return False
+        if authorized and 'public' not in directives and 's-maxage' not in directives:
+            return False
+        max_age = _max_age(directives)
+        if max_age is not None:
+            ttl = max_age
+        size = len(body) + sum(len(name) + len(value) for name, value in headers)
+        if ttl <= 0 or size > self.max_entry_bytes:
+            return False
+
+        with self._lock:
+            if generation != self.generation:
+                return False  # The key may have moved while the response was in flight
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = CachedResponse(status, list(headers), body, now, now + ttl, owner, size)
+            self._bytes += size
+            self.stores += 1
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        return True
+
+    def invalidate_moved(self, owner_of: Callable[[Hashable], Optional[str]]) -> int:
+        """
+        Drop entries whose key is now owned by a different server.
+
+        Call after servers are added, removed or reweighted.
+
+        Args:
+            owner_of: Maps a request ID to its current owner, e.g. hash_ring.get_server
+
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            self.generation += 1
+            moved = [key for key, entry in self._entries.items() if owner_of(key[1]) != entry.owner]
+            for key in moved:
+                self._drop(key)
+            self.invalidations += len(moved)
+            return len(moved)
+
+    def _drop(self, key: Tuple[str, Hashable, str]):
+        self._bytes -= self._entries.pop(key).size
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """
+        Get cache size and hit/miss counters.
+
+        Returns:
+            Dictionary with entry and byte counts, counters and the hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'expired': self.expired,
+                'invalidations': self.invalidations
+            }
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Distributed Systems Assignment 1 - Alternative Routing Engines
+
+This module provides routing engines that implement the same RoutingEngine
+interface as ConsistentHash, so the load balancer can pick one at startup:
+- consistent_hash: The 512-slot ring with quadratic hash functions
+- jump: Jump consistent hash (Lamping & Veach), O(log N) lookups, no memory
+- rendezvous: Highest random weight hashing, O(N) lookups, minimal churn
+- maglev: Maglev lookup table (Eisenbud et al.), O(1) lookups
+
+All engines publish immutable membership snapshots on every change, so
+lookups never take a lock.
+"""
+
+import logging
+import os
+import threading
+from collections import Counter
+from types import MappingProxyType
+from typing import Optional, List, Dict, Tuple
+
+from consistent_hash import ConsistentHash, RoutingEngine
+from hash_functions import MASK64, RequestKey, hash_text, key_to_int, mix64
+
+logger = logging.getLogger(__name__)
+
+# Prime lookup table size for Maglev; should be much larger than the server count
+MAGLEV_TABLE_SIZE = 65537
+
+
+def jump_hash(key: int, num_buckets: int) -> int:
+    """
+    Jump consistent hash: map a 64-bit key to a bucket in [0, num_buckets).
+
+    Args:
+        key: 64-bit key
+        num_buckets: Number of buckets (must be positive)
+
+    Returns:
+        Bucket index
+    """
+    bucket, candidate = -1, 0
+    while candidate < num_buckets:
+        bucket = candidate
+        key = (key * 2862933555777941757 + 1) & MASK64
+        candidate = int((bucket + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return bucket
+
+
+class MembershipSnapshot:
+    """
+    Immutable, versioned server membership plus an engine lookup structure.
+    """
+
+    def __init__(self, version: int, members: List[Tuple[int, str]], table=None):
+        """
+        Args:
+            version: Version number of the snapshot
+            members: Ordered list of (server_id, hostname) pairs
+            table: Engine-specific immutable lookup structure
+        """
+        self.version = version
+        self.members = tuple(members)
+        self.servers = MappingProxyType({
+            server_id: MappingProxyType({'hostname': hostname})
+            for server_id, hostname in members
+        })
+        self.table = table
+
+    def hostnames(self) -> List[str]:
+        """
+        Get the hostnames of all servers in this snapshot.
+
+        Returns:
+            List of server hostnames
+        """
+        return [hostname for _, hostname in self.members]
+
+
+class _SnapshotEngine(RoutingEngine):
+    """
+    Base for engines that rebuild their lookup structure from the member list.
+
+    Subclasses implement _build_table() and get_server(); membership
+    changes are copy-on-write and published with one reference swap.
+    """
+
+    def __init__(self):
+        self._snapshot = MembershipSnapshot(0, [], self._build_table([]))
+        self._write_lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> MembershipSnapshot:
+        """Current immutable membership snapshot."""
+        return self._snapshot
+
+    def _build_table(self, members: List[Tuple[int, str]]):
+        """
+        Build the engine lookup structure for a member list.
+
+        Args:
+            members: Ordered list of (server_id, hostname) pairs
+
+        Returns:
+            Immutable lookup structure stored on the snapshot
+        """
+        raise NotImplementedError
+
+    def _remove_member(self, members: List[Tuple[int, str]], server_id: int):
+        """
+        Remove a server from a draft member list.
+
+        Args:
+            members: Draft member list to modify
+            server_id: Server identifier present in the list
+        """
+        index = next(i for i, (sid, _) in enumerate(members) if sid == server_id)
+        del members[index]
+
+    def _publish(self, members: List[Tuple[int, str]]):
+        """
+        Publish a member list as the next snapshot version.
+
+        Must be called with the write lock held.
+
+        Args:
+            members: New ordered member list
+        """
+        self._snapshot = MembershipSnapshot(
+            self._snapshot.version + 1, members, self._build_table(members)
+        )
+
+    def add_servers(self, servers: List[Tuple[int, str]]) -> bool:
+        with self._write_lock:
+            members = list(self._snapshot.members)
+            known = {server_id for server_id, _ in members}
+            for server_id, hostname, *weight in servers:
+                if server_id in known:
+                    logger.warning(f"Server {server_id} already exists")
+                    return False
+                if weight and weight[0] != 1.0:
+                    logger.warning(f"The {self.name} engine does not support server weights")
+                    return False
+                known.add(server_id)
+                members.append((server_id, hostname))
+            self._publish(members)
+
+        logger.info(f"Successfully added {len(servers)} servers to {self.name} engine")
+        return True
+
+    def remove_servers(self, server_ids: List[int]) -> bool:
+        with self._write_lock:
+            members = list(self._snapshot.members)
+            for server_id in server_ids:
+                if not any(sid == server_id for sid, _ in members):
+                    logger.warning(f"Server {server_id} not found for removal")
+                    return False
+                self._remove_member(members, server_id)
+            self._publish(members)
+
+        logger.info(f"Successfully removed {len(server_ids)} servers from {self.name} engine")
+        return True
+
+    def clear(self):
+        with self._write_lock:
+            self._publish([])
+        logger.info(f"Cleared all servers from {self.name} engine")
+
+    def get_ring_status(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            'engine': self.name,
+            'version': snapshot.version,
+            'server_count': len(snapshot.members),
+            'ownership': self._ownership(snapshot),
+            'servers': {
+                server_id: {'hostname': hostname}
+                for server_id, hostname in snapshot.members
+            }
+        }
+
+
+    def _ownership(self, snapshot: MembershipSnapshot) -> Dict[str, float]:
+        """Share of keys each server owns; equal unless the engine says otherwise."""
+        return {hostname: 1 / len(snapshot.members) for _, hostname in snapshot.members}
+
+
+class JumpHashEngine(_SnapshotEngine):
+    """
+    Jump consistent hash engine.
+
+    Servers occupy buckets 0..N-1 in member order. Adding a server only
+    moves the ~1/N of keys that land in the new last bucket. Jump hash
+    can only shrink from the end, so removing a server moves the last
+    server into the freed bucket: the removed server's keys and the last
+    bucket's keys are remapped.
+    """
+
+    name = 'jump'
+
+    def _build_table(self, members: List[Tuple[int, str]]) -> Tuple[str, ...]:
+        return tuple(hostname for _, hostname in members)
+
+    def _remove_member(self, members: List[Tuple[int, str]], server_id: int):
+        index = next(i for i, (sid, _) in enumerate(members) if sid == server_id)
+        last = members.pop()
+        if index < len(members):
+            members[index] = last
+
+    def get_server(self, request_id: RequestKey) -> Optional[str]:
+        buckets = self._snapshot.table
+        if not buckets:
+            logger.warning("No servers available to handle request")
+            return None
+        return buckets[jump_hash(mix64(key_to_int(request_id) & MASK64), len(buckets))]
+
+    def get_preference_list(self, request_id: RequestKey, n: int) -> List[str]:
+        """
+        Get up to n distinct servers in failover order.
+
+        Replays removals: each next entry is where the request lands
+        once the previous entries are removed (the last bucket moving
+        into the freed one, as in remove_servers).
+        """
+        buckets = list(self._snapshot.table)
+        key = mix64(key_to_int(request_id) & MASK64)
+        preference = []
+        while buckets and len(preference) < n:
+            index = jump_hash(key, len(buckets))
+            preference.append(buckets[index])
+            last = buckets.pop()
+            if index < len(buckets):
+                buckets[index] = last
+        return preference
+
+
+class RendezvousEngine(_SnapshotEngine):
+    """
+    Rendezvous (highest random weight) hashing engine.
+
+    Each request goes to the server with the highest hash of
+    (request, server). Only keys owned by a removed server move, and an
+    added server only takes keys for which it now scores highest.
+    """
+
+    name = 'rendezvous'
+
+    def _build_table(self, members: List[Tuple[int, str]]) -> Tuple[Tuple[int, str], ...]:
+        return tuple((hash_text(hostname), hostname) for _, hostname in members)
+
+    def get_server(self, request_id: RequestKey) -> Optional[str]:
+        scored = self._snapshot.table
+        if not scored:
+            logger.warning("No servers available to handle request")
+            return None
+        key = mix64(key_to_int(request_id) & MASK64)
+        best_score, best_hostname = -1, None
+        for server_hash, hostname in scored:
+            score = mix64(key ^ server_hash)
+            if score > best_score:
+                best_score, best_hostname = score, hostname
+        return best_hostname
+
+    def get_preference_list(self, request_id: RequestKey, n: int) -> List[str]:
+        """
+        Get up to n distinct servers in failover order: highest score first.
+        """
+        key = mix64(key_to_int(request_id) & MASK64)
+        ranked = sorted(self._snapshot.table, key=lambda entry: mix64(key ^ entry[0]), reverse=True)
+        return [hostname for _, hostname in ranked[:max(n, 0)]]
+
+
+class MaglevEngine(_SnapshotEngine):
+    """
+    Maglev lookup-table engine.
+
+    Each server walks its own permutation of a prime-sized table and the
+    servers take turns claiming their next free entry until the table
+    is full. Lookups are a single table index; each server owns an
+    almost exactly equal share of the table.
+    """
+
+    name = 'maglev'
+
+    def __init__(self, table_size: int = MAGLEV_TABLE_SIZE):
+        """
+        Args:
+            table_size: Prime lookup table size (default: 65537)
+        """
+        self.table_size = table_size
+        super().__init__()
+
+    def _build_table(self, members: List[Tuple[int, str]]) -> Tuple[Optional[str], ...]:
+        size = self.table_size
+        if not members:
+            return ()
+
+        offsets = []
+        skips = []
+        for _, hostname in members:
+            offsets.append(hash_text(hostname, b'offset') % size)
+            skips.append(hash_text(hostname, b'skip') % (size - 1) + 1)
+
+        table = [None] * size
+        next_index = [0] * len(members)
+        filled = 0
+        while True:
+            for i, (_, hostname) in enumerate(members):
+                entry = (offsets[i] + next_index[i] * skips[i]) % size
+                while table[entry] is not None:
+                    next_index[i] += 1
+                    entry = (offsets[i] + next_index[i] * skips[i]) % size
+                table[entry] = hostname
+                next_index[i] += 1
+                filled += 1
+                if filled == size:
+                    return tuple(table)
+
+    def get_server(self, request_id: RequestKey) -> Optional[str]:
+        table = self._snapshot.table
+        if not table:
+            logger.warning("No servers available to handle request")
+            return None
+        return table[mix64(key_to_int(request_id) & MASK64) % self.table_size]
+
+    def get_preference_list(self, request_id: RequestKey, n: int) -> List[str]:
+        """
+        Get up to n distinct servers: the owner of the request's entry,
+        then the next distinct owners scanning the table forward.
+        """
+        snapshot = self._snapshot
+        table = snapshot.table
+        n = min(n, len(snapshot.members))
+        preference = []
+        if n <= 0:
+            return preference
+        index = mix64(key_to_int(request_id) & MASK64) % self.table_size
+        for offset in range(self.table_size):
+            hostname = table[(index + offset) % self.table_size]
+            if hostname not in preference:
+                preference.append(hostname)
+                if len(preference) == n:
+                    break
+        return preference
+
+    def _ownership(self, snapshot: MembershipSnapshot) -> Dict[str, float]:
+        counts = Counter(snapshot.table)
+        return {hostname: counts[hostname] / self.table_size for _, hostname in snapshot.members}
+
+    def get_ring_status(self) -> Dict:
+        status = super().get_ring_status()
+        status['table_size'] = self.table_size
+        return status
+
+
+ENGINES = {
+    ConsistentHash.name: ConsistentHash,
+    JumpHashEngine.name: JumpHashEngine,
+    RendezvousEngine.name: RendezvousEngine,
+    MaglevEngine.name: MaglevEngine,
+}
+
+
+def create_routing_engine(name: str = ConsistentHash.name, slots: int = 512,
+                          virtual_servers: int = 9, dense_table: bool = False,
+                          hash_family: str = 'polynomial',
+                          table_size: int = MAGLEV_TABLE_SIZE) -> RoutingEngine:
+    """
+    Create a routing engine by name.
+
+    Args:
+        name: One of consistent_hash, jump, rendezvous, maglev
+        slots: Ring slots (consistent_hash only)
+        virtual_servers: Virtual servers per server (consistent_hash only)
+        dense_table: Dense owner table mode (consistent_hash only)
+        hash_family: Ring hash family name (consistent_hash only)
+        table_size: Prime lookup table size (maglev only)
+
+    Returns:
+        Routing engine instance
+
+    Raises:
+        ValueError: If the engine name is unknown
+    """
+    if name not in ENGINES:
+        raise ValueError(f"Unknown routing engine '{name}'; expected one of {sorted(ENGINES)}")
+
+    if name == ConsistentHash.name:
+        return ConsistentHash(slots=slots, virtual_servers=virtual_servers,
+                              dense_table=dense_table, hash_family=hash_family)
+    if name == MaglevEngine.name:
+        return MaglevEngine(table_size=table_size)
+    return ENGINES[name]()
+
+
+def create_routing_engine_from_env(environ=os.environ) -> RoutingEngine:
+    """
+    Create the routing engine configured through LB_* environment variables.
+
+    Args:
+        environ: Environment mapping (default: os.environ)
+
+    Returns:
+        Routing engine instance
+    """
+    return create_routing_engine(
+        environ.get('LB_ROUTING_ENGINE', ConsistentHash.name),
+        slots=512,
+        virtual_servers=9,
+        dense_table=environ.get('LB_DENSE_TABLE', '1') == '1',
+        hash_family=environ.get('LB_HASH_FAMILY', 'polynomial'),
+        table_size=int(environ.get('LB_MAGLEV_TABLE_SIZE', MAGLEV_TABLE_SIZE))
+    )
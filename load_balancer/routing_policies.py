@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Distributed Systems Assignment 1 - Per-Route Routing Policies
+
+This module provides load-aware routing policies for routes that do not
+need key affinity. Keyed routes keep the routing engine's placement
+(`hash`); stateless routes can instead use:
+- round_robin: rotate through the servers
+- least_outstanding: the server with the fewest requests in flight
+- p2c: power of two random choices, comparing requests in flight
+- p2c_latency: power of two random choices, comparing EWMA latency
+
+Each policy returns a preference list of distinct servers, so failover
+and hedging work the same way as on the ring.
+"""
+
+import itertools
+import random
+from typing import Callable, Dict, List, Mapping, Optional
+
+HASH = 'hash'
+
+
+class RoutingPolicy:
+    """
+    Base class for policies that pick servers without looking at the request key.
+    """
+
+    name = ''
+
+    def pick(self, servers: List[str], n: int) -> List[str]:
+        """
+        Order servers by preference.
+
+        Args:
+            servers: Hostnames of the servers currently in the ring
+            n: Maximum number of servers to return
+
+        Returns:
+            Up to n distinct hostnames, best first
+        """
+        raise NotImplementedError
+
+
+class RoundRobinPolicy(RoutingPolicy):
+    """Rotate the starting server on every request."""
+
+    name = 'round_robin'
+
+    def __init__(self):
+        self._counter = itertools.count()  # next() is atomic under the GIL
+
+    def pick(self, servers: List[str], n: int) -> List[str]:
+        if not servers:
+            return []
+        start = next(self._counter) % len(servers)
+        return (servers[start:] + servers[:start])[:n]
+
+
+class LeastOutstandingPolicy(RoutingPolicy):
+    """Prefer the servers with the fewest requests in flight; ties are broken at random."""
+
+    name = 'least_outstanding'
+
+    def __init__(self, loads: Callable[[], Mapping[str, int]]):
+        """
+        Args:
+            loads: Returns requests in flight per hostname, e.g. LoadTracker.snapshot
+        """
+        self.loads = loads
+
+    def pick(self, servers: List[str], n: int) -> List[str]:
+        loads = self.loads()
+        shuffled = random.sample(servers, len(servers))
+        return sorted(shuffled, key=lambda server: loads.get(server, 0))[:n]
+
+
+class PowerOfTwoPolicy(RoutingPolicy):
+    """
+    Sample two servers at random and prefer the less loaded one.
+
+    Only two servers are compared, so the choice stays cheap and avoids the
+    herding a strict least-loaded pick causes when load information is stale.
+    """
+
+    def __init__(self, metric: Callable[[], Mapping[str, float]], name: str = 'p2c'):
+        """
+        Args:
+            metric: Returns a load figure per hostname, lower is better; missing servers count as 0
+            name: Policy name reported in stats
+        """
+        self.metric = metric
+        self.name = name
+
+    def pick(self, servers: List[str], n: int) -> List[str]:
+        order = random.sample(servers, len(servers))
+        if len(order) >= 2:
+            metric = self.metric()
+            if metric.get(order[1], 0) < metric.get(order[0], 0):
+                order[0], order[1] = order[1], order[0]
+        return order[:n]
+
+
+class RoutePolicies:
+    """
+    Maps request paths to routing policies.
+    """
+
+    def __init__(self, spec: str, loads: Callable[[], Mapping[str, int]],
+                 latencies: Callable[[], Mapping[str, float]]):
+        """
+        Initialize policies from a spec such as '/home=hash,/static=p2c,round_robin'.
+
+        Args:
+            spec: Comma-separated route=policy pairs; a bare policy applies to other routes
+            loads: Returns requests in flight per hostname
+            latencies: Returns EWMA latency in milliseconds per hostname
+
+        Raises:
+            ValueError: If a policy name is unknown
+        """
+        factories = {
+            HASH: lambda: None,
+            RoundRobinPolicy.name: RoundRobinPolicy,
+            LeastOutstandingPolicy.name: lambda: LeastOutstandingPolicy(loads),
+            'p2c': lambda: PowerOfTwoPolicy(loads, 'p2c'),
+            'p2c_latency': lambda: PowerOfTwoPolicy(latencies, 'p2c_latency'),
+        }
+        self.routes: Dict[str, Optional[RoutingPolicy]] = {}
+        self.default: Optional[RoutingPolicy] = None
+        for part in spec.split(','):
+            route, _, name = part.strip().rpartition('=')
+            name = name.strip().lower()
+            if not name:
+                continue
+            if name not in factories:
+                raise ValueError(f"Unknown routing policy '{name}'. Available: {', '.join(factories)}")
+            if route:
+                self.routes[route] = factories[name]()
+            else:
+                self.default = factories[name]()
+
+    def policy_for(self, route: str) -> Optional[RoutingPolicy]:
+        """
+        Get the policy for a route.
+
+        Args:
+            route: Request path
+
+        Returns:
+            The route's policy, or None if it keeps the routing engine's key affinity
+        """
+        return self.routes.get(route, self.default)
+
+    def describe(self) -> Dict[str, str]:
+        """
+        Get the configured policy names.
+
+        Returns:
+            Dictionary mapping routes (and '*' for other routes) to policy names
+        """
+        described = {route: policy.name if policy else HASH for route, policy in self.routes.items()}
+        described['*'] = self.default.name if self.default else HASH
+        return described
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Distributed Systems Assignment 1 - Request Coalescing
+
+This module lets concurrent identical requests share one upstream call
+(single-flight). The first request for a key becomes the leader and goes
+upstream; requests for the same key that arrive while it is in flight
+wait for the leader's response instead of adding load to the backend.
+Waiters per key are capped and bounded by a timeout; a waiter that hits
+either limit, or whose leader fails, goes upstream on its own.
+
+Requests only share a response when they were routed by the same key,
+so users told apart by a header, cookie or their address never receive
+each other's responses. Bodies are passed through undecoded, so they
+must also have negotiated the same representation: the content
+negotiation headers are part of the key, and a response that varies on
+any other header is not shared.
+"""
+
+import threading
+import time
+from typing import Dict, Hashable, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+# Request headers that select a representation (RFC 9110 §12.5)
+NEGOTIATION_HEADERS = ('Accept', 'Accept-Encoding', 'Accept-Language')
+
+
+def flight_key(method: str, target: str, headers: Mapping[str, str],
+               request_key: Optional[Hashable] = None) -> Tuple[Hashable, ...]:
+    """
+    Build the key under which identical requests share a response.
+
+    Args:
+        method: Request method
+        target: Path and query string
+        headers: Request headers
+        request_key: Key the request was routed by, if it came from the request
+
+    Returns:
+        Tuple of the method, target, routing key and content negotiation header values
+    """
+    return (method, target, request_key) + tuple(headers.get(name, '') for name in NEGOTIATION_HEADERS)
+
+
+def is_shareable(headers: Iterable[Tuple[str, str]]) -> bool:
+    """
+    Check whether a response only varies on headers that are part of the key.
+
+    Args:
+        headers: Response (name, value) header pairs
+
+    Returns:
+        False if the response has a Vary header naming any other request header
+    """
+    keyed = {name.lower() for name in NEGOTIATION_HEADERS}
+    for name, value in headers:
+        if name.lower() == 'vary':
+            if any(field.strip().lower() not in keyed for field in value.split(',')):
+                return False
+    return True
+
+
+class SharedResponse(NamedTuple):
+    """A complete response handed from the leader to its waiters."""
+    status: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+
+
+class Flight:
+    """One in-flight upstream request and the waiters sharing it."""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.done = threading.Event()
+        self.result: Optional[SharedResponse] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Thread-safe single-flight registry keyed by request identity.
+    """
+
+    def __init__(self, max_waiters: int = 100, timeout: float = 5.0, max_body_bytes: int = 1024 * 1024):
+        """
+        Initialize the registry.
+
+        Args:
+            max_waiters: Requests that may wait on one in-flight request (default: 100)
+            timeout: Seconds a waiter waits before going upstream itself (default: 5)
+            max_body_bytes: Largest response body that is shared (default: 1 MiB)
+        """
+        self.max_waiters = max_waiters
+        self.timeout = timeout
+        self.max_body_bytes = max_body_bytes
+        self._flights: Dict[Hashable, Flight] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.overflows = 0
+        self.fallbacks = 0
+
+    def begin(self, key: Hashable) -> Tuple[Optional[Flight], bool]:
+        """
+        Join the in-flight request for a key, or lead a new one.
+
+        A leader must call finish() once its response is complete or has failed.
+        A flight older than the timeout is treated as abandoned and replaced.
+
+        Args:
+            key: Request identity, e.g. (method, path and query)
+
+        Returns:
+            Tuple of (flight, True) for the leader, (flight, False) for a waiter,
+            or (None, False) if the key already has the maximum number of waiters
+        """
+        now = time.monotonic()
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None or now - flight.started > self.timeout:
+                flight = Flight(now)
+                self._flights[key] = flight
+                self.leaders += 1
+                return flight, True
+            if flight.waiters >= self.max_waiters:
+                self.overflows += 1
+                return None, False
+            flight.waiters += 1
+            return flight, False
+
+    def wait(self, flight: Flight) -> Optional[SharedResponse]:
+        """
+        Wait for the leader's response.
+
+        Args:
+            flight: Flight returned by begin() to a waiter
+
+        Returns:
+            The shared response, or None if the caller should go upstream itself
+        """
+        finished = flight.done.wait(self.timeout)
+        with self._lock:
+            if not finished:
+                self.timeouts += 1
+            elif flight.result is None:
+                self.fallbacks += 1
+            else:
+                self.coalesced += 1
+        return flight.result if finished else None
+
+    def finish(self, key: Hashable, flight: Flight, result: Optional[SharedResponse]):
+        """
+        Publish the leader's response to its waiters and retire the flight.
+
+        Args:
+            key: Key passed to begin()
+            flight: Flight returned by begin() to the leader
+            result: Complete response, or None if the request failed or was not buffered
+        """
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if result is not None and len(result.body) > self.max_body_bytes:
+                result = None
+            flight.result = result
+        flight.done.set()
+
+    def clear(self):
+        """Forget all in-flight requests; their waiters time out or fall back."""
+        with self._lock:
+            self._flights.clear()
+
+    def stats(self) -> Dict:
+        """
+        Get coalescing counters.
+
+        Returns:
+            Dictionary with in-flight, leader, coalesced and fallback counts
+        """
+        with self._lock:
+            return {
+                'in_flight': len(self._flights),
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'timeouts': self.timeouts,
+                'overflows': self.overflows,
+                'fallbacks': self.fallbacks
+            }
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Distributed Systems Assignment 1 - Upstream Connection Pooling
+
+This module keeps HTTP/1.1 keep-alive connections to backend servers so
+the proxy path does not pay a TCP handshake on every request. Each
+registered backend hostname gets its own bounded pool of idle
+connections; idle connections older than the idle timeout are closed
+instead of reused. Pools are registered when a server joins the ring and
+closed when it leaves. Responses are streamed in chunks, so the proxy
+never has to hold a large body in memory.
+"""
+
+import http.client
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Methods that may be sent again on another backend after a failure (RFC 9110 §9.2.2)
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'TRACE', 'PUT', 'DELETE'})
+
+# Request bodies up to this size are buffered so they can be replayed on
+# another backend; larger bodies are streamed once and never retried
+REPLAYABLE_BODY_LIMIT = 64 * 1024
+
+# Errors that mean a reused keep-alive connection was closed by the backend
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+# Headers that apply to a single connection and must not be forwarded (RFC 9110 §7.6.1),
+# plus Host, which the upstream connection sets for the backend
+HOP_BY_HOP_HEADERS = frozenset({
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'proxy-connection', 'te', 'trailer', 'transfer-encoding', 'upgrade', 'host'
+})
+
+
+def filter_headers(headers: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """
+    Drop hop-by-hop headers before forwarding a message to the next hop.
+
+    Args:
+        headers: (name, value) header pairs
+
+    Returns:
+        End-to-end headers, in their original order
+    """
+    headers = list(headers)
+    dropped = set(HOP_BY_HOP_HEADERS)
+    for name, value in headers:
+        if name.lower() == 'connection':
+            dropped.update(token.strip().lower() for token in value.split(','))
+    return [(name, value) for name, value in headers if name.lower() not in dropped]
+
+
+class CancelToken:
+    """
+    Lets another thread abort an in-flight upstream request.
+
+    Cancelling shuts down the request's socket, so a thread blocked on
+    the backend fails immediately instead of waiting for its timeout.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def attach(self, conn: http.client.HTTPConnection):
+        """
+        Bind the token to the connection a request is using.
+
+        Args:
+            conn: Connection carrying the request
+
+        Raises:
+            ConnectionAbortedError: If the token was already cancelled
+        """
+        with self._lock:
+            if self.cancelled:
+                raise ConnectionAbortedError("Upstream request cancelled")
+            self._conn = conn
+
+    def cancel(self):
+        """Abort the request; its connection is never reused."""
+        with self._lock:
+            self.cancelled = True
+            conn = self._conn
+        if conn is not None and conn.sock is not None:
+            try:
+                conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class HostPool:
+    """
+    Bounded pool of idle keep-alive connections to one backend.
+    """
+
+    def __init__(self, hostname: str, port: int, max_size: int, idle_timeout: float, timeout: float):
+        """
+        Args:
+            hostname: Backend hostname
+            port: Backend port
+            max_size: Maximum number of idle connections kept
+            idle_timeout: Seconds an idle connection may be reused for
+            timeout: Socket timeout for upstream requests in seconds
+        """
+        self.hostname = hostname
+        self.port = port
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = deque()  # (connection, time returned) pairs, most recent last
+        self._lock = threading.Lock()
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """
+        Take an idle connection, or open a new one if none is usable.
+
+        Returns:
+            Tuple of (connection, whether it was reused from the pool)
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn, returned_at = self._idle.pop()
+                if now - returned_at <= self.idle_timeout:
+                    self.hits += 1
+                    return conn, True
+                conn.close()
+                self.expired += 1
+            self.misses += 1
+        return self.connect(), False
+
+    def connect(self) -> http.client.HTTPConnection:
+        """
+        Open a new connection to the backend.
+
+        Returns:
+            Unconnected HTTP connection (connects on first request)
+        """
+        return http.client.HTTPConnection(self.hostname, self.port, timeout=self.timeout)
+
+    def release(self, conn: http.client.HTTPConnection, reusable: bool = True):
+        """
+        Return a connection to the pool.
+
+        Args:
+            conn: Connection whose last response has been fully read
+            reusable: False to close the connection instead of keeping it
+        """
+        with self._lock:
+            if reusable and not self._closed and len(self._idle) < self.max_size:
+                self._idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close(self):
+        """Close all idle connections; connections in use are closed on release."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, deque()
+        for conn, _ in idle:
+            conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get pool counters.
+
+        Returns:
+            Dictionary with idle, hits, misses and expired counts
+        """
+        with self._lock:
+            return {
+                'idle': len(self._idle),
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired
+            }
+
+
+class UpstreamStream:
+    """
+    An upstream response whose body is read in chunks.
+
+    The connection goes back to its pool once the body has been read to
+    the end; if the reader stops early or fails, it is closed instead.
+    """
+
+    def __init__(self, pool: HostPool, conn: http.client.HTTPConnection,
+                 response: http.client.HTTPResponse, connect_seconds: float = 0.0,
+                 wait_seconds: float = 0.0):
+        """
+        Args:
+            pool: Pool the connection came from
+            conn: Connection the response arrives on
+            response: Response with its headers already read
+            connect_seconds: Time spent opening TCP connections for the request
+            wait_seconds: Rest of the time until the response headers arrived
+        """
+        self.status = response.status
+        self.headers = response.getheaders()
+        self.connect_seconds = connect_seconds
+        self.wait_seconds = wait_seconds
+        self._pool = pool
+        self._conn = conn
+        self._response = response
+
+    def iter_chunks(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        Yield the response body in chunks.
+
+        Args:
+            chunk_size: Maximum bytes per chunk (default: 64 KiB)
+
+        Yields:
+            Body chunks, never holding more than one chunk in memory
+        """
+        complete = False
+        try:
+            while True:
+                chunk = self._response.read1(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+            self._response.read()  # read1() never marks a Content-Length body as done
+            complete = True
+        finally:
+            self._finish(complete)
+
+    def close(self):
+        """Abandon the response body and close its connection."""
+        self._finish(False)
+
+    def _finish(self, complete: bool):
+        """Return the connection to the pool once, or close it."""
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if complete and not self._response.will_close:
+            self._pool.release(conn)
+        else:
+            conn.close()
+
+
+class UpstreamPool:
+    """
+    Keep-alive connection pools for all backend servers.
+    """
+
+    def __init__(self, port: int = 5000, max_size: int = 10,
+                 idle_timeout: float = 30.0, timeout: float = 2.0):
+        """
+        Initialize the upstream pools.
+
+        Args:
+            port: Port the backends listen on (default: 5000)
+            max_size: Idle connections kept per backend (default: 10)
+            idle_timeout: Seconds an idle connection may be reused for (default: 30)
+            timeout: Socket timeout for upstream requests in seconds (default: 2)
+        """
+        self.port = port
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._pools: Dict[str, HostPool] = {}
+        self._lock = threading.Lock()
+
+    def register(self, hostname: str):
+        """
+        Create the pool for a backend if it does not exist yet.
+
+        Args:
+            hostname: Backend hostname
+        """
+        with self._lock:
+            if hostname not in self._pools:
+                self._pools[hostname] = HostPool(
+                    hostname, self.port, self.max_size, self.idle_timeout, self.timeout
+                )
+
+    def unregister(self, hostname: str):
+        """
+        Close and drop the pool for a backend.
+
+        Args:
+            hostname: Backend hostname
+        """
+        with self._lock:
+            pool = self._pools.pop(hostname, None)
+        if pool is not None:
+            pool.close()
+            logger.info(f"Closed upstream pool for {hostname}")
+
+    def clear(self):
+        """Close and drop every pool."""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.close()
+
+    def get_pool(self, hostname: str) -> Optional[HostPool]:
+        """
+        Get the pool for a registered backend.
+
+        Args:
+            hostname: Backend hostname
+
+        Returns:
+            Host pool, or None if the backend is not registered
+        """
+        return self._pools.get(hostname)
+
+    def open(self, hostname: str, method: str, path: str,
+             body=None, headers: Optional[Iterable[Tuple[str, str]]] = None,
+             timeout: Optional[float] = None, cancel: Optional[CancelToken] = None) -> "UpstreamStream":
+        """
+        Send a request to a backend over a pooled connection and return
+        the response unread, so its body can be streamed.
+
+        The body may be bytes, a file-like object or an iterable of byte
+        chunks; without a Content-Length header, streamed bodies are sent
+        with chunked transfer encoding. A reused connection the backend has
+        already closed is retried once on a fresh connection when the body
+        can be replayed (None or bytes). Unregistered backends get a
+        one-off connection that is closed afterwards.
+
+        Args:
+            hostname: Backend hostname
+            method: HTTP method
+            path: Request path including the query string
+            body: Optional request body
+            headers: Optional request headers, as a dict or (name, value) pairs
+            timeout: Socket timeout for this request (default: the pool timeout)
+            cancel: Optional token another thread can use to abort the request
+
+        Returns:
+            Upstream response whose body has not been read yet
+
+        Raises:
+            OSError or http.client.HTTPException: If the backend is unreachable
+        """
+        pool = self.get_pool(hostname)
+        if pool is None:
+            pool = HostPool(hostname, self.port, 0, self.idle_timeout, self.timeout)
+
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        connect_seconds = 0.0
+        conn, reused = pool.acquire()
+        try:
+            if cancel is not None:
+                cancel.attach(conn)
+            try:
+                response, connect_seconds = self._send(conn, method, path, body, headers, timeout)
+            except STALE_CONNECTION_ERRORS:
+                if not reused or not (body is None or isinstance(body, bytes)):
+                    raise
+                conn.close()
+                conn = pool.connect()
+                if cancel is not None:
+                    cancel.attach(conn)
+                response, connect_seconds = self._send(conn, method, path, body, headers, timeout)
+        except Exception:
+            conn.close()
+            raise
+        wait_seconds = time.monotonic() - started - connect_seconds
+        return UpstreamStream(pool, conn, response, connect_seconds, wait_seconds)
+
+    def _send(self, conn: http.client.HTTPConnection, method: str, path: str,
+              body, headers, timeout: float) -> Tuple[http.client.HTTPResponse, float]:
+        """Send one request and read the response status line and headers, timing the connect."""
+        conn.timeout = timeout
+        connect_seconds = 0.0
+        if conn.sock is None:
+            # Connect explicitly rather than on first send, so setup time can be told apart
+            started = time.monotonic()
+            conn.connect()
+            connect_seconds = time.monotonic() - started
+        else:
+            conn.sock.settimeout(timeout)
+        pairs = list(headers.items() if isinstance(headers, dict) else headers or ())
+        names = {name.lower() for name, _ in pairs}
+        conn.putrequest(method, path, skip_host='host' in names, skip_accept_encoding='accept-encoding' in names)
+        # Repeated fields go out as they came, except Cookie, which must be one
+        # field joined with '; ' (RFC 6265 §5.4)
+        cookies = [value for name, value in pairs if name.lower() == 'cookie']
+        if cookies:
+            conn.putheader('Cookie', '; '.join(cookies))
+        for name, value in pairs:
+            if name.lower() != 'cookie':
+                conn.putheader(name, value)
+        chunked = False
+        if 'content-length' not in names and 'transfer-encoding' not in names:
+            if isinstance(body, (bytes, bytearray)):
+                conn.putheader('Content-Length', str(len(body)))
+            elif body is not None:
+                conn.putheader('Transfer-Encoding', 'chunked')
+                chunked = True
+            elif method in ('POST', 'PUT', 'PATCH'):
+                conn.putheader('Content-Length', '0')
+        conn.endheaders(body, encode_chunked=chunked)
+        return conn.getresponse(), connect_seconds
+
+    def stats(self) -> Dict:
+        """
+        Get hit/miss counters for every pool.
+
+        Returns:
+            Dictionary with per-backend counters and totals
+        """
+        with self._lock:
+            pools = dict(self._pools)
+        per_host = {hostname: pool.stats() for hostname, pool in pools.items()}
+        totals = {'idle': 0, 'hits': 0, 'misses': 0, 'expired': 0}
+        for counters in per_host.values():
+            for name in totals:
+                totals[name] += counters[name]
+        return {'backends': per_host, 'total': totals}
@@ -25,6 +25,11 @@ from typing import Dict, List, Tuple
 import os
 import sys
 
+# Routing engines are analysed offline, without a running load balancer
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+from routing_engines import create_routing_engine, ENGINES
+from hash_functions import HASH_FAMILIES
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -346,6 +351,46 @@ class PerformanceAnalyzer:
         logger.info(f"Scalability Analysis:")
         for servers, avg_load in scalability_data.items():
             logger.info(f"  {servers} servers: {avg_load:.2f} avg load")
+    
+    @staticmethod
+    def compare_routing_engines(num_requests: int = 10000, num_servers: int = 3) -> Dict[str, Dict]:
+        """
+        Compare routing engines offline on balance and remap churn.
+        
+        Args:
+            num_requests: Number of request IDs to route
+            num_servers: Number of servers before one more is added
+            
+        Returns:
+            Dictionary mapping engine names to their statistics
+        """
+        results = {}
+        request_ids = range(num_requests)
+        
+        for name in ENGINES:
+            engine = create_routing_engine(name)
+            engine.add_servers([(i, f"Server{i}") for i in range(1, num_servers + 1)])
+            
+            start = time.perf_counter()
+            before = [engine.get_server(rid) for rid in request_ids]
+            lookup_us = (time.perf_counter() - start) / num_requests * 1e6
+            
+            engine.add_server(num_servers + 1, f"Server{num_servers + 1}")
+            after = [engine.get_server(rid) for rid in request_ids]
+            
+            counts = Counter(before)
+            results[name] = {
+                'max_share': max(counts.values()) / num_requests,
+                'remapped': sum(1 for old, new in zip(before, after) if old != new) / num_requests,
+                'lookup_us': lookup_us
+            }
+            logger.info(
+                f"  {name}: max share {results[name]['max_share']:.1%}, "
+                f"remapped on scale-out {results[name]['remapped']:.1%}, "
+                f"{lookup_us:.2f} us/lookup"
+            )
+        
+        return results
 
 async def run_analysis_a1():
     """Analysis A-1: Load distribution with 10,000 requests on 3 servers."""
@@ -470,12 +515,17 @@ async def run_analysis_a4():
                 "A-4: Load Distribution with Original Hash Functions"
             )
     
-    # Suggestions for modified hash functions
-    logger.info("\nSuggested alternative hash functions for testing:")
-    logger.info("1. H(i) = (i * 2654435761) % 2^32  # Knuth's multiplicative hash")
-    logger.info("2. Φ(i,j) = ((i << 16) + j) * 2654435761 % 2^32")
-    logger.info("3. H(i) = i * i * i + 7  # Cubic function")
-    logger.info("4. Φ(i,j) = (i + j) * (i + j + 1) / 2 + j  # Cantor pairing")
+    # Alternative hash families, selectable with LB_HASH_FAMILY
+    logger.info("\nHash family comparison on the consistent hash ring:")
+    for name in HASH_FAMILIES:
+        ring = create_routing_engine('consistent_hash', hash_family=name)
+        ring.add_servers([(i, f"Server{i}") for i in range(1, 4)])
+        counts = Counter(ring.get_servers_batch(range(10000)).tolist())
+        logger.info(f"  {name}: max share {max(counts.values()) / 10000:.1%} across {len(counts)} servers")
+    
+    # Alternative routing engines, selectable with LB_ROUTING_ENGINE
+    logger.info("\nRouting engine comparison (ideal max share with 3 servers is 33.3%, ideal remap on 3->4 is 25%):")
+    PerformanceAnalyzer.compare_routing_engines(10000, 3)
 
 async def main():
     """Main analysis runner."""
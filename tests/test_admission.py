@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Unit tests for admission control and load shedding.
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+from admission import AdmissionController, ClientRateLimiter, ConcurrencyLimiter
+
+class TestConcurrencyLimiter(unittest.TestCase):
+    """Test cases for ConcurrencyLimiter class."""
+
+    def test_queue_full_and_timeout(self):
+        """Test requests over the limit wait in a bounded queue and are shed from it."""
+        limiter = ConcurrencyLimiter(limit=1, queue_size=1, queue_timeout=0.05)
+        self.assertIsNone(limiter.acquire())
+
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(limiter.acquire()))
+        waiter.start()
+        while limiter.stats()['waiting'] == 0:
+            time.sleep(0.001)
+        self.assertEqual(limiter.acquire(), 'queue_full')
+        waiter.join()
+        self.assertEqual(results, ['queue_timeout'])
+        self.assertEqual(limiter.stats()['in_flight'], 1)
+
+    def test_waiter_takes_released_slot(self):
+        """Test a queued request is admitted as soon as a slot is released."""
+        limiter = ConcurrencyLimiter(limit=1, queue_size=1, queue_timeout=5)
+        limiter.acquire()
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(limiter.acquire()))
+        waiter.start()
+        while limiter.stats()['waiting'] == 0:
+            time.sleep(0.001)
+        limiter.release()
+        waiter.join()
+        self.assertEqual(results, [None])
+        self.assertEqual(limiter.stats()['in_flight'], 1)
+
+class TestClientRateLimiter(unittest.TestCase):
+    """Test cases for ClientRateLimiter class."""
+
+    def test_token_bucket(self):
+        """Test each client gets its burst, then the sustained rate."""
+        limiter = ClientRateLimiter(rate=2, burst=2)
+        self.assertEqual(limiter.check("a", now=0), 0)
+        self.assertEqual(limiter.check("a", now=0), 0)
+        self.assertAlmostEqual(limiter.check("a", now=0), 0.5)
+        self.assertEqual(limiter.check("b", now=0), 0)
+        self.assertEqual(limiter.check("a", now=0.5), 0)
+
+    def test_bounded_clients(self):
+        """Test the least recently seen client is forgotten past the limit."""
+        limiter = ClientRateLimiter(rate=1, burst=1, max_clients=2)
+        limiter.check("a", now=0)
+        limiter.check("b", now=0)
+        limiter.check("c", now=0)
+        self.assertEqual(limiter.check("a", now=0), 0)  # Forgotten, so it starts with a full bucket
+
+class TestAdmissionController(unittest.TestCase):
+    """Test cases for AdmissionController class."""
+
+    def test_unlimited_by_default(self):
+        """Test every request is admitted when no limit is configured."""
+        admission = AdmissionController()
+        for _ in range(100):
+            self.assertIsNone(admission.admit("a"))
+            self.assertTrue(admission.acquire_backend("s1"))
+        self.assertEqual(admission.stats()['admitted'], 100)
+        self.assertIsNone(admission.stats()['global'])
+
+    def test_shed_reasons(self):
+        """Test shed requests report their reason and Retry-After."""
+        admission = AdmissionController(max_concurrency=1, queue_size=0, client_rate=1, client_burst=2,
+                                        retry_after=3)
+        self.assertIsNone(admission.admit("a"))
+        self.assertEqual(admission.admit("a"), ('queue_full', 3))
+        self.assertEqual(admission.admit("a"), ('rate_limited', 1))
+        admission.release()
+        self.assertIsNone(admission.admit("b"))
+        stats = admission.stats()
+        self.assertEqual(stats['shed']['queue_full'], 1)
+        self.assertEqual(stats['shed']['rate_limited'], 1)
+        self.assertEqual(stats['admitted'], 2)
+
+    def test_backend_limits(self):
+        """Test each backend has its own limit and removed backends are forgotten once idle."""
+        admission = AdmissionController(backend_max_concurrency=1, queue_size=0)
+        self.assertTrue(admission.acquire_backend("s1"))
+        self.assertFalse(admission.acquire_backend("s1"))
+        self.assertTrue(admission.acquire_backend("s2"))
+        admission.release_backend("s1")
+        self.assertTrue(admission.acquire_backend("s1"))
+        self.assertEqual(admission.stats()['shed']['backend_saturated'], 1)
+
+        admission.forget("s1")
+        admission.release_backend("s1")
+        self.assertEqual(sorted(admission.stats()['backends']), ["s2"])
+
+        # A backend removed and added back while a request holds its slot keeps its count
+        admission.forget("s2")
+        self.assertFalse(admission.acquire_backend("s2"))
+        admission.release_backend("s2")
+        self.assertEqual(admission.stats()['backends'], {})
+        self.assertTrue(admission.acquire_backend("s2"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+import sys
+import os
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import AioHTTPTestCase, TestServer
+
+# Add the load_balancer directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+from async_load_balancer import create_app, CONFIG, HEALTH_CHECKER, MEMBERSHIP_LOCK
+from consistent_hash import ConsistentHash
+from hedging import HedgePolicy
+
+
+class TestAsyncLoadBalancer(AioHTTPTestCase):
+
+    async def get_application(self):
+        # A local backend stands in for the server containers
+        backend = web.Application()
+        backend.router.add_get('/home', self.backend_home)
+        backend.router.add_post('/echo', self.backend_echo)
+        self.backend = TestServer(backend, host='127.0.0.1')
+        await self.backend.start_server()
+        # The same port on 127.0.0.3 answers slowly, standing in for a straggler
+        slow = web.Application()
+        slow.router.add_get('/home', self.backend_slow)
+        self.slow_backend = TestServer(slow, host='127.0.0.3', port=self.backend.port)
+        await self.slow_backend.start_server()
+        self.hash_ring = ConsistentHash(dense_table=True)
+        return create_app(self.hash_ring, backend_port=self.backend.port)
+
+    async def asyncTearDown(self):
+        await super().asyncTearDown()
+        await self.backend.close()
+        await self.slow_backend.close()
+
+    async def backend_home(self, request):
+        return web.json_response({"message": "Hello from backend", "status": "successful"})
+
+    async def backend_echo(self, request):
+        body = await request.read()
+        return web.Response(body=body, content_type='application/octet-stream',
+                            headers={'X-Backend': 'echo', 'X-Client': request.headers.get('X-Client', '')})
+
+    async def backend_slow(self, request):
+        await asyncio.sleep(2)
+        return web.json_response({"message": "Hello from slow backend", "status": "successful"})
+
+    async def test_add_and_remove_server(self):
+        resp = await self.client.post('/add', json={"n": 2, "hostnames": ["S1", "S2"]})
+        self.assertEqual(resp.status, 200)
+        self.assertEqual((await resp.json())["message"]["added"], ["S1", "S2"])
+
+        resp = await self.client.delete('/rm', json={"n": 1})
+        data = await resp.json()
+        self.assertEqual(data["message"]["removed"], ["S1"])
+        self.assertEqual(data["message"]["N"], 1)
+
+        resp = await self.client.delete('/rm', json={"hostnames": ["S2"]})
+        self.assertEqual((await resp.json())["message"], {"removed": ["S2"], "N": 0})
+
+    async def test_membership_lock(self):
+        # The health checker changes the ring from its own thread under the same lock
+        lock = self.app[MEMBERSHIP_LOCK]
+        self.assertIs(self.app[HEALTH_CHECKER].lock, lock)
+
+        lock.acquire()
+        try:
+            adding = asyncio.ensure_future(self.client.post('/add', json={"n": 1, "hostnames": ["S1"]}))
+            # The event loop keeps serving while /add waits for the lock
+            resp = await asyncio.wait_for(self.client.get('/rep'), 1)
+            self.assertEqual((await resp.json())["message"]["N"], 0)
+            self.assertFalse(adding.done())
+        finally:
+            lock.release()
+        resp = await adding
+        self.assertEqual((await resp.json())["message"]["added"], ["S1"])
+
+    async def test_get_replicas(self):
+        await self.client.post('/add', json={"n": 2, "hostnames": ["S1", "S2"]})
+        resp = await self.client.get('/rep')
+        data = await resp.json()
+        self.assertEqual(data["message"]["N"], 2)
+        self.assertEqual(data["message"]["replicas"], ["S1", "S2"])
+        self.assertEqual(data["message"]["version"], self.hash_ring.version)
+
+    async def test_home_without_servers(self):
+        resp = await self.client.get('/home?id=1')
+        self.assertEqual(resp.status, 503)
+
+    async def test_home_proxies_to_backend(self):
+        await self.client.post('/add', json={"n": 1, "hostnames": ["127.0.0.1"]})
+        resp = await self.client.get('/home?id=42')
+        self.assertEqual(resp.status, 200)
+        self.assertEqual((await resp.json())["message"], "Hello from backend")
+
+    async def test_home_unreachable_backend(self):
+        await self.client.post('/add', json={"n": 1, "hostnames": ["unreachable.invalid"]})
+        resp = await self.client.get('/home?id=42')
+        self.assertEqual(resp.status, 502)
+
+    async def test_weights(self):
+        await self.client.post('/add', json={"n": 1, "hostnames": ["S1"]})
+        resp = await self.client.put('/weight', json={"hostname": "S1", "weight": 2})
+        self.assertEqual((await resp.json())["message"]["virtual_nodes"], 18)
+        resp = await self.client.put('/weight', json={"hostname": "missing", "weight": 2})
+        self.assertEqual(resp.status, 404)
+
+    async def test_proxy_streams_any_path(self):
+        await self.client.post('/add', json={"n": 1, "hostnames": ["127.0.0.1"]})
+        payload = b"\x00binary payload\xff" * 10000
+        resp = await self.client.post('/echo?id=7', data=payload, headers={"X-Client": "test"})
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(resp.headers["X-Backend"], "echo")
+        self.assertEqual(resp.headers["X-Client"], "test")
+        self.assertEqual(await resp.read(), payload)
+
+    async def test_failover_to_next_replica(self):
+        # Nothing listens on 127.0.0.2, so connections to it are refused
+        await self.client.post('/add', json={"n": 2, "hostnames": ["127.0.0.2", "127.0.0.1"]})
+        request_id = next(rid for rid in range(1000) if self.hash_ring.get_server(rid) == "127.0.0.2")
+        resp = await self.client.get(f'/home?id={request_id}')
+        self.assertEqual(resp.status, 200)
+        self.assertEqual((await resp.json())["message"], "Hello from backend")
+
+        resp = await self.client.post(f'/echo?id={request_id}', data=b"payload")
+        self.assertEqual(resp.status, 502)
+
+    async def test_hedged_request(self):
+        policy = HedgePolicy('50')
+        self.app[CONFIG]['hedge_policy'] = policy
+        await self.client.post('/add', json={"n": 2, "hostnames": ["127.0.0.3", "127.0.0.1"]})
+        request_id = next(rid for rid in range(1000) if self.hash_ring.get_server(rid) == "127.0.0.3")
+        resp = await asyncio.wait_for(self.client.get(f'/home?id={request_id}'), 1)
+        self.assertEqual(resp.status, 200)
+        self.assertEqual((await resp.json())["message"], "Hello from backend")
+
+        self.assertEqual(policy.stats()["hedges"], 1)
+        self.assertEqual(policy.stats()["hedge_wins"], 1)
+
+    async def test_proxy_without_servers(self):
+        resp = await self.client.get('/missing')
+        self.assertEqual(resp.status, 503)
+        self.assertEqual((await resp.json())["status"], "failure")
+
+
+if __name__ == '__main__':
+    unittest.main()
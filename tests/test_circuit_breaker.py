@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Unit tests for per-backend circuit breakers.
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+from circuit_breaker import FAILURE_LATENCY_MS, CircuitBreaker, CircuitBreakers
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for CircuitBreaker class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.breaker = CircuitBreaker(failure_threshold=3, error_rate=0.5, window=10,
+                                      min_requests=6, open_seconds=10)
+
+    def test_opens_after_consecutive_failures(self):
+        """Test the breaker opens on the failure threshold and rejects requests."""
+        for _ in range(2):
+            self.breaker.record(False, 0.1, now=0)
+        self.assertEqual(self.breaker.state, 'closed')
+        self.breaker.record(False, 0.1, now=0)
+        self.assertEqual(self.breaker.state, 'open')
+        self.assertFalse(self.breaker.allow(now=5))
+        self.assertEqual(self.breaker.rejected, 1)
+
+    def test_opens_on_error_rate(self):
+        """Test alternating failures open the breaker once the window fills."""
+        for i in range(5):
+            self.breaker.record(i % 2 == 0, 0.1, now=0)
+        self.assertEqual(self.breaker.state, 'closed')
+        self.breaker.record(False, 0.1, now=0)
+        self.assertEqual(self.breaker.state, 'open')
+
+    def test_half_open_trial(self):
+        """Test a single trial after the cool-down closes or reopens the breaker."""
+        for _ in range(3):
+            self.breaker.record(False, 0.1, now=0)
+
+        self.assertTrue(self.breaker.allow(now=10))
+        self.assertEqual(self.breaker.state, 'half_open')
+        self.assertFalse(self.breaker.allow(now=10))  # Only one trial at a time
+        self.breaker.record(False, 0.1, now=11)
+        self.assertEqual(self.breaker.state, 'open')
+        self.assertFalse(self.breaker.allow(now=15))
+
+        self.assertTrue(self.breaker.allow(now=21))
+        self.breaker.record(True, 0.1, now=21)
+        self.assertEqual(self.breaker.state, 'closed')
+        self.assertTrue(self.breaker.allow(now=21))
+
+    def test_latency_ewma(self):
+        """Test latency is tracked as a moving average in milliseconds, with failures penalized."""
+        self.breaker.record(True, 0.100, now=0)
+        self.breaker.record(True, 0.200, now=0)
+        self.assertAlmostEqual(self.breaker.latency_ms, 120.0)
+
+        # A fast failure is penalized instead of lowering the average
+        self.breaker.record(False, 0.001, now=0)
+        self.assertAlmostEqual(self.breaker.latency_ms, 0.8 * 120.0 + 0.2 * FAILURE_LATENCY_MS)
+
+class TestCircuitBreakers(unittest.TestCase):
+    """Test cases for CircuitBreakers registry."""
+
+    def test_registry(self):
+        """Test per-host breakers, open host tracking, stats and forget."""
+        breakers = CircuitBreakers(failure_threshold=2)
+        self.assertTrue(breakers.allow("s1"))
+        breakers.record("s1", True, 0.01)
+        breakers.record("s2", False, 0.5)
+        breakers.record("s2", False, 0.5)
+
+        self.assertEqual(breakers.open_hosts(), {"s2"})
+        self.assertFalse(breakers.allow("s2"))
+        stats = breakers.stats()
+        self.assertEqual(stats["s1"]["state"], "closed")
+        self.assertEqual(stats["s2"]["failures"], 2)
+        self.assertEqual(stats["s2"]["rejected"], 1)
+        self.assertEqual(breakers.latencies(), {"s1": 10.0, "s2": FAILURE_LATENCY_MS})
+
+        breakers.forget("s2")
+        self.assertEqual(breakers.state("s2"), "closed")
+        self.assertEqual(breakers.open_hosts(), set())
+
+if __name__ == '__main__':
+    unittest.main()
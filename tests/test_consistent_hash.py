@@ -4,6 +4,7 @@ Unit tests for consistent hashing implementation.
 Derrick Koros
 """
 
+import math
 import unittest
 import sys
 import os
@@ -118,5 +119,274 @@ class TestConsistentHash(unittest.TestCase):
         self.assertTrue(is_valid)
         self.assertEqual(len(issues), 0)
 
+    def test_sorted_position_index(self):
+        """Test the sorted position index tracks ring occupancy."""
+        self.hash_ring.add_server(1, "server1")
+        self.hash_ring.add_server(2, "server2")
+        occupied = [pos for pos, sid in enumerate(self.hash_ring.ring) if sid is not None]
+        self.assertEqual(list(self.hash_ring.positions), occupied)
+        
+        self.hash_ring.remove_server(1)
+        occupied = [pos for pos, sid in enumerate(self.hash_ring.ring) if sid is not None]
+        self.assertEqual(list(self.hash_ring.positions), occupied)
+    
+    def test_binary_search_matches_clockwise_scan(self):
+        """Test bisect lookups agree with a slot-by-slot clockwise walk."""
+        for i in range(1, 6):
+            self.hash_ring.add_server(i, f"server{i}")
+        
+        for request_id in range(2000):
+            start = self.hash_ring.hash_request(request_id)
+            for step in range(self.hash_ring.slots):
+                sid = self.hash_ring.ring[(start + step) % self.hash_ring.slots]
+                if sid is not None:
+                    break
+            expected = self.hash_ring.servers[sid]['hostname']
+            self.assertEqual(self.hash_ring.get_server(request_id), expected)
+    
+    def test_dense_table_matches_binary_search(self):
+        """Test dense owner table lookups agree with bisect lookups."""
+        dense_ring = ConsistentHash(slots=512, virtual_servers=9, dense_table=True)
+        for i in range(1, 6):
+            self.hash_ring.add_server(i, f"server{i}")
+            dense_ring.add_server(i, f"server{i}")
+        self.hash_ring.remove_server(3)
+        dense_ring.remove_server(3)
+        
+        for request_id in range(2000):
+            self.assertEqual(dense_ring.get_server(request_id), self.hash_ring.get_server(request_id))
+        
+        is_valid, issues = dense_ring.validate_ring_integrity()
+        self.assertTrue(is_valid, issues)
+        
+        for i in (1, 2, 4, 5):
+            dense_ring.remove_server(i)
+        self.assertEqual(dense_ring.owner_table, (None,) * 512)
+    
+    def test_get_servers_batch(self):
+        """Test batch routing matches per-request routing."""
+        dense_ring = ConsistentHash(slots=512, virtual_servers=9, dense_table=True)
+        for i in range(1, 5):
+            self.hash_ring.add_server(i, f"server{i}")
+            dense_ring.add_server(i, f"server{i}")
+        
+        request_ids = list(range(-50, 3000)) + [10**12 + 7]
+        expected = [self.hash_ring.get_server(rid) for rid in request_ids]
+        self.assertEqual(self.hash_ring.get_servers_batch(request_ids).tolist(), expected)
+        self.assertEqual(dense_ring.get_servers_batch(request_ids).tolist(), expected)
+        
+        empty_ring = ConsistentHash()
+        self.assertEqual(empty_ring.get_servers_batch([1, 2]).tolist(), [None, None])
+        
+        # Keys past 64 bits are reduced modulo the slots, as the scalar path does
+        wide_ring = ConsistentHash(slots=500, virtual_servers=9)
+        for i in range(1, 6):
+            wide_ring.add_server(i, f"S{i}")
+        request_ids = [2**64 + 5, 5, -(2**64) - 1, 10**30]
+        expected = [wide_ring.get_server(rid) for rid in request_ids]
+        self.assertEqual(wide_ring.get_servers_batch(request_ids).tolist(), expected)
+    
+    def test_free_slot_bitmap_matches_linear_probe(self):
+        """Test bitmap probing picks the same slot as a linear scan."""
+        small_ring = ConsistentHash(slots=16, virtual_servers=4)
+        small_ring.add_server(1, "server1")
+        small_ring.add_server(2, "server2")
+        
+        for start in range(small_ring.slots):
+            expected = next(
+                (start + i) % small_ring.slots
+                for i in range(small_ring.slots)
+                if small_ring.ring[(start + i) % small_ring.slots] is None
+            )
+            self.assertEqual(small_ring._find_next_available_slot(start), expected)
+        
+        # Filling the ring leaves nothing to probe
+        small_ring.add_server(3, "server3")
+        small_ring.add_server(4, "server4")
+        self.assertIsNone(small_ring._find_next_available_slot(0))
+        self.assertFalse(small_ring.add_server(5, "server5"))
+        self.assertTrue(small_ring.validate_ring_integrity()[0])
+    
+    def test_bulk_add_and_remove_servers(self):
+        """Test bulk updates apply atomically."""
+        success = self.hash_ring.add_servers([(1, "server1"), (2, "server2"), (3, "server3")])
+        self.assertTrue(success)
+        self.assertEqual(self.hash_ring.get_server_count(), 3)
+        
+        single_ring = ConsistentHash(slots=512, virtual_servers=9)
+        for i in range(1, 4):
+            single_ring.add_server(i, f"server{i}")
+        self.assertEqual(self.hash_ring.ring, single_ring.ring)
+        
+        success = self.hash_ring.remove_servers([1, 3])
+        self.assertTrue(success)
+        self.assertEqual(self.hash_ring.get_servers_list(), ["server2"])
+        self.assertTrue(self.hash_ring.validate_ring_integrity()[0])
+    
+    def test_bulk_updates_are_all_or_nothing(self):
+        """Test a failing bulk update leaves the ring untouched."""
+        self.hash_ring.add_server(1, "server1")
+        ring_before = self.hash_ring.ring
+        
+        # Duplicate server ID aborts the whole batch
+        self.assertFalse(self.hash_ring.add_servers([(2, "server2"), (1, "dup")]))
+        self.assertEqual(self.hash_ring.ring, ring_before)
+        self.assertEqual(self.hash_ring.get_server_count(), 1)
+        
+        # Ring overflow aborts the whole batch
+        small_ring = ConsistentHash(slots=16, virtual_servers=4)
+        self.assertFalse(small_ring.add_servers([(i, f"server{i}") for i in range(1, 6)]))
+        self.assertEqual(small_ring.get_server_count(), 0)
+        self.assertEqual(small_ring.free_mask, (1 << 16) - 1)
+        
+        # Unknown server ID aborts the whole removal
+        self.assertFalse(self.hash_ring.remove_servers([1, 999]))
+        self.assertEqual(self.hash_ring.get_servers_list(), ["server1"])
+    
+    def test_snapshots_are_immutable_and_versioned(self):
+        """Test writers publish new snapshots instead of mutating old ones."""
+        initial = self.hash_ring.snapshot
+        self.assertEqual(initial.version, 0)
+        
+        self.hash_ring.add_server(1, "server1")
+        after_add = self.hash_ring.snapshot
+        self.assertEqual(after_add.version, 1)
+        self.assertEqual(len(initial.servers), 0)
+        self.assertEqual(initial.ring, (None,) * 512)
+        
+        self.hash_ring.add_servers([(2, "server2"), (3, "server3")])
+        self.assertEqual(self.hash_ring.version, 2)
+        self.hash_ring.remove_server(2)
+        self.assertEqual(self.hash_ring.version, 3)
+        self.assertEqual(after_add.hostnames(), ["server1"])
+        
+        # Failed updates do not publish a new version
+        self.assertFalse(self.hash_ring.add_server(1, "dup"))
+        self.assertEqual(self.hash_ring.version, 3)
+        
+        with self.assertRaises(TypeError):
+            after_add.ring[0] = 99
+        with self.assertRaises(TypeError):
+            after_add.servers[7] = {}
+    
+    def test_hash_families(self):
+        """Test alternative hash families and string keys."""
+        from hash_functions import HASH_FAMILIES
+        
+        for name in HASH_FAMILIES:
+            ring = ConsistentHash(slots=512, virtual_servers=9, hash_family=name)
+            for i in range(1, 4):
+                ring.add_server(i, f"server{i}")
+            self.assertTrue(ring.validate_ring_integrity()[0])
+            
+            request_ids = list(range(-100, 2000)) + ["user-42", "session-abc", 2**63 - 1,
+                                                     2**64 + 5, -(2**70) - 3]
+            positions = [ring.hash_request(rid) for rid in request_ids]
+            self.assertTrue(all(0 <= pos < 512 for pos in positions))
+            self.assertEqual(ring.hash_request("user-42"), ring.hash_request("user-42"))
+            
+            expected = [ring.get_server(rid) for rid in request_ids]
+            self.assertEqual(ring.get_servers_batch(request_ids).tolist(), expected, name)
+        
+        with self.assertRaises(ValueError):
+            ConsistentHash(hash_family="md5")
+    
+    def test_mixer_families_spread_sequential_ids(self):
+        """Test sequential IDs cover the ring with the mixer families."""
+        for name in ("knuth", "splitmix64", "murmur3"):
+            ring = ConsistentHash(slots=512, virtual_servers=9, hash_family=name)
+            distinct = {ring.hash_request(rid) for rid in range(1000)}
+            self.assertGreater(len(distinct), 400, name)
+        
+        # The polynomial only reaches a fraction of the slots
+        distinct = {self.hash_ring.hash_request(rid) for rid in range(1000)}
+        self.assertLess(len(distinct), 200)
+    
+    def test_weighted_virtual_nodes(self):
+        """Test weights scale the virtual server count."""
+        self.hash_ring.add_server(1, "small", weight=0.5)
+        self.hash_ring.add_servers([(2, "default"), (3, "large", 2.0)])
+        
+        status = self.hash_ring.get_ring_status()['servers']
+        self.assertEqual(status[1]['virtual_nodes'], 4)
+        self.assertEqual(status[2]['virtual_nodes'], 9)
+        self.assertEqual(status[3]['virtual_nodes'], 18)
+        self.assertEqual(status[3]['weight'], 2.0)
+        self.assertFalse(self.hash_ring.add_server(4, "broken", weight=0))
+    
+    def test_set_server_weight(self):
+        """Test weights change in place without moving other replicas."""
+        self.hash_ring.add_servers([(1, "server1"), (2, "server2")])
+        original = list(self.hash_ring.servers[1]['virtual_positions'])
+        
+        self.assertTrue(self.hash_ring.set_server_weight(1, 2.0))
+        grown = self.hash_ring.servers[1]['virtual_positions']
+        self.assertEqual(len(grown), 18)
+        self.assertEqual(list(grown[:9]), original)
+        
+        self.assertTrue(self.hash_ring.set_server_weight(1, 1 / 3))
+        self.assertEqual(list(self.hash_ring.servers[1]['virtual_positions']), original[:3])
+        self.assertEqual(self.hash_ring.servers[1]['weight'], 1 / 3)
+        self.assertTrue(self.hash_ring.validate_ring_integrity()[0])
+        
+        self.assertFalse(self.hash_ring.set_server_weight(999, 2.0))
+        self.assertFalse(self.hash_ring.set_server_weight(1, -1))
+    
+    def test_get_server_bounded(self):
+        """Test bounded-load lookups spill over from overloaded servers."""
+        for i in range(1, 4):
+            self.hash_ring.add_server(i, f"server{i}")
+        
+        # With no load the bounded lookup matches plain routing
+        for request_id in range(200):
+            self.assertEqual(
+                self.hash_ring.get_server_bounded(request_id, {}, 0.25),
+                self.hash_ring.get_server(request_id)
+            )
+        
+        # A saturated owner is skipped for the next server clockwise
+        owner = self.hash_ring.get_server(7)
+        loads = {owner: 10}
+        chosen = self.hash_ring.get_server_bounded(7, loads, 0.25)
+        self.assertNotEqual(chosen, owner)
+        self.assertIn(chosen, self.hash_ring.get_servers_list())
+        
+        # Simulated routing never exceeds the bound
+        loads = {}
+        for request_id in range(1000, 1300):
+            hostname = self.hash_ring.get_server_bounded(request_id, loads, 0.25)
+            loads[hostname] = loads.get(hostname, 0) + 1
+            self.assertLessEqual(max(loads.values()), math.ceil(1.25 * sum(loads.values()) / 3))
+        
+        self.assertIsNone(ConsistentHash().get_server_bounded(1, {}, 0.25))
+    
+    def test_get_preference_list(self):
+        """Test preference lists are distinct and follow clockwise failover."""
+        for i in range(1, 5):
+            self.hash_ring.add_server(i, f"server{i}")
+        
+        for request_id in range(200):
+            preference = self.hash_ring.get_preference_list(request_id, 3)
+            self.assertEqual(len(set(preference)), 3)
+            self.assertEqual(preference[0], self.hash_ring.get_server(request_id))
+        self.assertEqual(len(self.hash_ring.get_preference_list(7, 10)), 4)
+        self.assertEqual(self.hash_ring.get_preference_list(7, 0), [])
+        self.assertEqual(ConsistentHash().get_preference_list(7, 3), [])
+        
+        # The second choice is where the request goes once the first is removed
+        preference = self.hash_ring.get_preference_list(7, 2)
+        server_id = next(sid for sid, info in self.hash_ring.servers.items()
+                         if info['hostname'] == preference[0])
+        self.hash_ring.remove_server(server_id)
+        self.assertEqual(self.hash_ring.get_server(7), preference[1])
+    
+    def test_clear(self):
+        """Test clearing the ring removes all servers."""
+        self.hash_ring.add_server(1, "server1")
+        self.hash_ring.clear()
+        self.assertEqual(self.hash_ring.get_server_count(), 0)
+        self.assertEqual(self.hash_ring.positions, ())
+        self.assertIsNone(self.hash_ring.get_server(42))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
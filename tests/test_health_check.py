@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Unit tests for active health checking.
+"""
+
+import unittest
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+from consistent_hash import ConsistentHash
+from health_check import HealthChecker
+from routing_engines import create_routing_engine
+
+class ScriptedHealthChecker(HealthChecker):
+    """Health checker whose probe results are set by the test."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.down = set()
+
+    def probe(self, hostname):
+        return hostname not in self.down
+
+class HeartbeatHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200 if self.path == '/heartbeat' else 404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+class TestHealthChecker(unittest.TestCase):
+    """Test cases for HealthChecker class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.ring = ConsistentHash()
+        self.ring.add_servers([(1, "s1"), (2, "s2", 2.0), (3, "s3")])
+        self.changes = []
+        self.checker = ScriptedHealthChecker(
+            self.ring, rise=2, fall=3,
+            on_change=lambda hostname, healthy: self.changes.append((hostname, healthy))
+        )
+
+    def test_ejection_after_fall_threshold(self):
+        """Test a host is ejected only after `fall` consecutive failures."""
+        self.checker.down.add("s2")
+        self.checker.check_once()
+        self.checker.check_once()
+        self.assertIn("s2", self.ring.get_servers_list())
+
+        self.checker.check_once()
+        self.assertNotIn("s2", self.ring.get_servers_list())
+        self.assertFalse(self.checker.status()["s2"]["healthy"])
+        self.assertEqual(self.changes, [("s2", False)])
+
+    def test_restore_after_rise_threshold(self):
+        """Test an ejected host returns with its ID, weight and ring positions."""
+        positions = list(self.ring.servers[2]['virtual_positions'])
+        self.checker.down.add("s2")
+        for _ in range(3):
+            self.checker.check_once()
+
+        self.checker.down.clear()
+        self.checker.check_once()
+        self.assertNotIn("s2", self.ring.get_servers_list())
+        self.checker.check_once()
+
+        self.assertEqual(self.ring.servers[2]['hostname'], "s2")
+        self.assertEqual(self.ring.servers[2]['weight'], 2.0)
+        self.assertEqual(list(self.ring.servers[2]['virtual_positions']), positions)
+        self.assertEqual(self.changes, [("s2", False), ("s2", True)])
+
+    def test_flapping_resets_counters(self):
+        """Test a success between failures resets the failure count."""
+        for down in (True, True, False, True, True):
+            self.checker.down = {"s1"} if down else set()
+            self.checker.check_once()
+        self.assertIn("s1", self.ring.get_servers_list())
+        self.assertEqual(self.checker.status()["s1"]["failures"], 2)
+
+    def test_forget(self):
+        """Test forgotten and removed hosts are no longer tracked or restored."""
+        self.checker.down.add("s3")
+        for _ in range(3):
+            self.checker.check_once()
+        self.assertTrue(self.checker.forget("s3"))
+        self.checker.down.clear()
+        for _ in range(3):
+            self.checker.check_once()
+        self.assertNotIn("s3", self.ring.get_servers_list())
+
+        self.ring.remove_server(1)
+        self.checker.check_once()
+        self.assertNotIn("s1", self.checker.status())
+        self.assertFalse(self.checker.forget("s2"))  # A ring member, not ejected
+
+    def test_last_server_is_kept(self):
+        """Test the checker never ejects the last server in the ring."""
+        self.checker.down = {"s1", "s2", "s3"}
+        for _ in range(5):
+            self.checker.check_once()
+        self.assertEqual(len(self.ring.get_servers_list()), 1)
+        self.assertEqual(len(self.changes), 2)
+
+    def test_other_engines(self):
+        """Test ejection and restore work with engines without weights."""
+        engine = create_routing_engine('rendezvous')
+        engine.add_servers([(1, "s1"), (2, "s2")])
+        checker = ScriptedHealthChecker(engine, rise=1, fall=1)
+        checker.down.add("s1")
+        checker.check_once()
+        self.assertEqual(engine.get_servers_list(), ["s2"])
+        checker.down.clear()
+        checker.check_once()
+        self.assertEqual(sorted(engine.get_servers_list()), ["s1", "s2"])
+
+    def test_probe_and_background_thread(self):
+        """Test real /heartbeat probes and that the thread starts and stops."""
+        server = ThreadingHTTPServer(('127.0.0.1', 0), HeartbeatHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            checker = HealthChecker(ConsistentHash(), port=server.server_address[1],
+                                    interval=0.01, timeout=0.5)
+            self.assertTrue(checker.probe('127.0.0.1'))
+            checker.path = '/missing'
+            self.assertFalse(checker.probe('127.0.0.1'))
+            checker.port = 1
+            self.assertFalse(checker.probe('127.0.0.1'))
+
+            checker.start()
+            checker.stop()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == '__main__':
+    unittest.main()
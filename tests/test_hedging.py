@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Unit tests for hedged requests.
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+from hedging import HedgePolicy, run_hedged, run_hedged_async
+
+class TestHedgePolicy(unittest.TestCase):
+    """Test cases for HedgePolicy class."""
+
+    def test_fixed_delay(self):
+        """Test a numeric delay is read as milliseconds."""
+        self.assertAlmostEqual(HedgePolicy('25').delay(), 0.025)
+
+    def test_p95_delay(self):
+        """Test the p95 delay falls back until enough latencies are seen."""
+        policy = HedgePolicy(min_samples=20, fallback_delay=0.05)
+        self.assertEqual(policy.delay(), 0.05)
+        for i in range(1, 101):
+            policy.record_latency(i / 1000)
+        self.assertAlmostEqual(policy.delay(), 0.096)
+
+    def test_budget(self):
+        """Test hedges are capped by the burst and refilled per request."""
+        policy = HedgePolicy('10', budget=0.5, burst=2)
+        self.assertTrue(policy.try_hedge())
+        self.assertTrue(policy.try_hedge())
+        self.assertFalse(policy.try_hedge())
+        policy.on_request()
+        self.assertFalse(policy.try_hedge())
+        policy.on_request()
+        self.assertTrue(policy.try_hedge())
+        self.assertEqual(policy.stats()['budget_exhausted'], 2)
+
+class TestRunHedged(unittest.TestCase):
+    """Test cases for run_hedged helpers."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.policy = HedgePolicy('20')
+        self.discarded = []
+        self.cancelled = []
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def run_hedged(self, primary, hedge):
+        return run_hedged(self.policy, self.executor, primary, hedge,
+                          discard=self.discarded.append, cancel=self.cancelled.append)
+
+    def test_fast_primary_is_not_hedged(self):
+        """Test no hedge is sent when the primary answers within the delay."""
+        result = self.run_hedged(lambda: "primary", lambda: self.fail("hedged"))
+        self.assertEqual(result, ("primary", 0))
+        self.assertEqual(self.policy.stats()['hedges'], 0)
+
+    def test_slow_primary_loses_to_hedge(self):
+        """Test the hedge wins over a slow primary, which is cancelled and discarded."""
+        release = threading.Event()
+
+        def slow_primary():
+            release.wait(5)
+            return "primary"
+
+        result = self.run_hedged(slow_primary, lambda: "hedge")
+        self.assertEqual(result, ("hedge", 1))
+        self.assertEqual(self.cancelled, [0])
+        release.set()
+        self.executor.shutdown()
+        self.assertEqual(self.discarded, ["primary"])
+        self.assertEqual(self.policy.stats()['hedge_wins'], 1)
+
+    def test_failed_hedge_waits_for_primary(self):
+        """Test a failing hedge falls back to the primary's answer."""
+        release = threading.Event()
+
+        def slow_primary():
+            release.wait(0.2)
+            return "primary"
+
+        def failing_hedge():
+            raise ConnectionError("down")
+
+        self.assertEqual(self.run_hedged(slow_primary, failing_hedge), ("primary", 0))
+
+    def test_all_attempts_fail(self):
+        """Test the error is raised when every attempt fails."""
+        def failing():
+            raise ConnectionError("down")
+
+        with self.assertRaises(ConnectionError):
+            self.run_hedged(failing, failing)
+
+    def test_async_hedge(self):
+        """Test the asyncio variant cancels the slow primary's task."""
+        async def scenario():
+            primary_cancelled = asyncio.Event()
+
+            async def slow_primary():
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    primary_cancelled.set()
+                    raise
+                return "primary"
+
+            async def hedge():
+                return "hedge"
+
+            result = await run_hedged_async(self.policy, slow_primary, hedge, self.discarded.append)
+            await asyncio.wait_for(primary_cancelled.wait(), 1)
+            return result
+
+        self.assertEqual(asyncio.run(scenario()), ("hedge", 1))
+
+if __name__ == '__main__':
+    unittest.main()
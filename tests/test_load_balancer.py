@@ -1,14 +1,114 @@
 import unittest
-from load_balancer.load_balancer import app, hash_ring
+import sys
+import os
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path for imports; load_balancer.py is imported as a
+# flat module like the others, so this works whichever test file runs first
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+import load_balancer
+from load_balancer import app, hash_ring, upstream_pool, circuit_breakers, health_checker
+from hedging import HedgePolicy
+from response_cache import ResponseCache
+from single_flight import SingleFlight
+from request_keys import KeyExtractor
+from admission import AdmissionController
+from routing_policies import RoutePolicies
+from request_timing import SlowRequestLog
+from profiling import Profiler
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """Local backend that echoes the request back as plain text."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.headers.get('If-None-Match'):
+            self.send_response(304)
+            self.send_header('ETag', self.headers['If-None-Match'])
+            self.end_headers()
+            return
+        reply = f"{self.command} {self.path} {self.headers.get('X-Client', '')}\n".encode() + body
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(reply)))
+        self.send_header('X-Backend', 'echo')
+        self.send_header('X-Served-By', self.server.server_address[0])
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(reply)
+
+    do_GET = do_HEAD = do_PUT = do_POST
+
+    def log_message(self, format, *args):
+        pass
+
+class SlowHandler(EchoHandler):
+    """Backend that answers after a second."""
+
+    def do_PUT(self):
+        time.sleep(1)
+        super().do_PUT()
+
+class CountingHandler(EchoHandler):
+    """Backend that counts GETs and answers them after a short delay."""
+
+    gets = 0
+
+    def do_GET(self):
+        CountingHandler.gets += 1
+        time.sleep(0.3)
+        super().do_GET()
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # The load balancer hangs up on cancelled hedges
+
+# Module globals that tests replace; setUp saves them and tearDown puts them back
+SWAPPED_GLOBALS = ('hedge_policy', 'hedge_executor', 'response_cache', 'single_flight', 'key_extractor',
+                   'admission', 'route_policies', 'slow_request_log', 'admin_token', 'profiler')
 
 class TestLoadBalancer(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        cls.backend = ThreadingHTTPServer(('127.0.0.1', 0), EchoHandler)
+        cls.backend.daemon_threads = True
+        threading.Thread(target=cls.backend.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.backend.shutdown()
+        cls.backend.server_close()
+
     def setUp(self):
         self.client = app.test_client()
         self.client.testing = True
         # Reset hash ring for each test
-        hash_ring.servers.clear()
-        hash_ring.ring = [None] * hash_ring.slots
+        hash_ring.clear()
+        upstream_pool.clear()
+        circuit_breakers.clear()
+        # Every backend in these tests listens on the local echo server's port
+        self.original_port = upstream_pool.port
+        upstream_pool.port = self.backend.server_address[1]
+        self.original_globals = {name: getattr(load_balancer, name) for name in SWAPPED_GLOBALS}
+
+    def start_backend(self, host, handler):
+        # Extra backends share the echo server's port on another loopback address
+        server = QuietServer((host, self.backend.server_address[1]), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
 
     def test_add_server(self):
         response = self.client.post('/add', json={"n": 1, "hostnames": ["TestServer"]})
@@ -21,6 +121,25 @@ class TestLoadBalancer(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn("TestServer", response.json["message"]["removed"])
 
+    def test_remove_ejected_server(self):
+        self.addCleanup(setattr, health_checker, 'port', health_checker.port)
+        self.addCleanup(health_checker.clear)
+        health_checker.port = self.backend.server_address[1]
+        # Nothing listens on 127.0.0.9 yet, so its probes fail and it is ejected
+        self.client.post('/add', json={"n": 2, "hostnames": ["127.0.0.1", "127.0.0.9"]})
+        for _ in range(health_checker.fall):
+            health_checker.check_once()
+        self.assertEqual(hash_ring.get_servers_list(), ["127.0.0.1"])
+
+        response = self.client.delete('/rm', json={"hostnames": ["127.0.0.9"]})
+        self.assertEqual(response.json["message"], {"removed": ["127.0.0.9"], "N": 1})
+
+        # A removed server is not restored once it recovers
+        self.start_backend('127.0.0.9', EchoHandler)
+        for _ in range(health_checker.rise):
+            health_checker.check_once()
+        self.assertEqual(hash_ring.get_servers_list(), ["127.0.0.1"])
+
     def test_get_replicas(self):
         self.client.post('/add', json={"n": 2, "hostnames": ["S1", "S2"]})
         response = self.client.get('/rep')
@@ -28,13 +147,347 @@ class TestLoadBalancer(unittest.TestCase):
         self.assertEqual(response.json["message"]["N"], 2)
         self.assertIn("S1", response.json["message"]["replicas"])
         self.assertIn("S2", response.json["message"]["replicas"])
+        self.assertEqual(response.json["message"]["version"], hash_ring.version)
+
+    def test_bulk_add_and_remove(self):
+        response = self.client.post('/add', json={"n": 3, "hostnames": ["S1", "S2"]})
+        self.assertEqual(response.json["message"]["added"][:2], ["S1", "S2"])
+        self.assertTrue(response.json["message"]["added"][2].startswith("Server"))
+        self.assertEqual(response.json["message"]["N"], 3)
+        response = self.client.delete('/rm', json={"n": 2})
+        self.assertEqual(response.json["message"]["removed"], ["S1", "S2"])
+        self.assertEqual(response.json["message"]["N"], 1)
+
+    def test_weights(self):
+        response = self.client.post('/add', json={"n": 2, "hostnames": ["S1", "S2"], "weights": [2, 1]})
+        self.assertEqual(response.status_code, 200)
+        status = hash_ring.get_ring_status()['servers']
+        self.assertEqual(sorted(info['virtual_nodes'] for info in status.values()), [9, 18])
+
+        response = self.client.put('/weight', json={"hostname": "S2", "weight": 0.5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["message"]["virtual_nodes"], 4)
+
+        response = self.client.put('/weight', json={"hostname": "missing", "weight": 1})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post('/add', json={"n": 1, "weights": [-1]})
+        self.assertEqual(response.status_code, 400)
 
     def test_home_no_servers(self):
         response = self.client.get('/home?id=123')
         self.assertEqual(response.status_code, 503)
 
+    def test_upstream_pools_follow_membership(self):
+        self.client.post('/add', json={"n": 2, "hostnames": ["S1", "S2"]})
+        response = self.client.get('/stats')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.json["message"]["upstream_pool"]["backends"]), ["S1", "S2"])
+        self.client.delete('/rm', json={"n": 1})
+        response = self.client.get('/stats')
+        self.assertEqual(list(response.json["message"]["upstream_pool"]["backends"]), ["S2"])
+
+    def test_proxy_streams_any_path(self):
+        self.client.post('/add', json={"n": 1, "hostnames": ["127.0.0.1"]})
+        payload = b"\x00binary payload\xff" * 1000
+        response = self.client.put('/files/upload?id=7', data=payload,
+                                   headers={"X-Client": "test", "Connection": "close"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-Backend"], "echo")
+        self.assertEqual(response.data, b"PUT /files/upload?id=7 test\n" + payload)
+
+    def test_bodiless_responses_release_backend(self):
+        # WSGI servers never iterate the body of HEAD, 204 and 304 responses
+        self.client.post('/add', json={"n": 1, "hostnames": ["127.0.0.1"]})
+        for _ in range(3):
+            with self.client.head('/home?id=1') as response:
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data, b"")
+            with self.client.get('/home?id=1', headers={"If-None-Match": '"v1"'}) as response:
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.headers["ETag"], '"v1"')
+        self.assertEqual(load_balancer.load_tracker.snapshot(), {})
+        # The connection went back to the pool each time
+        pool = upstream_pool.stats()["backends"]["127.0.0.1"]
+        self.assertEqual((pool["misses"], pool["hits"]), (1, 5))
+
+    def test_failover_to_next_replica(self):
+        # Nothing listens on 127.0.0.2, so connections to it are refused
+        self.client.post('/add', json={"n": 2, "hostnames": ["127.0.0.2", "127.0.0.1"]})
+        request_id = next(rid for rid in range(1000) if hash_ring.get_server(rid) == "127.0.0.2")
+        response = self.client.put(f'/retry?id={request_id}', data=b"payload")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, f"PUT /retry?id={request_id} \n".encode() + b"payload")
+
+        # Non-idempotent requests are never sent twice
+        response = self.client.post(f'/retry?id={request_id}', data=b"payload")
+        self.assertEqual(response.status_code, 502)
+
+    def test_open_circuit_is_skipped(self):
+        self.client.post('/add', json={"n": 2, "hostnames": ["127.0.0.2", "127.0.0.1"]})
+        request_id = next(rid for rid in range(1000) if hash_ring.get_server(rid) == "127.0.0.2")
+        for _ in range(circuit_breakers.failure_threshold):
+            self.client.post(f'/retry?id={request_id}', data=b"payload")
+        self.assertEqual(circuit_breakers.state("127.0.0.2"), "open")
+
+        # The open host is skipped even for requests that are never retried
+        response = self.client.post(f'/retry?id={request_id}', data=b"payload")
+        self.assertEqual(response.status_code, 200)
+        stats = self.client.get('/stats').json["message"]["circuit_breakers"]
+        self.assertEqual(stats["127.0.0.2"]["rejected"], 1)
+
+    def test_hedged_request(self):
+        self.start_backend('127.0.0.3', SlowHandler)
+        load_balancer.hedge_policy = HedgePolicy('50')
+        load_balancer.hedge_executor = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(load_balancer.hedge_executor.shutdown)
+        self.client.post('/add', json={"n": 2, "hostnames": ["127.0.0.3", "127.0.0.1"]})
+        request_id = next(rid for rid in range(1000) if hash_ring.get_server(rid) == "127.0.0.3")
+        started = time.monotonic()
+        response = self.client.put(f'/hedge?id={request_id}', data=b"payload")
+        self.assertLess(time.monotonic() - started, 0.9)
+        self.assertEqual(response.data, f"PUT /hedge?id={request_id} \n".encode() + b"payload")
+        hedging = self.client.get('/stats').json["message"]["hedging"]
+        self.assertEqual((hedging["hedges"], hedging["hedge_wins"]), (1, 1))
+        # The cancelled primary is not held against the slow backend
+        self.assertEqual(circuit_breakers.stats()["127.0.0.3"]["failures"], 0)
+
+    def test_response_cache(self):
+        load_balancer.response_cache = ResponseCache({'/cached': 60})
+        self.client.post('/add', json={"n": 1, "hostnames": ["127.0.0.1"]})
+        # The body is stored once it has been streamed to the client
+        first = self.client.get('/cached?id=3')
+        self.assertEqual(first.headers["X-Cache"], "MISS")
+        self.assertEqual(first.data, b"GET /cached?id=3 \n")
+        second = self.client.get('/cached?id=3')
+        self.assertEqual(second.headers["X-Cache"], "HIT")
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second.headers["X-Backend"], "echo")
+
+        # Other routes and requests that refuse cached answers go upstream
+        self.assertNotIn("X-Cache", self.client.get('/other?id=3').headers)
+        self.assertNotIn("X-Cache", self.client.get('/cached?id=3', headers={"Cache-Control": "no-cache"}).headers)
+
+        # Keys taken over by a new server are invalidated, the rest stay cached
+        for request_id in range(100):
+            self.client.get(f'/cached?id={request_id}').data
+        self.client.post('/add', json={"n": 1, "hostnames": ["127.0.0.2"]})
+        moved = [rid for rid in range(100) if hash_ring.get_server(rid) != "127.0.0.1"]
+        self.assertTrue(moved)
+        stats = self.client.get('/stats').json["message"]["response_cache"]
+        self.assertEqual(stats["entries"], 100 - len(moved))
+        self.assertEqual(stats["invalidations"], len(moved))
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 100))
+
+        # The whole query string is part of the key
+        response = self.client.get('/cached?id=3&q=b')
+        self.assertEqual((response.headers["X-Cache"], response.data), ("MISS", b"GET /cached?id=3&q=b \n"))
+
+        # Credentials are never answered from the cache, and private responses are not stored
+        kept = next(rid for rid in range(100) if rid not in moved)
+        self.assertEqual(self.client.get(f'/cached?id={kept}').headers["X-Cache"], "HIT")
+        response = self.client.get(f'/cached?id={kept}', headers={"Authorization": "Bearer alice"})
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        response.data
+        cookie_client = app.test_client()
+        cookie_client.set_cookie('session', 'alice')
+        self.assertNotIn("X-Cache", cookie_client.get(f'/cached?id={kept}').headers)
+        self.client.get('/cached?id=4&q=a', headers={"Authorization": "Bearer alice"}).data
+        for headers in ({}, {"Authorization": "Bearer bob"}):
+            response = self.client.get('/cached?id=4&q=a', headers=headers)
+            self.assertEqual(response.headers["X-Cache"], "MISS")
+            response.data
+
+    def test_coalesced_requests(self):
+        self.start_backend('127.0.0.4', CountingHandler)
+        load_balancer.single_flight = SingleFlight(max_waiters=10, timeout=5)
+        CountingHandler.gets = 0
+        self.client.post('/add', json={"n": 1, "hostnames": ["127.0.0.4"]})
+
+        def fetch(_):
+            return app.test_client().get('/herd?id=5').data
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            bodies = list(executor.map(fetch, range(5)))
+        self.assertEqual(bodies, [b"GET /herd?id=5 \n"] * 5)
+        self.assertEqual(CountingHandler.gets, 1)
+        stats = self.client.get('/stats').json["message"]["coalescing"]
+        self.assertEqual((stats["leaders"], stats["coalesced"], stats["in_flight"]), (1, 4, 0))
+
+        # Requests carrying credentials are never shared
+        self.client.get('/herd?id=5', headers={"Authorization": "Bearer token"}).data
+        self.assertEqual(CountingHandler.gets, 2)
+
+        # Requests that negotiate a different encoding get their own upstream call
+        def fetch_encoded(encoding):
+            return app.test_client().get('/herd?id=5', headers={"Accept-Encoding": encoding}).data
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(fetch_encoded, ["gzip", "identity"]))
+        self.assertEqual(CountingHandler.gets, 4)
+
+        # Users told apart by a header never share a response for the same URL
+        load_balancer.key_extractor = KeyExtractor('header:X-User-ID', fallback='fixed')
+
+        def fetch_as(user):
+            return app.test_client().get('/profile', headers={"X-User-ID": user, "X-Client": user}).data
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            bodies = list(executor.map(fetch_as, ["alice", "bob"]))
+        self.assertEqual(bodies, [b"GET /profile alice\n", b"GET /profile bob\n"])
+        self.assertEqual(CountingHandler.gets, 6)
+
+    def test_header_key_extraction(self):
+        load_balancer.key_extractor = KeyExtractor('header:X-User-ID', fallback='fixed')
+        # Nothing listens on 127.0.0.2, so only users owned by 127.0.0.1 get through
+        self.client.post('/add', json={"n": 2, "hostnames": ["127.0.0.2", "127.0.0.1"]})
+        users = [f"user-{i}" for i in range(100)]
+        reachable = next(user for user in users if hash_ring.get_server(user) == "127.0.0.1")
+        unreachable = next(user for user in users if hash_ring.get_server(user) == "127.0.0.2")
+        response = self.client.post('/echo', data=b"x", headers={"X-User-ID": reachable})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post('/echo', data=b"x", headers={"X-User-ID": unreachable})
+        self.assertEqual(response.status_code, 502)
+
+    def test_client_ip_keys_are_not_coalesced(self):
+        self.start_backend('127.0.0.4', CountingHandler)
+        load_balancer.key_extractor = KeyExtractor('ip', fallback='fixed')
+        load_balancer.single_flight = SingleFlight(max_waiters=10, timeout=5)
+        CountingHandler.gets = 0
+        self.client.post('/add', json={"n": 1, "hostnames": ["127.0.0.4"]})
+
+        def fetch_from(address):
+            return app.test_client().get('/inbox', headers={"X-Client": address},
+                                         environ_base={"REMOTE_ADDR": address}).data
+
+        # Concurrent requests from one client share a flight; other clients get their own
+        addresses = ["10.0.0.1", "10.0.0.1", "10.0.0.2", "10.0.0.3"]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            bodies = list(executor.map(fetch_from, addresses))
+        self.assertEqual(bodies, [f"GET /inbox {address}\n".encode() for address in addresses])
+        self.assertEqual(CountingHandler.gets, 3)
+
+    def put_slow(self):
+        # Closing the response, as a WSGI server does, gives back its admission slot
+        with app.test_client().put('/slow?id=1', data=b"x") as response:
+            return response.data
+
+    def test_admission_control(self):
+        self.start_backend('127.0.0.3', SlowHandler)
+        load_balancer.admission = AdmissionController(max_concurrency=1, queue_size=0, retry_after=2)
+        self.client.post('/add', json={"n": 1, "hostnames": ["127.0.0.3"]})
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            slow_request = executor.submit(self.put_slow)
+            while load_balancer.admission.stats()["global"]["in_flight"] == 0:
+                time.sleep(0.01)
+            started = time.monotonic()
+            response = self.client.get('/fast?id=1')
+            self.assertLess(time.monotonic() - started, 0.5)
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers["Retry-After"], "2")
+            self.assertEqual(slow_request.result(), b"PUT /slow?id=1 \nx")
+
+        # The slot is given back once the response has been sent
+        stats = self.client.get('/stats').json["message"]["admission"]
+        self.assertEqual(stats["global"]["in_flight"], 0)
+        self.assertEqual(stats["shed"]["queue_full"], 1)
+
+        # A backend at its own limit sheds the request instead of queueing on it
+        load_balancer.admission = AdmissionController(backend_max_concurrency=1, queue_size=0)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            slow_request = executor.submit(self.put_slow)
+            while not load_balancer.admission.stats()["backends"]:
+                time.sleep(0.01)
+            response = self.client.post('/fast?id=1', data=b"x")
+            self.assertEqual(response.status_code, 503)
+            self.assertIn("overloaded", response.json["message"])
+            slow_request.result()
+        self.assertEqual(load_balancer.admission.stats()["shed"]["backend_saturated"], 1)
+        self.assertEqual(circuit_breakers.stats()["127.0.0.3"]["failures"], 0)
+
+    def test_client_rate_limit(self):
+        load_balancer.admission = AdmissionController(client_rate=1, client_burst=2)
+        statuses = [self.client.get('/limited').status_code for _ in range(3)]
+        self.assertEqual(statuses, [503, 503, 429])  # No servers, then rate limited
+        response = self.client.get('/limited')
+        self.assertEqual(response.headers["Retry-After"], "1")
+        self.assertEqual(load_balancer.admission.stats()["shed"]["rate_limited"], 2)
+
+    def test_route_policies(self):
+        self.start_backend('127.0.0.5', EchoHandler)
+        load_balancer.route_policies = RoutePolicies('/spread=round_robin', load_balancer.load_tracker.snapshot,
+                                                     circuit_breakers.latencies)
+        self.client.post('/add', json={"n": 2, "hostnames": ["127.0.0.1", "127.0.0.5"]})
+        # The same key alternates between servers on a round-robin route...
+        served_by = [self.client.get('/spread?id=9').headers["X-Served-By"] for _ in range(4)]
+        self.assertEqual(sorted(served_by), ["127.0.0.1", "127.0.0.1", "127.0.0.5", "127.0.0.5"])
+        self.assertNotEqual(served_by[0], served_by[1])
+        # ...and sticks to its owner everywhere else
+        served_by = {self.client.get('/home?id=9').headers["X-Served-By"] for _ in range(4)}
+        self.assertEqual(served_by, {hash_ring.get_server(9)})
+        policies = self.client.get('/stats').json["message"]["routing_policies"]
+        self.assertEqual(policies, {"/spread": "round_robin", "*": "hash"})
+
+    def test_metrics_endpoint(self):
+        self.client.post('/add', json={"n": 1, "hostnames": ["127.0.0.1"]})
+        self.client.get('/home?id=1').data
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        text = response.get_data(as_text=True)
+        self.assertIn('# TYPE lb_upstream_latency_seconds histogram', text)
+        self.assertIn('lb_upstream_requests_total{backend="127.0.0.1",code="200"}', text)
+        self.assertIn('lb_upstream_latency_seconds_count{backend="127.0.0.1"}', text)
+        self.assertIn('lb_ring_lookup_seconds_bucket{le="+Inf"}', text)
+        self.assertIn('lb_membership_lock_wait_seconds_count{operation="add"}', text)
+        self.assertIn('lb_requests_in_flight{backend="127.0.0.1"} 0', text)
+        self.assertIn('lb_ring_ownership_ratio{backend="127.0.0.1"} 1', text)
+
+    def test_server_timing(self):
+        slow_logger = logging.getLogger('test_slow_requests')
+        load_balancer.slow_request_log = SlowRequestLog(threshold_ms=0, log=slow_logger)
+        self.client.post('/add', json={"n": 1, "hostnames": ["127.0.0.1"]})
+        with self.assertLogs(slow_logger, level='WARNING') as logs:
+            with self.client.get('/home?id=1') as response:
+                self.assertEqual(response.data, b"GET /home?id=1 \n")
+        self.assertEqual(response.headers["X-Upstream"], "127.0.0.1")
+        phases = [entry.split(';')[0] for entry in response.headers["Server-Timing"].split(', ')]
+        self.assertEqual(phases, ["queue", "lookup", "connect", "upstream", "total"])
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual((entry["method"], entry["path"], entry["status"], entry["upstream"]),
+                         ("GET", "/home", 200, "127.0.0.1"))
+        self.assertIn("stream", entry["phases_ms"])
+        self.assertEqual(self.client.get('/stats').json["message"]["slow_requests"]["logged"], 1)
+
+    def test_admin_profile(self):
+        load_balancer.profiler = Profiler()
+        admin = {"Authorization": "Bearer secret"}
+        self.assertEqual(self.client.get('/admin/profile').status_code, 404)  # No token configured
+        load_balancer.admin_token = "secret"
+        response = self.client.get('/admin/profile', headers={"Authorization": "Bearer wrong"})
+        self.assertEqual(response.status_code, 401)
+
+        response = self.client.post('/admin/profile', json={"mode": "cprofile", "requests": 2}, headers=admin)
+        self.assertEqual(response.status_code, 202)
+        response = self.client.post('/admin/profile', json={"mode": "sample", "seconds": 5}, headers=admin)
+        self.assertEqual(response.status_code, 409)
+
+        self.client.post('/add', json={"n": 1, "hostnames": ["127.0.0.1"]})
+        for request_id in range(2):
+            self.assertEqual(self.client.get(f'/home?id={request_id}').status_code, 200)
+        status = self.client.get('/admin/profile', headers=admin).json["message"]
+        self.assertEqual((status["state"], status["profiled_requests"]), ("finished", 2))
+        self.assertEqual(status["hot_spots"]["load_balancer.py:forward"]["calls"], 2)
+        self.assertIn("get_preference_list", "".join(status["hot_spots"]))
+
+        response = self.client.get('/admin/profile?format=pstats', headers=admin)
+        self.assertIn(b"cumulative", response.data)
+        self.assertEqual(self.client.get('/admin/profile?format=collapsed', headers=admin).status_code, 404)
+
     def tearDown(self):
-        pass
+        upstream_pool.port = self.original_port
+        for name, value in self.original_globals.items():
+            setattr(load_balancer, name, value)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
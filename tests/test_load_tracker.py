@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Unit tests for in-flight load tracking.
+"""
+
+import unittest
+import sys
+import os
+import threading
+
+# Add parent directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+from load_tracker import LoadTracker
+
+class TestLoadTracker(unittest.TestCase):
+    """Test cases for LoadTracker class."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tracker = LoadTracker()
+    
+    def test_acquire_release(self):
+        """Test counts rise on acquire and backends drop out of the snapshot at zero."""
+        self.tracker.acquire("server1")
+        self.tracker.acquire("server1")
+        self.assertEqual(self.tracker.in_flight("server1"), 2)
+        
+        self.tracker.release("server1")
+        self.assertEqual(self.tracker.snapshot(), {"server1": 1})
+        
+        self.tracker.release("server1")
+        self.tracker.release("server2")  # Never acquired
+        self.assertEqual(self.tracker.snapshot(), {})
+    
+    def test_concurrent_updates(self):
+        """Test counters stay exact under concurrent use."""
+        def worker():
+            for _ in range(1000):
+                self.tracker.acquire("server1")
+                self.tracker.release("server1")
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(self.tracker.in_flight("server1"), 0)
+
+if __name__ == '__main__':
+    unittest.main()
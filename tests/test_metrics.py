@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Prometheus metrics registry.
+"""
+
+import unittest
+import sys
+import os
+import gc
+import threading
+
+# Add parent directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+from metrics import COUNTER, HISTOGRAM, Metrics
+
+class TestMetrics(unittest.TestCase):
+    """Test cases for Metrics class."""
+
+    def test_counters_across_threads(self):
+        """Test counters from every thread are summed and exited threads' shards are reused."""
+        metrics = Metrics()
+        labels = (('backend', 's1'), ('code', '200'))
+
+        def record():
+            for _ in range(100):
+                metrics.inc('requests', labels)
+
+        metrics.inc('requests', labels, 5)
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        gc.collect()
+
+        shards = len(metrics._shards)
+        self.assertEqual(len(metrics._free), shards - 1)  # Only this thread still holds a shard
+
+        for _ in range(4):
+            thread = threading.Thread(target=record)
+            thread.start()
+            thread.join()
+        gc.collect()
+
+        self.assertEqual(len(metrics._shards), shards)
+        self.assertEqual(metrics.collect().counters[('requests', labels)], 1205)
+
+    def test_histogram_rendering(self):
+        """Test histogram buckets are cumulative and end with +Inf, sum and count."""
+        metrics = Metrics(buckets=(0.1, 1.0))
+        metrics.describe('latency_seconds', HISTOGRAM, 'Upstream latency')
+        for sample in (0.05, 0.5, 0.5, 3.0):
+            metrics.observe('latency_seconds', sample, (('backend', 's1'),))
+
+        text = metrics.render()
+        self.assertIn('# TYPE latency_seconds histogram', text)
+        self.assertIn('latency_seconds_bucket{backend="s1",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{backend="s1",le="1"} 3', text)
+        self.assertIn('latency_seconds_bucket{backend="s1",le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_sum{backend="s1"} 4.05', text)
+        self.assertIn('latency_seconds_count{backend="s1"} 4', text)
+
+    def test_scraped_values(self):
+        """Test scrape-time values render as gauges unless described otherwise."""
+        metrics = Metrics()
+        metrics.describe('shed_total', COUNTER, 'Requests shed')
+        text = metrics.render([
+            ('in_flight', 'Requests in flight', {(('backend', 'say "hi"\n'),): 2}),
+            ('shed_total', 'ignored', {(('reason', 'queue_full'),): 1}),
+        ])
+        self.assertIn('# TYPE in_flight gauge', text)
+        self.assertIn('in_flight{backend="say \\"hi\\"\\n"} 2', text)
+        self.assertIn('# HELP shed_total Requests shed', text)
+        self.assertIn('# TYPE shed_total counter', text)
+        self.assertTrue(text.endswith('\n'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Unit tests for on-demand profiling.
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+from consistent_hash import ConsistentHash
+from profiling import Profiler
+
+def route(ring):
+    for request_id in range(200):
+        ring.get_server(request_id)
+    time.sleep(0.02)  # Long enough for the sampler to see this thread
+    return ring.get_server(1)
+
+class TestProfiler(unittest.TestCase):
+    """Test cases for Profiler class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.ring = ConsistentHash()
+        self.ring.add_servers([(1, "s1"), (2, "s2")])
+
+    def test_cprofile_requests(self):
+        """Test a cprofile session stops after its requests and reports routing hot spots."""
+        profiler = Profiler()
+        self.assertTrue(profiler.start('cprofile', requests=2))
+        self.assertFalse(profiler.start('sample', seconds=1))  # One session at a time
+        for _ in range(3):
+            self.assertIn(profiler.run(route, self.ring), ("s1", "s2"))
+
+        status = profiler.status()
+        self.assertEqual(status['state'], 'finished')
+        self.assertEqual(status['profiled_requests'], 2)
+        self.assertEqual(status['hot_spots']['consistent_hash.py:get_server']['calls'], 402)
+        self.assertEqual(status['hot_spots']['consistent_hash.py:hash_request']['calls'], 402)
+        self.assertIn('get_server', profiler.pstats_text())
+        self.assertIsNone(profiler.collapsed())
+
+    def test_sample_seconds(self):
+        """Test a sample session records collapsed stacks of profiled requests until it expires."""
+        with tempfile.TemporaryDirectory() as store_dir:
+            profiler = Profiler(interval=0.001, store_dir=store_dir)
+            self.assertTrue(profiler.start('sample', seconds=0.2))
+            while profiler.status()['state'] == 'running':
+                profiler.run(route, self.ring)
+
+            collapsed = profiler.collapsed()
+            stack, _, count = collapsed.splitlines()[0].rpartition(' ')
+            self.assertIn('test_profiling.py:route', stack)
+            self.assertGreater(int(count), 0)
+            self.assertIn('test_profiling.py:route', collapsed)
+            self.assertGreater(profiler.status()['samples'], 0)
+            self.assertTrue(any(name.endswith('.collapsed') for name in os.listdir(store_dir)))
+            self.assertIsNone(profiler.pstats_text())
+
+    def test_invalid_sessions(self):
+        profiler = Profiler()
+        with self.assertRaises(ValueError):
+            profiler.start('perf', seconds=1)
+        with self.assertRaises(ValueError):
+            profiler.start('sample')
+        self.assertEqual(profiler.status(), {'state': 'idle'})
+
+if __name__ == '__main__':
+    unittest.main()
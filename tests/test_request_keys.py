@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Unit tests for request key extraction.
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+from consistent_hash import ConsistentHash
+from request_keys import KeyExtractor, create_key_extractor_from_env, parse_key_sources
+
+class TestKeyExtractor(unittest.TestCase):
+    """Test cases for KeyExtractor class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.extractor = KeyExtractor('query:id,header:X-User-ID,cookie:session,ip', fallback='fixed')
+
+    def extract(self, query=None, headers=None, cookies=None, client_ip=None):
+        return self.extractor.extract(query or {}, headers or {}, cookies or {}, client_ip)
+
+    def test_source_priority(self):
+        """Test the first source present supplies the key."""
+        self.assertEqual(self.extract({'id': '42'}, {'X-User-ID': 'alice'}, client_ip='10.0.0.1'), (42, True))
+        self.assertEqual(self.extract({'id': ''}, {'X-User-ID': 'alice'}), ('alice', True))
+        self.assertEqual(self.extract(cookies={'session': 'abc'}, client_ip='10.0.0.1'), ('abc', True))
+        self.assertEqual(self.extract(client_ip='10.0.0.1'), ('10.0.0.1', True))
+
+    def test_numeric_and_string_keys(self):
+        """Test decimal values stay integers and everything else stays a string."""
+        self.assertEqual(self.extract({'id': ' 7 '}), (7, True))
+        self.assertEqual(self.extract({'id': 'user-7'}), ('user-7', True))
+        self.assertEqual(self.extract({'id': '-7'}), ('-7', True))
+
+    def test_fallbacks(self):
+        """Test keyless requests get the configured fallback key."""
+        self.assertEqual(self.extract(), (1, False))
+
+        round_robin = KeyExtractor(fallback='round_robin')
+        self.assertEqual([round_robin.extract({}, {}, {}, None)[0] for _ in range(3)], [0, 1, 2])
+
+        key, keyed = KeyExtractor().extract({}, {}, {}, None)
+        self.assertFalse(keyed)
+        self.assertIsInstance(key, int)
+
+    def test_keyless_requests_spread(self):
+        """Test random fallback keys spread across every server."""
+        ring = ConsistentHash()
+        ring.add_servers([(1, "s1"), (2, "s2"), (3, "s3")])
+        extractor = KeyExtractor()
+        servers = {ring.get_server(extractor.extract({}, {}, {}, None)[0]) for _ in range(1000)}
+        self.assertEqual(servers, {"s1", "s2", "s3"})
+
+    def test_string_keys_spread(self):
+        """Test string keys are hashed across the ring rather than collapsing to one slot."""
+        ring = ConsistentHash()
+        ring.add_servers([(1, "s1"), (2, "s2"), (3, "s3")])
+        servers = {ring.get_server(f"user-{i}") for i in range(100)}
+        self.assertEqual(servers, {"s1", "s2", "s3"})
+
+    def test_invalid_configuration(self):
+        """Test unknown sources, missing names and unknown fallbacks are rejected."""
+        with self.assertRaises(ValueError):
+            parse_key_sources('body:id')
+        with self.assertRaises(ValueError):
+            parse_key_sources('header')
+        with self.assertRaises(ValueError):
+            KeyExtractor(fallback='sticky')
+
+    def test_from_env(self):
+        """Test the extractor is configured from LB_KEY_* variables."""
+        extractor = create_key_extractor_from_env({'LB_KEY_SOURCES': 'header:X-User-ID, ip',
+                                                   'LB_KEY_FALLBACK': 'round_robin'})
+        self.assertEqual(extractor.sources, [('header', 'X-User-ID'), ('ip', None)])
+        self.assertEqual(extractor.fallback, 'round_robin')
+        self.assertEqual(create_key_extractor_from_env({}).sources, [('query', 'id')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Unit tests for request phase timing and the slow-request log.
+"""
+
+import unittest
+import sys
+import os
+import json
+import logging
+
+# Add parent directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+from request_timing import RequestTiming, SlowRequestLog
+
+class TestRequestTiming(unittest.TestCase):
+    """Test cases for RequestTiming class."""
+
+    def test_server_timing_header(self):
+        """Test phases are listed in the order they ran, in milliseconds, before the total."""
+        timing = RequestTiming()
+        timing.add('lookup', 0.00002)
+        timing.add('upstream', 0.010)
+        timing.add('upstream', 0.0025)
+        entries = timing.header().split(', ')
+        self.assertEqual(entries[:2], ['lookup;dur=0.020', 'upstream;dur=12.500'])
+        self.assertTrue(entries[2].startswith('total;dur='))
+        self.assertGreaterEqual(float(entries[2].split('=')[1]), 0)
+
+class TestSlowRequestLog(unittest.TestCase):
+    """Test cases for SlowRequestLog class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.logger = logging.getLogger('test_request_timing')
+
+    def test_logs_slow_requests_as_json(self):
+        """Test a slow request is logged with its fields and phases."""
+        slow_log = SlowRequestLog(threshold_ms=0, log=self.logger)
+        timing = RequestTiming()
+        timing.add('upstream', 0.25)
+        with self.assertLogs(self.logger, level='WARNING') as logs:
+            self.assertTrue(slow_log.record(timing, method='GET', path='/home', upstream='s1'))
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['path'], '/home')
+        self.assertEqual(entry['upstream'], 's1')
+        self.assertEqual(entry['phases_ms'], {'upstream': 250.0})
+        self.assertIn('total_ms', entry)
+
+    def test_threshold_and_sampling(self):
+        """Test fast requests are skipped and slow ones are only logged when sampled."""
+        fast = SlowRequestLog(threshold_ms=60000, log=self.logger)
+        self.assertFalse(fast.record(RequestTiming()))
+        self.assertEqual(fast.stats()['slow'], 0)
+
+        unsampled = SlowRequestLog(threshold_ms=0, sample_rate=0, log=self.logger)
+        for _ in range(5):
+            self.assertFalse(unsampled.record(RequestTiming()))
+        self.assertEqual(unsampled.stats()['slow'], 5)
+        self.assertEqual(unsampled.stats()['logged'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the load balancer response cache.
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+from response_cache import ResponseCache, parse_cache_control, parse_route_ttls
+
+HEADERS = [('Content-Type', 'text/plain')]
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases for ResponseCache class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.cache = ResponseCache({'/home': 5}, max_bytes=1000, max_entry_bytes=300)
+
+    def put(self, key, body=b"x" * 100, headers=HEADERS, status=200, owner="s1", now=0):
+        return self.cache.put(key, status, headers, body, owner, self.cache.generation, now=now)
+
+    def test_ttl_expiry(self):
+        """Test entries are served until their route TTL runs out."""
+        self.assertTrue(self.put(('/home', 1)))
+        self.assertEqual(self.cache.get(('/home', 1), now=4.9).body, b"x" * 100)
+        self.assertIsNone(self.cache.get(('/home', 1), now=5))
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['expired']), (1, 1, 1))
+        self.assertEqual(stats['entries'], 0)
+
+    def test_only_configured_routes(self):
+        """Test routes without a TTL are neither consulted nor stored."""
+        self.assertFalse(self.cache.is_cacheable_request('GET', '/other', None))
+        self.assertFalse(self.cache.is_cacheable_request('POST', '/home', None))
+        self.assertTrue(self.cache.is_cacheable_request('GET', '/home', None))
+        self.assertFalse(self.put(('/other', 1)))
+        self.assertFalse(self.put(('/home', 1), status=500))
+
+        cache = ResponseCache({'/home': 5, '/live': 0}, default_ttl=1)
+        self.assertEqual(cache.ttl_for('/other'), 1)
+        self.assertIsNone(cache.ttl_for('/live'))
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted at the memory bound."""
+        for request_id in range(4):
+            self.put(('/home', request_id), body=b"x" * 200)
+        self.cache.get(('/home', 0), now=1)
+        self.put(('/home', 4), body=b"x" * 200)
+
+        self.assertIsNotNone(self.cache.get(('/home', 0), now=1))
+        self.assertIsNone(self.cache.get(('/home', 1), now=1))
+        stats = self.cache.stats()
+        self.assertEqual((stats['entries'], stats['evictions']), (4, 1))
+        self.assertLessEqual(stats['bytes'], 1000)
+        self.assertFalse(self.put(('/home', 5), body=b"x" * 400))
+
+    def test_cache_control(self):
+        """Test request and response Cache-Control directives are honored."""
+        for value in ('no-cache', 'no-store', 'max-age=0'):
+            self.assertFalse(self.cache.is_cacheable_request('GET', '/home', value))
+        self.assertTrue(self.cache.is_cacheable_request('GET', '/home', 'max-age=60'))
+
+        for header in (('Cache-Control', 'private'), ('Cache-Control', 'no-store'),
+                       ('Set-Cookie', 'a=b'), ('Vary', 'Accept')):
+            self.assertFalse(self.put(('/home', 1), headers=HEADERS + [header]))
+
+        self.put(('/home', 2), headers=HEADERS + [('Cache-Control', 'public, max-age=60, s-maxage=20')])
+        self.assertIsNotNone(self.cache.get(('/home', 2), now=19))
+        self.assertIsNone(self.cache.get(('/home', 2), now=20))
+
+    def test_credentials(self):
+        """Test cookies bypass the cache and authorized responses are only stored when shareable."""
+        self.assertFalse(self.cache.is_cacheable_request('GET', '/home', None, cookie=True))
+        key = ('/home', 1, '/home?id=1')
+        self.assertFalse(self.cache.put(key, 200, HEADERS, b"x", "s1", self.cache.generation, now=0, authorized=True))
+        for value in ('public', 's-maxage=5'):
+            self.assertTrue(self.cache.put(key, 200, HEADERS + [('Cache-Control', value)], b"x", "s1",
+                                           self.cache.generation, now=0, authorized=True))
+
+    def test_invalidate_moved(self):
+        """Test only entries whose key changed owner are dropped."""
+        owners = {1: "s1", 2: "s1", 3: "s2"}
+        for request_id, owner in owners.items():
+            self.put(('/home', request_id), owner=owner)
+        owners[2] = "s3"
+        self.assertEqual(self.cache.invalidate_moved(owners.get), 1)
+        self.assertIsNone(self.cache.get(('/home', 2), now=1))
+        self.assertIsNotNone(self.cache.get(('/home', 1), now=1))
+        self.assertEqual(self.cache.stats()['invalidations'], 1)
+
+    def test_stale_generation_is_not_stored(self):
+        """Test a response fetched before an invalidation is not stored after it."""
+        generation = self.cache.generation
+        self.cache.invalidate_moved(lambda request_id: "s1")
+        self.assertFalse(self.cache.put(('/home', 1), 200, HEADERS, b"x", "s1", generation, now=0))
+
+class TestParsing(unittest.TestCase):
+    """Test cases for header and configuration parsing."""
+
+    def test_parse_cache_control(self):
+        self.assertEqual(parse_cache_control('Public, max-age="60", no-transform'),
+                         {'public': None, 'max-age': '60', 'no-transform': None})
+        self.assertEqual(parse_cache_control(None), {})
+
+    def test_parse_route_ttls(self):
+        self.assertEqual(parse_route_ttls('/home=5, /about=60.5'), ({'/home': 5.0, '/about': 60.5}, None))
+        self.assertEqual(parse_route_ttls('/home=5,1'), ({'/home': 5.0}, 1.0))
+
+if __name__ == '__main__':
+    unittest.main()
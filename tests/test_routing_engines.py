@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the alternative routing engines.
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+from consistent_hash import ConsistentHash, RoutingEngine
+from routing_engines import (
+    create_routing_engine, create_routing_engine_from_env, jump_hash, ENGINES,
+    JumpHashEngine, RendezvousEngine, MaglevEngine
+)
+
+class TestRoutingEngines(unittest.TestCase):
+    """Test cases shared by every routing engine."""
+    
+    def make_engines(self):
+        """Create one instance of every engine (small Maglev table for speed)."""
+        return [create_routing_engine(name, table_size=1021) for name in ENGINES]
+    
+    def test_factory(self):
+        """Test engines are created by name."""
+        self.assertIsInstance(create_routing_engine(), ConsistentHash)
+        self.assertIsInstance(create_routing_engine('jump'), JumpHashEngine)
+        self.assertIsInstance(create_routing_engine('rendezvous'), RendezvousEngine)
+        self.assertIsInstance(create_routing_engine('maglev', table_size=1021), MaglevEngine)
+        with self.assertRaises(ValueError):
+            create_routing_engine('round_robin')
+    
+    def test_factory_from_env(self):
+        """Test engines are configured from LB_* variables."""
+        engine = create_routing_engine_from_env({})
+        self.assertIsInstance(engine, ConsistentHash)
+        self.assertTrue(engine.dense_table)
+        engine = create_routing_engine_from_env({
+            'LB_ROUTING_ENGINE': 'maglev', 'LB_MAGLEV_TABLE_SIZE': '1021'
+        })
+        self.assertEqual(engine.table_size, 1021)
+    
+    def test_membership_interface(self):
+        """Test every engine supports the shared membership operations."""
+        for engine in self.make_engines():
+            with self.subTest(engine=engine.name):
+                self.assertIsInstance(engine, RoutingEngine)
+                self.assertIsNone(engine.get_server(1))
+                
+                self.assertTrue(engine.add_servers([(1, "s1"), (2, "s2"), (3, "s3")]))
+                self.assertFalse(engine.add_server(2, "dup"))
+                self.assertEqual(engine.get_server_count(), 3)
+                self.assertEqual(engine.version, 1)
+                
+                self.assertTrue(engine.remove_server(1))
+                self.assertFalse(engine.remove_servers([2, 999]))
+                self.assertEqual(sorted(engine.get_servers_list()), ["s2", "s3"])
+                self.assertEqual(engine.get_ring_status()['engine'], engine.name)
+                self.assertAlmostEqual(sum(engine.get_ring_status()['ownership'].values()), 1.0)
+                self.assertEqual(engine.add_server(9, "s9", weight=2.0), engine.supports_weights)
+                
+                engine.clear()
+                self.assertEqual(engine.get_server_count(), 0)
+    
+    def test_routing_is_deterministic_and_spread(self):
+        """Test lookups are stable and reach every server."""
+        for engine in self.make_engines()[1:]:  # The quadratic ring clusters by design
+            with self.subTest(engine=engine.name):
+                engine.add_servers([(i, f"s{i}") for i in range(1, 4)])
+                owners = [engine.get_server(rid) for rid in range(3000)]
+                self.assertEqual(owners, [engine.get_server(rid) for rid in range(3000)])
+                for hostname in ("s1", "s2", "s3"):
+                    self.assertGreater(owners.count(hostname) / len(owners), 0.25)
+    
+    def test_removal_only_moves_removed_keys(self):
+        """Test rendezvous and Maglev keep keys of surviving servers mostly in place."""
+        for name in ('rendezvous', 'maglev'):
+            engine = create_routing_engine(name, table_size=1021)
+            engine.add_servers([(i, f"s{i}") for i in range(1, 5)])
+            before = [engine.get_server(rid) for rid in range(2000)]
+            engine.remove_server(2)
+            after = [engine.get_server(rid) for rid in range(2000)]
+            moved = sum(1 for old, new in zip(before, after) if old != "s2" and old != new)
+            self.assertLess(moved / len(before), 0.05, name)
+    
+    def test_preference_list(self):
+        """Test every engine returns distinct servers led by the primary."""
+        for engine in self.make_engines():
+            engine.add_servers([(i, f"s{i}") for i in range(1, 6)])
+            for rid in range(100):
+                preference = engine.get_preference_list(rid, 3)
+                self.assertEqual(preference[0], engine.get_server(rid), engine.name)
+                self.assertEqual(len(set(preference)), 3, engine.name)
+            self.assertEqual(len(engine.get_preference_list(1, 10)), 5, engine.name)
+    
+    def test_preference_list_matches_failover(self):
+        """Test the second choice is where a key moves when its primary is removed."""
+        for name in ('consistent_hash', 'jump', 'rendezvous'):
+            engine = create_routing_engine(name)
+            engine.add_servers([(i, f"s{i}") for i in range(1, 6)])
+            expected = {rid: engine.get_preference_list(rid, 2) for rid in range(300)}
+            engine.remove_server(3)
+            for rid, (first, second) in expected.items():
+                if first == "s3":
+                    self.assertEqual(engine.get_server(rid), second, name)
+    
+    def test_jump_hash(self):
+        """Test jump hash stays within range and is monotone when growing."""
+        for key in range(500):
+            self.assertEqual(jump_hash(key, 1), 0)
+            small = jump_hash(key, 10)
+            large = jump_hash(key, 11)
+            self.assertTrue(0 <= small < 10)
+            self.assertIn(large, (small, 10))
+
+if __name__ == '__main__':
+    unittest.main()
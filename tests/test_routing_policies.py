@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Unit tests for per-route routing policies.
+"""
+
+import unittest
+import sys
+import os
+from collections import Counter
+
+# Add parent directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+from routing_policies import (LeastOutstandingPolicy, PowerOfTwoPolicy, RoundRobinPolicy,
+                              RoutePolicies)
+
+SERVERS = ["s1", "s2", "s3"]
+
+class TestRoutingPolicies(unittest.TestCase):
+    """Test cases for the RoutingPolicy implementations."""
+
+    def test_round_robin(self):
+        """Test the first choice rotates and the rest follow as failover order."""
+        policy = RoundRobinPolicy()
+        self.assertEqual([policy.pick(SERVERS, 2) for _ in range(4)],
+                         [["s1", "s2"], ["s2", "s3"], ["s3", "s1"], ["s1", "s2"]])
+        self.assertEqual(policy.pick([], 2), [])
+
+    def test_least_outstanding(self):
+        """Test servers are ordered by requests in flight."""
+        policy = LeastOutstandingPolicy(lambda: {"s1": 5, "s2": 0, "s3": 2})
+        self.assertEqual(policy.pick(SERVERS, 3), ["s2", "s3", "s1"])
+
+        # Servers without load are tied, so the first choice is spread between them
+        policy = LeastOutstandingPolicy(lambda: {"s1": 5})
+        first = Counter(policy.pick(SERVERS, 1)[0] for _ in range(200))
+        self.assertEqual(set(first), {"s2", "s3"})
+
+    def test_power_of_two_choices(self):
+        """Test the most loaded server never wins a comparison, and picks are distinct."""
+        policy = PowerOfTwoPolicy(lambda: {"s1": 10.0, "s2": 1.0, "s3": 2.0})
+        first = Counter()
+        for _ in range(300):
+            picked = policy.pick(SERVERS, 3)
+            self.assertEqual(sorted(picked), SERVERS)
+            first[picked[0]] += 1
+        self.assertNotIn("s1", first)
+        self.assertGreater(first["s2"], first["s3"])
+        self.assertEqual(policy.pick(["s1"], 2), ["s1"])
+
+class TestRoutePolicies(unittest.TestCase):
+    """Test cases for RoutePolicies class."""
+
+    def test_route_mapping(self):
+        """Test routes map to their policy and others to the default."""
+        policies = RoutePolicies('/static=p2c, /api=least_outstanding, /home=hash, round_robin',
+                                 loads=dict, latencies=dict)
+        self.assertEqual(policies.policy_for('/static').name, 'p2c')
+        self.assertEqual(policies.policy_for('/api').name, 'least_outstanding')
+        self.assertIsNone(policies.policy_for('/home'))
+        self.assertEqual(policies.policy_for('/other').name, 'round_robin')
+        self.assertEqual(policies.describe(), {'/static': 'p2c', '/api': 'least_outstanding',
+                                               '/home': 'hash', '*': 'round_robin'})
+
+    def test_hash_by_default(self):
+        """Test every route keeps key affinity when nothing is configured."""
+        policies = RoutePolicies('', loads=dict, latencies=dict)
+        self.assertIsNone(policies.policy_for('/home'))
+        self.assertEqual(policies.describe(), {'*': 'hash'})
+
+    def test_latency_metric(self):
+        """Test p2c_latency compares EWMA latency rather than in-flight counts."""
+        policies = RoutePolicies('p2c_latency', loads=lambda: {"s1": 0, "s2": 9},
+                                 latencies=lambda: {"s1": 80.0, "s2": 5.0})
+        policy = policies.policy_for('/any')
+        self.assertEqual({policy.pick(["s1", "s2"], 1)[0] for _ in range(50)}, {"s2"})
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            RoutePolicies('/home=fastest', loads=dict, latencies=dict)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Unit tests for request coalescing.
+"""
+
+import unittest
+import sys
+import os
+import threading
+
+# Add parent directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+from single_flight import SingleFlight, SharedResponse, flight_key, is_shareable
+
+RESPONSE = SharedResponse(200, [('Content-Type', 'text/plain')], b"hello")
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for SingleFlight class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.flights = SingleFlight(max_waiters=2, timeout=1, max_body_bytes=10)
+
+    def test_waiters_share_leader_response(self):
+        """Test waiters block until the leader finishes and receive its response."""
+        flight, leader = self.flights.begin("k")
+        self.assertTrue(leader)
+        results = []
+        waiters = []
+        for _ in range(2):
+            waiter, leader = self.flights.begin("k")
+            self.assertIs(waiter, flight)
+            self.assertFalse(leader)
+            thread = threading.Thread(target=lambda: results.append(self.flights.wait(flight)))
+            thread.start()
+            waiters.append(thread)
+
+        self.flights.finish("k", flight, RESPONSE)
+        for thread in waiters:
+            thread.join()
+        self.assertEqual(results, [RESPONSE, RESPONSE])
+        stats = self.flights.stats()
+        self.assertEqual((stats['leaders'], stats['coalesced'], stats['in_flight']), (1, 2, 0))
+
+        # The next request after the flight finished leads a new one
+        self.assertTrue(self.flights.begin("k")[1])
+
+    def test_waiter_limit(self):
+        """Test requests beyond the waiter limit are told to go upstream alone."""
+        self.flights.begin("k")
+        self.flights.begin("k")
+        self.flights.begin("k")
+        self.assertEqual(self.flights.begin("k"), (None, False))
+        self.assertEqual(self.flights.stats()['overflows'], 1)
+        self.assertTrue(self.flights.begin("other")[1])
+
+    def test_failed_or_large_response_is_not_shared(self):
+        """Test waiters fall back when the leader fails or the body is too large."""
+        flight, _ = self.flights.begin("k")
+        self.flights.begin("k")
+        self.flights.finish("k", flight, None)
+        self.assertIsNone(self.flights.wait(flight))
+
+        flight, _ = self.flights.begin("k")
+        self.flights.begin("k")
+        self.flights.finish("k", flight, RESPONSE._replace(body=b"x" * 11))
+        self.assertIsNone(self.flights.wait(flight))
+        self.assertEqual(self.flights.stats()['fallbacks'], 2)
+
+    def test_timeout(self):
+        """Test a waiter gives up after the timeout and a stale flight is replaced."""
+        flights = SingleFlight(timeout=0.05)
+        flight, _ = flights.begin("k")
+        self.assertIsNone(flights.wait(flights.begin("k")[0]))
+        self.assertEqual(flights.stats()['timeouts'], 1)
+
+        replacement, leader = flights.begin("k")
+        self.assertTrue(leader)
+        self.assertIsNot(replacement, flight)
+        # The abandoned leader finishing late does not retire its replacement
+        flights.finish("k", flight, RESPONSE)
+        self.assertEqual(flights.stats()['in_flight'], 1)
+
+    def test_content_negotiation(self):
+        """Test the routing key and negotiation headers are part of the key and other Vary fields prevent sharing."""
+        plain = flight_key('GET', '/home?id=1', {})
+        gzip = flight_key('GET', '/home?id=1', {'Accept-Encoding': 'gzip'})
+        self.assertNotEqual(plain, gzip)
+        self.assertEqual(gzip, flight_key('GET', '/home?id=1', {'Accept-Encoding': 'gzip', 'X-Other': '1'}))
+        self.assertNotEqual(flight_key('GET', '/home', {}, 'alice'), flight_key('GET', '/home', {}, 'bob'))
+
+        self.assertTrue(is_shareable([('Content-Type', 'text/plain')]))
+        self.assertTrue(is_shareable([('Vary', 'Accept-Encoding, accept-language')]))
+        self.assertFalse(is_shareable([('Vary', 'Accept-Encoding, Cookie')]))
+        self.assertFalse(is_shareable([('Vary', '*')]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Unit tests for upstream connection pooling.
+"""
+
+import unittest
+import sys
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'load_balancer'))
+
+from upstream_pool import UpstreamPool, filter_headers
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Minimal HTTP/1.1 backend that keeps connections open."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = json.dumps({"path": self.path, "port": self.client_address[1],
+                           "cookie": self.headers.get_all('Cookie'),
+                           "accept": self.headers.get_all('Accept')}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        # Echo the request body back with chunked transfer encoding
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(201)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for start in range(0, len(body), 1000):
+            piece = body[start:start + 1000]
+            self.wfile.write(f"{len(piece):x}\r\n".encode() + piece + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        pass
+
+def fetch(pool, path):
+    """GET a path and read the whole body, so the connection goes back to the pool."""
+    stream = pool.open('127.0.0.1', 'GET', path)
+    return stream.status, b''.join(stream.iter_chunks())
+
+class TestUpstreamPool(unittest.TestCase):
+    """Test cases for UpstreamPool class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.pool = UpstreamPool(port=self.server.server_address[1], max_size=2)
+        self.pool.register('127.0.0.1')
+
+    def tearDown(self):
+        self.pool.clear()
+
+    def test_connection_reuse(self):
+        """Test sequential requests reuse one keep-alive connection."""
+        status, first = fetch(self.pool, '/home')
+        _, second = fetch(self.pool, '/home?id=2')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(second)["path"], "/home?id=2")
+        self.assertEqual(json.loads(first)["port"], json.loads(second)["port"])
+
+        stats = self.pool.stats()
+        self.assertEqual(stats['backends']['127.0.0.1']['hits'], 1)
+        self.assertEqual(stats['backends']['127.0.0.1']['misses'], 1)
+        self.assertEqual(stats['total']['idle'], 1)
+
+    def test_idle_timeout(self):
+        """Test idle connections past the timeout are closed, not reused."""
+        self.pool.get_pool('127.0.0.1').idle_timeout = -1
+        fetch(self.pool, '/home')
+        fetch(self.pool, '/home')
+
+        stats = self.pool.stats()['backends']['127.0.0.1']
+        self.assertEqual(stats['hits'], 0)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['expired'], 1)
+
+    def test_pool_size_bound(self):
+        """Test at most max_size idle connections are kept per backend."""
+        host_pool = self.pool.get_pool('127.0.0.1')
+        conns = [host_pool.acquire()[0] for _ in range(4)]
+        for conn in conns:
+            host_pool.release(conn)
+        self.assertEqual(host_pool.stats()['idle'], 2)
+
+    def test_unregister(self):
+        """Test unregistering closes the pool and later requests are not pooled."""
+        fetch(self.pool, '/home')
+        self.pool.unregister('127.0.0.1')
+
+        self.assertIsNone(self.pool.get_pool('127.0.0.1'))
+        self.assertEqual(self.pool.stats()['backends'], {})
+        self.assertEqual(fetch(self.pool, '/home')[0], 200)
+
+    def test_streamed_response(self):
+        """Test chunked bodies stream through and the connection is then reused."""
+        payload = os.urandom(5000)
+        stream = self.pool.open('127.0.0.1', 'POST', '/echo', body=payload)
+        self.assertEqual(stream.status, 201)
+        chunks = list(stream.iter_chunks(chunk_size=1024))
+        self.assertEqual(b''.join(chunks), payload)
+        self.assertTrue(all(len(chunk) <= 1024 for chunk in chunks))
+
+        fetch(self.pool, '/home')
+        self.assertEqual(self.pool.stats()['backends']['127.0.0.1']['hits'], 1)
+
+    def test_connect_is_timed_separately(self):
+        """Test connection setup is only reported for new connections."""
+        first = self.pool.open('127.0.0.1', 'GET', '/home')
+        list(first.iter_chunks())
+        second = self.pool.open('127.0.0.1', 'GET', '/home')
+        list(second.iter_chunks())
+
+        self.assertGreater(first.connect_seconds, 0)
+        self.assertEqual(second.connect_seconds, 0)
+        self.assertGreater(second.wait_seconds, 0)
+
+    def test_abandoned_stream_is_not_pooled(self):
+        """Test a partly read response closes its connection instead of pooling it."""
+        stream = self.pool.open('127.0.0.1', 'POST', '/echo', body=os.urandom(5000))
+        next(stream.iter_chunks(chunk_size=100))
+        stream.close()
+        self.assertEqual(self.pool.stats()['total']['idle'], 0)
+
+    def test_repeated_headers(self):
+        """Test repeated fields are sent as they came, except Cookie fields, which are joined with '; '."""
+        headers = [('Cookie', 'a=1'), ('Accept', 'text/html'), ('Cookie', 'b=2'), ('Accept', 'text/plain')]
+        stream = self.pool.open('127.0.0.1', 'GET', '/home', headers=headers)
+        received = json.loads(b''.join(stream.iter_chunks()))
+        self.assertEqual(received["cookie"], ["a=1; b=2"])
+        self.assertEqual(received["accept"], ["text/html", "text/plain"])
+
+    def test_filter_headers(self):
+        """Test hop-by-hop headers, including ones named by Connection, are dropped."""
+        headers = [
+            ('Host', 'lb'), ('Connection', 'keep-alive, X-Trace'), ('X-Trace', '1'),
+            ('Transfer-Encoding', 'chunked'), ('Set-Cookie', 'a=1'), ('Set-Cookie', 'b=2')
+        ]
+        self.assertEqual(filter_headers(headers), [('Set-Cookie', 'a=1'), ('Set-Cookie', 'b=2')])
+
+    def test_unreachable_backend(self):
+        """Test connection errors propagate to the caller."""
+        pool = UpstreamPool(port=1, timeout=0.5)
+        pool.register('127.0.0.1')
+        with self.assertRaises(OSError):
+            fetch(pool, '/home')
+
+if __name__ == '__main__':
+    unittest.main()